@@ -3,7 +3,8 @@ from .models import (
     Student, Teacher, Question, Option, Answer, Career,
     Feedback, Attendance, WeeklyTest, PerformancePrediction,
     ImprovementStrategy, Notification, CareerRecommendationHistory,
-    Grade, FAQ, CourseSuggestion, ExamSchedule, PredictionFeedback
+    Grade, FAQ, CourseSuggestion, ExamSchedule, PredictionFeedback,
+    StudentStats, LLMResponseCache
 )
 
 # Register models for Django admin (NOT the custom admin1)
@@ -86,6 +87,19 @@ class PredictionFeedbackAdmin(admin.ModelAdmin):
     list_display = ['student', 'accuracy_rating', 'usefulness_rating', 'created_at']
     list_filter = ['accuracy_rating', 'usefulness_rating', 'created_at']
 
+# Register StudentStats (maintained automatically; rebuild with manage.py rebuild_student_stats)
+@admin.register(StudentStats)
+class StudentStatsAdmin(admin.ModelAdmin):
+    list_display = ['student', 'attendance_total', 'attendance_present', 'test_count', 'grade_count', 'updated_at']
+    search_fields = ['student__first_name', 'student__last_name', 'student__email']
+
+# Register LLMResponseCache (see manage.py llm_cache)
+@admin.register(LLMResponseCache)
+class LLMResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ['key', 'model_name', 'prompt_version', 'hit_count', 'last_hit_at', 'expires_at']
+    list_filter = ['model_name', 'prompt_version']
+    readonly_fields = ['created_at']
+
 # Register other models
 admin.site.register(Option)
 admin.site.register(Answer)
@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db.models import Avg, Count, Q
 from datetime import datetime, timedelta
 from .models import (
@@ -10,7 +11,11 @@ from .models import (
     Notification, CareerRecommendationHistory
 )
 from .ml_models import PerformancePredictionModel, ImprovementStrategyGenerator
-from .llm_integration import CareerRecommendationLLM, CourseRecommendationEngine
+from .features import extract_student_features
+from .stats import get_student_stats
+from .profiles import build_student_profile
+from . import recommendations
+from .llm_integration import CareerRecommendationLLM
 import json
 
 
@@ -25,60 +30,8 @@ def predict_performance(request):
 
     student = request.user.student
 
-    # Gather student data
-    attendance_data = Attendance.objects.filter(student=student)
-    test_data = WeeklyTest.objects.filter(student=student)
-
-    # Calculate metrics
-    total_days = attendance_data.count()
-    present_days = attendance_data.filter(status='Present').count()
-    attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
-
-    test_average = test_data.aggregate(Avg('score'))['score__avg'] or 0
-
-    # Get grades data for assignments and participation
-    from .models import Grade
-
-    # Calculate assignments completed percentage based on assignment grades
-    assignment_grades = Grade.objects.filter(
-        student=student,
-        grade_type='assignment'
-    )
-    assignments_completed = assignment_grades.aggregate(
-        Avg('percentage')
-    )['percentage__avg'] or test_average  # Use test average as fallback
-
-    # Calculate participation score based on quiz scores
-    quiz_grades = Grade.objects.filter(
-        student=student,
-        grade_type='quiz'
-    )
-    quiz_scores = quiz_grades.aggregate(
-        Avg('percentage')
-    )['percentage__avg'] or test_average  # Use test average as fallback
-
-    # Calculate previous grade from all grades
-    all_grades = Grade.objects.filter(student=student)
-    previous_grade = all_grades.aggregate(
-        Avg('percentage')
-    )['percentage__avg'] or test_average
-
-    # Estimate participation score from attendance and quiz performance
-    participation_score = (attendance_rate * 0.5 + quiz_scores * 0.5)
-
-    # Estimate study hours from performance metrics
-    study_hours = min(10, max(2, (test_average / 10)))  # Scale 2-10 hours based on performance
-
-    # Prepare data for ML model
-    student_data = {
-        'attendance_rate': attendance_rate,
-        'test_average': test_average,
-        'assignments_completed': assignments_completed,
-        'participation_score': participation_score,
-        'previous_grade': previous_grade,
-        'study_hours': study_hours,
-        'quiz_scores': quiz_scores
-    }
+    # Gather student data (attendance, tests and grade averages in three grouped queries)
+    student_data = extract_student_features(student)
 
     # Get prediction
     ml_model = PerformancePredictionModel()
@@ -139,76 +92,33 @@ def advanced_career_recommendations(request):
     student = request.user.student
 
     # Gather student profile data
-    from .models import Answer, Question
-    answers = Answer.objects.filter(student=student)
-
-    # Calculate performance metrics
-    test_average = WeeklyTest.objects.filter(
-        student=student
-    ).aggregate(Avg('score'))['score__avg'] or 0
-
-    # Get categories from questionnaire
-    categories = []
-    if answers.exists():
-        category_scores = {}
-        for answer in answers:
-            cat = answer.question.category
-            if cat not in category_scores:
-                category_scores[cat] = []
-            category_scores[cat].append(answer.score)
-
-        # Calculate average scores per category
-        for cat, scores in category_scores.items():
-            avg_score = sum(scores) / len(scores)
-            if avg_score > 3:  # Threshold for interest
-                categories.append(cat)
-
-    student_profile = {
-        'performance_grade': test_average,
-        'strong_subjects': ['Mathematics', 'Science'],  # Can be enhanced
-        'interests': categories[:3] if categories else ['Technology'],
-        'skills': ['Problem Solving', 'Critical Thinking'],  # Can be enhanced
-        'categories': categories[:2] if categories else ['Tech'],
-        'test_average': test_average
-    }
-
-    # Generate recommendations using LLM
-    llm = CareerRecommendationLLM()
-    recommendations = llm.generate_career_recommendations(student_profile)
-
-    # Generate course recommendations
-    course_engine = CourseRecommendationEngine()
-    current_performance = {
-        'average_grade': test_average,
-        'categories': categories[:2] if categories else ['Tech']
-    }
-    bridging_courses = course_engine.recommend_bridging_courses(
-        current_performance,
-        recommendations.get('careers', [])
-    )
-
-    # Save to history
-    history = CareerRecommendationHistory.objects.create(
-        student=student,
-        careers=recommendations.get('careers', []),
-        skills_recommended=recommendations.get('skills', []),
-        courses_suggested=[course['course_name'] for course in bridging_courses],
-        llm_used=llm.use_llm
-    )
-
-    # Create notification
-    Notification.objects.create(
-        student=student,
-        title='New Career Recommendations Available',
-        message=f'We have generated personalized career recommendations based on your profile. Top recommendation: {recommendations.get("careers", ["Various options"])[0] if recommendations.get("careers") else "Check your dashboard"}',
-        notification_type='career',
-        priority='medium'
-    )
+    student_profile = build_student_profile(student)
+
+    # Show the latest stored result (or the rule-based fallback) right away;
+    # the LLM call runs in the background job queue
+    history = recommendations.latest(student)
+    stream = False
+    if getattr(settings, 'CAREER_RECOMMENDATION_STREAMING', False):
+        # The page fetches a fresh result from stream_career_recommendations instead
+        pending = recommendations.is_pending(student)
+        stream = not pending and recommendations.is_stale(history)
+    else:
+        pending = recommendations.request_refresh(student, history)
+        if history is None and not pending:
+            history = recommendations.latest(student)  # generated inline (JOB_QUEUE_EAGER)
+
+    if history is not None:
+        result = recommendations.as_recommendations(history)
+    else:
+        result = CareerRecommendationLLM()._fallback_recommendations(student_profile)
 
     context = {
-        'recommendations': recommendations,
-        'bridging_courses': bridging_courses,
+        'recommendations': result,
+        'bridging_courses': recommendations.bridging_courses(student_profile, result),
         'student_profile': student_profile,
+        'pending': pending,
+        'stream': stream,
+        'latest_history_id': history.id if history else None,
         'history': CareerRecommendationHistory.objects.filter(
             student=student
         ).order_by('-created_at')[:3]
@@ -315,51 +225,13 @@ def create_automated_notifications():
     """
     Background task to create automated notifications
     Called by a scheduler (e.g., Celery beat)
-    """
-    from datetime import date
-    today = date.today()
-
-    # Check for low attendance
-    students = Student.objects.filter(is_active=True)
-    for student in students:
-        recent_attendance = Attendance.objects.filter(
-            student=student,
-            date__gte=today - timedelta(days=7)
-        )
-        if recent_attendance.count() > 0:
-            attendance_rate = recent_attendance.filter(
-                status='Present'
-            ).count() / recent_attendance.count() * 100
-
-            if attendance_rate < 75:
-                Notification.objects.create(
-                    student=student,
-                    title='Low Attendance Alert',
-                    message=f'Your attendance is {attendance_rate:.1f}% in the last 7 days. Please improve your attendance to maintain good academic standing.',
-                    notification_type='attendance',
-                    priority='high'
-                )
-
-    # Check for declining test scores
-    for student in students:
-        recent_tests = WeeklyTest.objects.filter(
-            student=student
-        ).order_by('-test_date')[:3]
-
-        if recent_tests.count() >= 3:
-            scores = [test.score for test in recent_tests]
-            if scores[0] < scores[1] < scores[2]:  # Declining trend
-                Notification.objects.create(
-                    student=student,
-                    title='Performance Decline Alert',
-                    message='Your recent test scores show a declining trend. Consider reviewing improvement strategies.',
-                    notification_type='performance',
-                    priority='high'
-                )
 
-    # Upcoming test reminders
-    # This would require a TestSchedule model, which can be added later
-    pass
+    Kept for existing schedules; the attendance and declining-score rules now
+    live in new_app.alerts together with the ones from
+    notification_views.send_automated_notifications, deduplicated and incremental.
+    """
+    from .alerts import run_alert_scan
+    return run_alert_scan().stages
 
 
 @login_required
@@ -422,7 +294,7 @@ def performance_dashboard(request):
         'student': student,
         'latest_prediction': predictions.first() if predictions else None,
         'attendance_rate': attendance_rate,
-        'test_average': test_scores.aggregate(Avg('score'))['score__avg'] or 0,
+        'test_average': get_student_stats(student).test_average or 0,
         'active_strategies': active_strategies,
         'unread_notifications': unread_notifications,
         'chart_data': json.dumps(chart_data),
@@ -430,4 +302,82 @@ def performance_dashboard(request):
         'recent_attendance': attendance_data.order_by('-date')[:7]
     }
 
-    return render(request, 'enhanced_dashboard.html', context)
\ No newline at end of file
+    return render(request, 'enhanced_dashboard.html', context)
+
+@login_required
+def llm_cache_stats(request):
+    """
+    LLM response cache hit/miss counts and latencies for this server process (staff only)
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+
+    from . import llm_cache
+    return JsonResponse(llm_cache.stats())
+
+
+@login_required
+def career_recommendations_status(request):
+    """
+    Polling endpoint for the advanced recommendations page: whether generation is
+    still running and the latest stored result
+    """
+    if not hasattr(request.user, 'student'):
+        return JsonResponse({'error': 'Only students can access this feature.'}, status=403)
+
+    student = request.user.student
+    history = recommendations.latest(student)
+    return JsonResponse({
+        'status': 'pending' if recommendations.is_pending(student) else 'ready',
+        'history_id': history.id if history else None,
+        'created_at': history.created_at.isoformat() if history else None,
+        'recommendations': recommendations.as_recommendations(history) if history else None,
+    })
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@login_required
+def stream_career_recommendations(request):
+    """
+    Server-sent events: 'chunk' events with completion text as it arrives, then a
+    'done' event once the parsed result has been saved to history. A fresh stored
+    result is sent as 'done' straight away, and while another request or job is
+    already generating, 'done' carries "pending" so the page falls back to polling.
+    """
+    if not hasattr(request.user, 'student'):
+        return JsonResponse({'error': 'Only students can access this feature.'}, status=403)
+
+    student = request.user.student
+
+    def events():
+        yield ': connected\n\n'  # first byte goes out before the LLM call starts
+        history = recommendations.latest(student)
+        if not recommendations.is_stale(history):
+            result = recommendations.as_recommendations(history)
+            yield _sse('done', {'history_id': history.id, 'recommendations': result})
+            return
+        reservation = recommendations.reserve_generation(student)
+        if reservation is None:
+            yield _sse('done', {'history_id': history.id if history else None, 'pending': True})
+            return
+
+        try:
+            student_profile = build_student_profile(student)
+            llm = CareerRecommendationLLM()
+            for kind, value in llm.stream_career_recommendations(student_profile):
+                if kind == 'text':
+                    yield _sse('chunk', {'text': value})
+                else:
+                    result, llm_used = value
+                    history = recommendations.store(student, student_profile, result, llm_used)
+                    yield _sse('done', {'history_id': history.id, 'recommendations': result})
+        finally:
+            recommendations.release_generation(reservation)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,332 @@
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Value, Window
+from django.db.models.functions import Lag, RowNumber
+from django.utils import timezone
+from .models import (
+    AlertCheckpoint, Attendance, WeeklyTest, Grade,
+    ExamSchedule, Notification, CourseSuggestion
+)
+
+# Source tables whose new rows can trigger per-student alerts
+SOURCES = {
+    'attendance': Attendance,
+    'weekly_test': WeeklyTest,
+    'grade': Grade,
+}
+
+CHUNK_SIZE = 500
+# Most id gaps remembered per source; the oldest are dropped beyond this
+MAX_GAPS = 200
+
+
+class _StageTimer:
+    """
+    Collects (rows, seconds) per stage of an alert run
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        rows = result if isinstance(result, int) else len(result)
+        self.stages[name] = {'rows': rows, 'seconds': round(time.perf_counter() - start, 4)}
+        return result
+
+    def summary(self):
+        return ', '.join(
+            f"{name}: {stage['rows']} in {stage['seconds']:.3f}s" for name, stage in self.stages.items()
+        )
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _gap_filter(gaps):
+    condition = Q(pk__in=[])
+    for first, last, _ in gaps:
+        condition |= Q(id__range=(first, last))
+    return condition
+
+
+def _remaining_gaps(gaps, filled):
+    """
+    The parts of each [first, last, first_seen] id range not covered by `filled` ids
+    """
+    remaining = []
+    filled = sorted(filled)
+    for first, last, seen in gaps:
+        for found in (i for i in filled if first <= i <= last):
+            if found > first:
+                remaining.append([first, found - 1, seen])
+            first = found + 1
+        if first <= last:
+            remaining.append([first, last, seen])
+    return remaining
+
+
+def _changed_students(checkpoints, now):
+    """
+    For each source, the active students with rows newer than its checkpoint,
+    plus the new (high-water mark, gaps) to store once they have been evaluated.
+
+    Ids are allocated when a row is inserted but the row only becomes visible at
+    commit, so a transaction that commits late can land below a mark that has
+    already moved past it. The ids missing under the mark are therefore kept as
+    gaps and re-checked on every run until they fill (those rows count as new)
+    or are older than ALERT_LATE_COMMIT_SECONDS (rolled back or deleted).
+    """
+    expire_before = now.timestamp() - getattr(settings, 'ALERT_LATE_COMMIT_SECONDS', 600)
+    changed, marks = {}, {}
+    for source, model in SOURCES.items():
+        checkpoint = checkpoints[source]
+        last_id = checkpoint.last_id
+        gaps = [gap for gap in checkpoint.gaps if gap[2] >= expire_before]
+        max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or last_id
+
+        new_rows = Q(id__gt=last_id, id__lte=max_id)
+        scanned = _gap_filter(gaps)
+
+        # Gaps are worked out before the changed students are read: a row that
+        # commits in between is then still a gap (and re-checked next run)
+        # rather than counted as seen without ever being evaluated
+        if gaps:
+            gaps = _remaining_gaps(gaps, model.objects.filter(scanned).values_list('id', flat=True))
+        holes = model.objects.filter(new_rows).annotate(
+            previous=Window(Lag('id', default=Value(last_id)), order_by=F('id').asc())
+        ).filter(id__gt=F('previous') + 1).values_list('previous', 'id')
+        gaps += [[previous + 1, next_id - 1, now.timestamp()] for previous, next_id in holes]
+
+        changed[source] = set(model.objects.filter(
+            new_rows | scanned, student__is_active=True
+        ).values_list('student_id', flat=True).distinct())
+        marks[source] = (max_id, gaps[-MAX_GAPS:])
+    return changed, marks
+
+
+def _already_alerted(student_ids, title, days=7):
+    return set(Notification.objects.filter(
+        student_id__in=student_ids,
+        title=title,
+        created_at__gte=timezone.now() - timedelta(days=days)
+    ).values_list('student_id', flat=True))
+
+
+def _attendance_alerts(student_ids, today):
+    """
+    Weekly attendance under 50% is critical, under 75% is low; one alert of each kind per week
+    """
+    notifications = []
+    for chunk in _chunks(student_ids):
+        rows = Attendance.objects.filter(
+            student_id__in=chunk,
+            date__gte=today - timedelta(days=7)
+        ).values('student_id').annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='Present'))
+        ).filter(present__lt=F('total') * 0.75).order_by()
+        rows = list(rows)
+        critical_sent = _already_alerted([r['student_id'] for r in rows], 'Critical Attendance Alert')
+        low_sent = _already_alerted([r['student_id'] for r in rows], 'Low Attendance Alert')
+
+        for row in rows:
+            attendance_rate = row['present'] / row['total'] * 100
+            if attendance_rate < 50 and row['student_id'] not in critical_sent:
+                notifications.append(Notification(
+                    student_id=row['student_id'],
+                    title='Critical Attendance Alert',
+                    message=f'Your attendance is critically low at {attendance_rate:.1f}%. Immediate improvement required.',
+                    notification_type='attendance',
+                    priority='high'
+                ))
+            elif 50 <= attendance_rate < 75 and row['student_id'] not in low_sent | critical_sent:
+                notifications.append(Notification(
+                    student_id=row['student_id'],
+                    title='Low Attendance Alert',
+                    message=f'Your attendance is {attendance_rate:.1f}% in the last 7 days. Please improve your attendance to maintain good academic standing.',
+                    notification_type='attendance',
+                    priority='high'
+                ))
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return len(notifications)
+
+
+def _latest_three(model, value_field, date_field, student_ids, **filters):
+    """
+    {student_id: [value, ...]} with each student's three most recent rows (newest first);
+    students with fewer than three matching rows are left out
+    """
+    values = {}
+    for chunk in _chunks(student_ids):
+        rows = model.objects.filter(student_id__in=chunk, **filters).annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=[F('student_id')],
+                order_by=[F(date_field).desc(), F('id').desc()]
+            )
+        ).filter(position__lte=3).order_by('student_id', 'position').values_list('student_id', value_field)
+        for student_id, value in rows:
+            values.setdefault(student_id, []).append(value)
+    return {student_id: v for student_id, v in values.items() if len(v) == 3}
+
+
+def _test_decline_alerts(student_ids):
+    """
+    Three weekly tests in a row, each lower than the one before
+    """
+    latest = _latest_three(WeeklyTest, 'score', 'test_date', student_ids)
+    declining = [sid for sid, scores in latest.items() if scores[0] < scores[1] < scores[2]]
+    already_sent = _already_alerted(declining, 'Performance Decline Alert')
+
+    notifications = [
+        Notification(
+            student_id=student_id,
+            title='Performance Decline Alert',
+            message='Your recent test scores show a declining trend. Consider reviewing improvement strategies.',
+            notification_type='performance',
+            priority='high'
+        )
+        for student_id in declining if student_id not in already_sent
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return len(notifications)
+
+
+def _grade_decline_alerts(student_ids, today):
+    """
+    Average of the last three grades this month more than 10 points under the three before it
+    """
+    cutoff = today - timedelta(days=30)
+    recent = _latest_three(Grade, 'percentage', 'date', student_ids, date__gte=cutoff)
+    older = _latest_three(Grade, 'percentage', 'date', list(recent), date__lt=cutoff)
+    already_sent = _already_alerted(list(older), 'Performance Decline Detected')
+
+    notifications = []
+    for student_id, older_grades in older.items():
+        if student_id in already_sent:
+            continue
+        recent_avg = sum(recent[student_id]) / 3
+        older_avg = sum(older_grades) / 3
+        if recent_avg < older_avg - 10:  # 10% decline
+            notifications.append(Notification(
+                student_id=student_id,
+                title='Performance Decline Detected',
+                message=f'Your recent average ({recent_avg:.1f}%) shows a decline from previous performance ({older_avg:.1f}%). Consider reviewing improvement strategies.',
+                notification_type='performance',
+                priority='high'
+            ))
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return len(notifications)
+
+
+def _exam_reminders(tomorrow):
+    upcoming_exams = list(ExamSchedule.objects.filter(
+        exam_date__date=tomorrow,
+        reminder_sent=False
+    ))
+    if not upcoming_exams:
+        return 0
+
+    exams_by_id = {exam.id: exam for exam in upcoming_exams}
+    enrolments = ExamSchedule.students.through.objects.filter(
+        examschedule_id__in=exams_by_id
+    ).values_list('examschedule_id', 'student_id')
+
+    notifications = []
+    for exam_id, student_id in enrolments:
+        exam = exams_by_id[exam_id]
+        notifications.append(Notification(
+            student_id=student_id,
+            title=f'Exam Tomorrow: {exam.subject}',
+            message=f'Reminder: {exam.subject} {exam.get_exam_type_display()} is tomorrow at {exam.exam_date.strftime("%H:%M")}',
+            notification_type='test',
+            priority='high'
+        ))
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+        ExamSchedule.objects.filter(id__in=exams_by_id).update(reminder_sent=True)
+    return len(notifications)
+
+
+def _course_suggestion_reminders():
+    now = timezone.now()
+    pending = CourseSuggestion.objects.filter(
+        is_accepted__isnull=True,
+        created_at__gte=now - timedelta(days=7),
+        created_at__lt=now - timedelta(days=3)
+    ).filter(
+        # No reminder mentioning this course in the last 3 days
+        ~Exists(Notification.objects.filter(
+            student=OuterRef('student_id'),
+            message__contains=OuterRef('course_name'),
+            created_at__gte=now - timedelta(days=3)
+        ))
+    ).values_list('student_id', 'course_name')
+
+    notifications = [
+        Notification(
+            student_id=student_id,
+            title='Pending Course Suggestion',
+            message=f'Reminder: Please review the suggested course "{course_name}" and provide your feedback.',
+            notification_type='career',
+            priority='medium'
+        )
+        for student_id, course_name in dict.fromkeys(pending)
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return len(notifications)
+
+
+def run_alert_scan():
+    """
+    Create automated notifications for students with activity since the last run.
+
+    Attendance, test and grade rules are evaluated only for students who have
+    rows newer than the stored AlertCheckpoint for that table (including rows
+    that committed late, under the previous mark), so the cost follows the
+    change volume, not the roster size. Exam and course-suggestion
+    reminders are time based and scan their own (small, flagged) tables.
+    Returns the per-stage counts and timings.
+    """
+    today = date.today()
+    timer = _StageTimer()
+
+    for source in SOURCES:
+        AlertCheckpoint.objects.get_or_create(source=source)
+
+    # The checkpoint rows stay locked until the new marks are stored, so a
+    # second scan waits for this one instead of evaluating the same rows
+    with transaction.atomic():
+        checkpoints = {
+            checkpoint.source: checkpoint
+            for checkpoint in AlertCheckpoint.objects.select_for_update().filter(
+                source__in=SOURCES
+            ).order_by('source')
+        }
+        start = time.perf_counter()
+        changed, marks = _changed_students(checkpoints, timezone.now())
+        timer.stages['changed_students'] = {
+            'rows': len(set().union(*changed.values())),
+            'seconds': round(time.perf_counter() - start, 4)
+        }
+
+        timer.run('exam_reminders', _exam_reminders, today + timedelta(days=1))
+        timer.run('attendance_alerts', _attendance_alerts, changed['attendance'], today)
+        timer.run('test_decline_alerts', _test_decline_alerts, changed['weekly_test'])
+        timer.run('grade_decline_alerts', _grade_decline_alerts, changed['grade'], today)
+        timer.run('suggestion_reminders', _course_suggestion_reminders)
+
+        now = timezone.now()
+        for source, checkpoint in checkpoints.items():
+            last_id, gaps = marks[source]
+            AlertCheckpoint.objects.filter(id=checkpoint.id).update(last_id=last_id, gaps=gaps, last_run_at=now)
+    return timer
@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from . import stats
+from .models import Attendance, Student
+from .tasks import enqueue_course_suggestions
+
+STATUSES = ('Present', 'Absent')
+
+
+def todays_statuses(teacher, student_ids):
+    """
+    {student_id: status} already recorded by this teacher today
+    """
+    return dict(Attendance.objects.filter(
+        teacher=teacher, date=date.today(), student_id__in=student_ids
+    ).values_list('student_id', 'status'))
+
+
+def mark_attendance(teacher, statuses):
+    """
+    Record today's attendance for many students at once: {student_id: 'Present' | 'Absent'}.
+
+    New rows go in with one bulk_create, students already marked today by this
+    teacher are corrected in place (one row per student, teacher and day), the
+    stats rollups are adjusted, and each affected student gets a single queued
+    course-suggestion evaluation. Raises ValueError for unknown students or statuses.
+    Returns {'created', 'updated', 'unchanged'} counts.
+    """
+    statuses = {int(student_id): status for student_id, status in statuses.items()}
+    invalid = sorted({str(status) for status in statuses.values() if status not in STATUSES})
+    if invalid:
+        raise ValueError(f"Invalid attendance status: {', '.join(invalid)}")
+    known = set(Student.objects.filter(id__in=statuses, is_active=True).values_list('id', flat=True))
+    unknown = sorted(set(statuses) - known)
+    if unknown:
+        raise ValueError(f"Unknown students: {', '.join(map(str, unknown))}")
+
+    for attempt in range(2):
+        try:
+            created, changed, existing = _save(teacher, statuses)
+            break
+        except IntegrityError:
+            # Another request marked some of these students between our read and the
+            # insert (nothing to lock yet on a first mark); their rows exist now, so
+            # the second pass updates them instead
+            if attempt:
+                raise
+
+    enqueue_course_suggestions([record.student_id for record in created + changed])
+    return {'created': len(created), 'updated': len(changed), 'unchanged': len(existing) - len(changed)}
+
+
+def _todays_rows(teacher, student_ids):
+    """
+    This teacher's rows for today, locked for update: {student_id: Attendance}
+    """
+    return {
+        record.student_id: record
+        for record in Attendance.objects.select_for_update().filter(
+            teacher=teacher, date=date.today(), student_id__in=student_ids
+        )
+    }
+
+
+def _save(teacher, statuses):
+    """
+    One transaction of mark_attendance: returns (created, changed, existing)
+    """
+    with transaction.atomic():
+        existing = _todays_rows(teacher, statuses)
+        created = [
+            Attendance(student_id=student_id, teacher=teacher, status=status)
+            for student_id, status in statuses.items() if student_id not in existing
+        ]
+        changed = [record for student_id, record in existing.items() if record.status != statuses[student_id]]
+
+        # bulk_create skips post_save, so the rollups are updated here
+        Attendance.objects.bulk_create(created)
+        stats.record_attendance(created)
+        if changed:
+            stats.record_attendance(changed, sign=-1)
+            for record in changed:
+                record.status = statuses[record.student_id]
+            Attendance.objects.bulk_update(changed, ['status'])
+            stats.record_attendance(changed)
+    return created, changed, existing
@@ -0,0 +1,243 @@
+import re
+import zlib
+from functools import cached_property
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg
+from .models import Answer, Career
+from .versions import SharedVersion
+
+CATEGORIES = ['Tech', 'Creative', 'Analytical', 'Collaborative']
+
+TOP_CATEGORIES = 2
+CAREERS_PER_CATEGORY = 3
+
+# Similarity mode: category dimensions followed by hashed description/question terms
+TERM_DIMS = 256
+CATEGORY_WEIGHT = 2.0
+STOP_WORDS = frozenset(
+    'the and for with you your are our that this from into about like have has will would '
+    'can who what how they them their enjoy work working'.split()
+)
+
+version = SharedVersion('career_catalogue')
+
+# Per-process copy of the active-career index, reused while the shared version is unchanged
+_local = {'version': None, 'index': None}
+
+
+class CareerIndex:
+    """
+    Active careers grouped by category, plus the arrays batch matching needs:
+    category_of[j] is the CATEGORIES position of careers[j] (-1 for other categories)
+    and rank_in_category[j] its position within that category.
+    """
+
+    def __init__(self, careers):
+        self.careers = list(careers)
+        self.by_category = {}
+        for career in self.careers:
+            self.by_category.setdefault(career.category, []).append(career)
+
+        self.category_of = np.array(
+            [CATEGORIES.index(c.category) if c.category in CATEGORIES else -1 for c in self.careers],
+            dtype=int
+        )
+        self.rank_in_category = np.array(
+            [self.by_category[c.category].index(c) for c in self.careers], dtype=int
+        )
+
+    def defaults(self, n=CAREERS_PER_CATEGORY):
+        return self.careers[:n]
+
+    @cached_property
+    def embeddings(self):
+        """
+        Row-normalised (careers x dims) matrix, built on first use for this catalogue version
+        """
+        matrix = np.zeros((len(self.careers), len(CATEGORIES) + TERM_DIMS))
+        for j, career in enumerate(self.careers):
+            if self.category_of[j] >= 0:
+                matrix[j, self.category_of[j]] = CATEGORY_WEIGHT
+            _add_terms(matrix[j, len(CATEGORIES):], f'{career.name} {career.description}')
+        return _normalize(matrix).astype(np.float32)
+
+
+def get_index():
+    """
+    The active-career index for this process (no queries while the catalogue version is
+    unchanged and was checked recently)
+    """
+    current = version.get()
+    if _local['version'] != current or _local['index'] is None:
+        _local['index'] = CareerIndex(Career.objects.filter(is_active=True).order_by('id'))
+        _local['version'] = current
+    return _local['index']
+
+
+def invalidate():
+    """
+    Call after adding, editing or removing careers; every process picks up the new
+    index within DATA_VERSION_CHECK_SECONDS
+    """
+    version.bump()
+
+
+def category_scores(student):
+    """
+    {category: average answer score} for one student, from a single grouped query
+    """
+    rows = Answer.objects.filter(student=student).values('question__category') \
+        .annotate(avg_score=Avg('score')).order_by()
+    return {row['question__category']: row['avg_score'] for row in rows}
+
+
+def _add_terms(row, text, weight=1.0):
+    """
+    Add hashed term counts for `text` into `row` (crc32, so buckets are stable across processes)
+    """
+    for term in re.findall(r'[a-z]{3,}', text.lower()):
+        if term not in STOP_WORDS:
+            row[zlib.crc32(term.encode()) % TERM_DIMS] += weight
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def profile_vector(answers):
+    """
+    Unit vector for a student from [(category, question_text, score), ...]:
+    category averages on a 0-1 scale plus the terms of each answered question,
+    weighted by how strongly the student agreed with it
+    """
+    vector = np.zeros(len(CATEGORIES) + TERM_DIMS)
+    totals = np.zeros(len(CATEGORIES))
+    counts = np.zeros(len(CATEGORIES))
+    for category, text, score in answers:
+        if category in CATEGORIES:
+            totals[CATEGORIES.index(category)] += score
+            counts[CATEGORIES.index(category)] += 1
+        _add_terms(vector[len(CATEGORIES):], text, score / 5)
+    averages = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+    vector[:len(CATEGORIES)] = averages / 5 * CATEGORY_WEIGHT
+    return _normalize(vector)
+
+
+def rank_by_similarity(vector, limit=TOP_CATEGORIES * CAREERS_PER_CATEGORY, index=None):
+    """
+    Ranked [{'career', 'category', 'score'}] by cosine similarity (score as a 0-100 percentage);
+    one matrix-vector product over the whole catalogue
+    """
+    index = index or get_index()
+    if not index.careers or not vector.any():
+        return []
+    similarity = index.embeddings @ vector.astype(np.float32)
+    limit = min(limit, len(similarity))
+    top = np.argpartition(-similarity, limit - 1)[:limit]
+    top = top[np.lexsort((top, -similarity[top]))]
+    return [
+        {'career': index.careers[j], 'category': index.careers[j].category, 'score': round(float(similarity[j]) * 100, 1)}
+        for j in top if similarity[j] > 0
+    ]
+
+
+def top_categories(scores, limit=TOP_CATEGORIES):
+    """
+    [(score, category), ...] for the best-scoring known categories with a positive score
+    """
+    return sorted(
+        [(scores.get(cat, 0), cat) for cat in CATEGORIES if scores.get(cat, 0) > 0],
+        reverse=True
+    )[:limit]
+
+
+def rank_careers(scores, index=None):
+    """
+    Ranked [{'career', 'category', 'score'}] for a category score dict: up to three
+    careers from each of the two best categories, scored as a 0-100 match percentage
+    """
+    index = index or get_index()
+    matches = []
+    for score, category in top_categories(scores):
+        for career in index.by_category.get(category, [])[:CAREERS_PER_CATEGORY]:
+            matches.append({'career': career, 'category': category, 'score': min(score * 20, 100.0)})
+    return matches
+
+
+def match_student(student, mode=None):
+    """
+    (category scores, ranked matches) for one student.
+    mode is 'category' (top categories, first careers in each) or 'similarity'
+    (cosine ranking); defaults to settings.CAREER_MATCHING_MODE.
+    """
+    mode = mode or getattr(settings, 'CAREER_MATCHING_MODE', 'category')
+    if mode != 'similarity':
+        scores = category_scores(student)
+        return scores, rank_careers(scores)
+
+    answers = list(Answer.objects.filter(student=student).values_list('question__category', 'question__text', 'score'))
+    totals = {}
+    for category, _, score in answers:
+        totals.setdefault(category, []).append(score)
+    scores = {category: sum(values) / len(values) for category, values in totals.items()}
+    return scores, rank_by_similarity(profile_vector(answers))
+
+
+def score_matrix(students=None):
+    """
+    (student_ids, matrix) where matrix[i, c] is student i's average answer score
+    for CATEGORIES[c]; one grouped query for the whole roster (or the given students)
+    """
+    answers = Answer.objects.all()
+    if students is not None:
+        answers = answers.filter(student__in=students)
+    rows = list(answers.filter(question__category__in=CATEGORIES)
+                .values_list('student_id', 'question__category')
+                .annotate(avg_score=Avg('score')).order_by())
+
+    student_ids = sorted({student_id for student_id, _, _ in rows})
+    position = {student_id: i for i, student_id in enumerate(student_ids)}
+    matrix = np.zeros((len(student_ids), len(CATEGORIES)))
+    for student_id, category, avg_score in rows:
+        matrix[position[student_id], CATEGORIES.index(category)] = avg_score
+    return student_ids, matrix
+
+
+def batch_match(students=None, top_k=TOP_CATEGORIES * CAREERS_PER_CATEGORY, index=None):
+    """
+    Score every student against every active career at once.
+    Returns {student_id: [(career, score), ...]} with the same ranking rank_careers gives.
+    """
+    index = index or get_index()
+    student_ids, scores = score_matrix(students)
+    if not student_ids or not index.careers:
+        return {student_id: [] for student_id in student_ids}
+
+    # Categories are ranked per student like top_categories: by score, ties by name
+    # (both descending). Each career takes its category's score; categories outside
+    # a student's top two (or with no positive score) and careers past the first
+    # three per category drop out, and the rest are ordered by category rank, then
+    # position within the category, exactly as rank_careers lists them.
+    name_rank = np.argsort(np.argsort(CATEGORIES))
+    order = np.lexsort((np.broadcast_to(-name_rank, scores.shape), -scores), axis=1)
+    category_rank = np.empty_like(order)
+    np.put_along_axis(category_rank, order, np.broadcast_to(np.arange(len(CATEGORIES)), order.shape), axis=1)
+    in_top = (category_rank < TOP_CATEGORIES) & (scores > 0)
+
+    known = index.category_of >= 0
+    category = np.clip(index.category_of, 0, None)
+    eligible = known & (index.rank_in_category < CAREERS_PER_CATEGORY) & in_top[:, category]
+    career_scores = np.minimum(scores[:, category] * 20, 100.0)
+    sort_key = np.where(eligible, category_rank[:, category] * CAREERS_PER_CATEGORY + index.rank_in_category,
+                        np.iinfo(int).max)
+
+    ranked = np.argsort(sort_key, axis=1, kind='stable')[:, :top_k]
+    results = {}
+    for i, student_id in enumerate(student_ids):
+        results[student_id] = [
+            (index.careers[j], float(career_scores[i, j])) for j in ranked[i] if eligible[i, j]
+        ]
+    return results
@@ -0,0 +1,132 @@
+import numpy as np
+from django.db.models import Avg, Count, Q, QuerySet
+from .models import Attendance, WeeklyTest, Grade
+from .ml_models import FEATURE_COLUMNS
+
+
+class FeatureTable:
+    """
+    Columnar feature vectors for a set of students.
+    columns[name] is a float array aligned with student_ids.
+    """
+
+    def __init__(self, student_ids, columns):
+        self.student_ids = np.asarray(student_ids, dtype=np.int64)
+        self.columns = columns
+        self._positions = {student_id: i for i, student_id in enumerate(self.student_ids.tolist())}
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def matrix(self):
+        """
+        (n_students, n_features) matrix in FEATURE_COLUMNS order, ready for predict_batch
+        """
+        return np.column_stack([self.columns[name] for name in FEATURE_COLUMNS]) \
+            if len(self) else np.empty((0, len(FEATURE_COLUMNS)))
+
+    def row(self, student_id):
+        """
+        The student_data dict for one student, as the single-student views expect it
+        """
+        i = self._positions[student_id]
+        return {name: float(self.columns[name][i]) for name in FEATURE_COLUMNS}
+
+    def metric(self, name, student_id):
+        return float(self.columns[name][self._positions[student_id]])
+
+
+def extract_features(students=None):
+    """
+    Build the student_data feature vectors for many students at once.
+
+    `students` may be a Student queryset, an iterable of Students or ids, or
+    None for every student. Always runs one grouped query per source table
+    (Attendance, WeeklyTest, Grade), plus one to list the ids when a
+    queryset or None is given.
+    """
+    if students is None:
+        from .models import Student
+        students = Student.objects.all()
+
+    if isinstance(students, QuerySet):
+        student_filter = {'student__in': students.values('id')}
+        student_ids = list(students.order_by('id').values_list('id', flat=True))
+    else:
+        student_ids = [getattr(s, 'id', s) for s in students]
+        student_filter = {'student_id__in': student_ids}
+
+    positions = {student_id: i for i, student_id in enumerate(student_ids)}
+    n = len(student_ids)
+
+    def empty():
+        return np.full(n, np.nan)
+
+    total_days, present_days, test_avg = np.zeros(n), np.zeros(n), empty()
+    assignment_avg, quiz_avg, grade_avg = empty(), empty(), empty()
+
+    if n:
+        attendance_rows = Attendance.objects.filter(**student_filter).values('student_id').annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='Present')),
+        ).order_by()
+        for row in attendance_rows:
+            i = positions.get(row['student_id'])
+            if i is not None:
+                total_days[i] = row['total']
+                present_days[i] = row['present']
+
+        test_rows = WeeklyTest.objects.filter(**student_filter).values('student_id').annotate(
+            avg_score=Avg('score'),
+        ).order_by()
+        for row in test_rows:
+            i = positions.get(row['student_id'])
+            if i is not None:
+                test_avg[i] = row['avg_score']
+
+        grade_rows = Grade.objects.filter(**student_filter).values('student_id').annotate(
+            assignment_avg=Avg('percentage', filter=Q(grade_type='assignment')),
+            quiz_avg=Avg('percentage', filter=Q(grade_type='quiz')),
+            overall_avg=Avg('percentage'),
+        ).order_by()
+        for row in grade_rows:
+            i = positions.get(row['student_id'])
+            if i is not None:
+                assignment_avg[i] = np.nan if row['assignment_avg'] is None else row['assignment_avg']
+                quiz_avg[i] = np.nan if row['quiz_avg'] is None else row['quiz_avg']
+                grade_avg[i] = np.nan if row['overall_avg'] is None else row['overall_avg']
+
+    # Same derivations as the per-student code in ai_views.predict_performance:
+    # missing (or zero) grade averages fall back to the test average.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        attendance_rate = np.where(total_days > 0, present_days / total_days * 100, 0.0)
+    test_average = np.nan_to_num(test_avg, nan=0.0)
+
+    def or_test_average(values):
+        return np.where(np.isnan(values) | (values == 0), test_average, values)
+
+    assignments_completed = or_test_average(assignment_avg)
+    quiz_scores = or_test_average(quiz_avg)
+    previous_grade = or_test_average(grade_avg)
+
+    columns = {
+        'attendance_rate': attendance_rate,
+        'test_average': test_average,
+        'assignments_completed': assignments_completed,
+        'participation_score': attendance_rate * 0.5 + quiz_scores * 0.5,
+        'previous_grade': previous_grade,
+        'study_hours': np.clip(test_average / 10, 2, 10),
+        'quiz_scores': quiz_scores,
+        # Not model inputs, but reported alongside predictions
+        'grade_average': np.nan_to_num(grade_avg, nan=0.0),
+        'total_days': total_days,
+        'present_days': present_days,
+    }
+    return FeatureTable(student_ids, columns)
+
+
+def extract_student_features(student):
+    """
+    The student_data dict for a single student (three aggregate queries)
+    """
+    return extract_features([student]).row(student.id)
@@ -0,0 +1,194 @@
+import csv
+import io
+import math
+import os
+import zipfile
+
+from django.db import transaction
+from . import stats
+from .models import Grade, Notification, Student, WeeklyTest
+from .tasks import enqueue_course_suggestions
+
+try:
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+GRADE_TYPES = {choice for choice, _ in Grade._meta.get_field('grade_type').choices}
+
+# Required and optional columns per import kind (header names, case-insensitive)
+COLUMNS = {
+    'grades': (['email', 'subject', 'grade_type', 'score'], ['max_score', 'comments']),
+    'tests': (['email', 'score'], []),
+}
+CHUNK_SIZE = 1000
+# Weekly test scores are percentages, as on the manual entry form (min 0, max 100)
+MAX_TEST_SCORE = 100
+MAX_REPORTED_ERRORS = 100
+
+
+def read_rows(fileobj, filename):
+    """
+    Yield (line number, {column: value}) from a CSV or XLSX upload one row at a time,
+    with header names lower-cased and blank rows skipped
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        if not OPENPYXL_AVAILABLE:
+            raise ValueError('XLSX import needs the openpyxl package; upload a CSV file instead.')
+        try:
+            workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException):
+            raise ValueError('The file is not a valid XLSX workbook.')
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell or '').strip().lower() for cell in next(rows, ())]
+            for line, values in enumerate(rows, start=2):
+                if any(value not in (None, '') for value in values):
+                    yield line, _as_dict(header, list(values))
+        finally:
+            workbook.close()
+    elif extension == '.csv':
+        if isinstance(fileobj.read(0), bytes):
+            fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        reader = csv.reader(fileobj)
+        try:
+            header = [name.strip().lower() for name in next(reader, [])]
+            for values in reader:
+                if any(value.strip() for value in values):
+                    yield reader.line_num, _as_dict(header, values)
+        except csv.Error as e:
+            raise ValueError(f'Invalid CSV at line {reader.line_num}: {e}')
+    else:
+        raise ValueError('Unsupported file type; upload a .csv or .xlsx file.')
+
+
+def _as_dict(header, values):
+    # Short rows (trailing empty cells dropped) still get every header column
+    return dict(zip(header, values + [''] * (len(header) - len(values))))
+
+
+def _text(row, column):
+    value = row.get(column)
+    return '' if value is None else str(value).strip()
+
+
+def _number(row, column, default=None):
+    value = _text(row, column)
+    if not value:
+        if default is None:
+            raise ValueError(f'"{column}" is required')
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f'"{column}" must be a number, got "{value}"')
+    return number
+
+
+def _parse_grade(row, student_id, teacher):
+    subject = _text(row, 'subject')
+    if not subject:
+        raise ValueError('"subject" is required')
+    grade_type = _text(row, 'grade_type').lower()
+    if grade_type not in GRADE_TYPES:
+        raise ValueError(f'"grade_type" must be one of {", ".join(sorted(GRADE_TYPES))}')
+    score = _number(row, 'score')
+    max_score = _number(row, 'max_score', default=100.0)
+    if max_score <= 0:
+        raise ValueError('"max_score" must be positive')
+    if not 0 <= score <= max_score:
+        raise ValueError(f'"score" must be between 0 and max_score ({max_score:g}), got {score:g}')
+    # bulk_create skips Grade.save, so the percentage is filled in here
+    return Grade(student_id=student_id, teacher=teacher, subject=subject, grade_type=grade_type,
+                 score=score, max_score=max_score, percentage=score / max_score * 100,
+                 comments=_text(row, 'comments'))
+
+
+def _parse_test(row, student_id, teacher):
+    score = _number(row, 'score')
+    if score != int(score):
+        raise ValueError('"score" must be a whole number')
+    if not 0 <= score <= MAX_TEST_SCORE:
+        raise ValueError(f'"score" must be between 0 and {MAX_TEST_SCORE}, got {score:g}')
+    return WeeklyTest(student_id=student_id, teacher=teacher, score=int(score))
+
+
+def _notifications(kind, counts):
+    if kind == 'grades':
+        title, notification_type = 'New Grades Posted', 'performance'
+        noun = 'grade'
+    else:
+        title, notification_type = 'New Test Scores Posted', 'test'
+        noun = 'test score'
+    return [
+        Notification(
+            student_id=student_id, title=title, notification_type=notification_type, priority='medium',
+            message=f'A new {noun} has been posted for you.' if count == 1
+            else f'{count} new {noun}s have been posted for you.'
+        )
+        for student_id, count in counts.items()
+    ]
+
+
+def import_records(kind, rows, teacher, chunk_size=CHUNK_SIZE):
+    """
+    Import Grade ('grades') or WeeklyTest ('tests') rows from read_rows() output.
+
+    Students are resolved by email from one prefetched map, valid rows are
+    inserted in chunks of `chunk_size` with bulk_create (rollups updated per
+    chunk), and invalid rows are skipped and reported. Each student with new
+    rows then gets one notification and one queued course-suggestion run.
+    Returns {'imported', 'skipped', 'students', 'errors': [(line, message), ...]}.
+    """
+    required, optional = COLUMNS[kind]
+    model, parse, record = (Grade, _parse_grade, stats.record_grades) if kind == 'grades' \
+        else (WeeklyTest, _parse_test, stats.record_tests)
+
+    emails = {email.lower(): student_id for email, student_id in
+              Student.objects.filter(is_active=True).values_list('email', 'id')}
+    counts = {}
+    errors = []
+    result = {'imported': 0, 'skipped': 0}
+    chunk = []
+
+    def flush():
+        model.objects.bulk_create(chunk)
+        record(chunk)
+        result['imported'] += len(chunk)
+        chunk.clear()
+
+    with transaction.atomic():
+        checked_header = False
+        for line, row in rows:
+            if not checked_header:
+                missing = [column for column in required if column not in row]
+                if missing:
+                    raise ValueError(f'Missing column(s): {", ".join(missing)}. '
+                                     f'Expected: {", ".join(required + optional)}')
+                checked_header = True
+            try:
+                email = _text(row, 'email').lower()
+                if email not in emails:
+                    raise ValueError(f'no active student with email "{email}"')
+                chunk.append(parse(row, emails[email], teacher))
+            except ValueError as e:
+                result['skipped'] += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((line, str(e)))
+                continue
+            counts[emails[email]] = counts.get(emails[email], 0) + 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        Notification.objects.bulk_create(_notifications(kind, counts), batch_size=chunk_size)
+
+    enqueue_course_suggestions(list(counts))
+    result['students'] = len(counts)
+    result['errors'] = errors
+    return result
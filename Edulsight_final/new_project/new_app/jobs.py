@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# name -> callable(key, payload)
+_handlers = {}
+
+_worker_thread = None
+_worker_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def register(name):
+    """
+    Decorator registering a job handler: @register('name') def handler(key, payload)
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, keys, payload=None, delay=None):
+    """
+    Schedule `name` for each key. Keys that already have a pending job are
+    left alone, so triggers inside the coalescing window collapse into one run.
+    Costs a single INSERT regardless of how many keys are already queued.
+    """
+    keys = [str(key) for key in keys]
+    if not keys:
+        return
+    if delay is None:
+        delay = _setting('JOB_QUEUE_COALESCE_SECONDS', 10)
+
+    if _setting('JOB_QUEUE_EAGER', False):
+        for key in dict.fromkeys(keys):
+            _handlers[name](key, payload or {})
+        return
+
+    run_after = timezone.now() + timedelta(seconds=delay)
+    BackgroundJob.objects.bulk_create(
+        [BackgroundJob(name=name, key=key, payload=payload or {}, run_after=run_after) for key in dict.fromkeys(keys)],
+        ignore_conflicts=True
+    )
+
+    if _setting('JOB_QUEUE_THREAD_WORKER', False):
+        start_worker_thread()
+
+
+def is_pending(name, key):
+    """
+    True while a job for (name, key) is queued or running
+    """
+    return BackgroundJob.objects.filter(name=name, key=str(key), status__in=['pending', 'running']).exists()
+
+
+def reserve(name, key, hold_seconds):
+    """
+    Mark (name, key) as pending while the caller does the work inline. Returns the
+    reservation id, or None if a job for it is already pending or running.
+    The reservation is an ordinary pending job that comes due after `hold_seconds`,
+    so enqueue() coalesces into it and, if the caller dies before release(), a
+    worker runs the job instead.
+    """
+    if is_pending(name, key):
+        return None
+    try:
+        with transaction.atomic():
+            return BackgroundJob.objects.create(
+                name=name, key=str(key), run_after=timezone.now() + timedelta(seconds=hold_seconds)
+            ).id
+    except IntegrityError:
+        return None
+
+
+def release(reservation_id):
+    """
+    Drop a reservation once the inline work is done (a no-op if a worker already claimed it)
+    """
+    BackgroundJob.objects.filter(id=reservation_id, status='pending').delete()
+
+
+def _claim(limit):
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=_setting('JOB_QUEUE_STALE_SECONDS', 600))
+    candidates = BackgroundJob.objects.filter(
+        Q(status='pending', run_after__lte=now) |
+        Q(status='running', started_at__lt=stale_before)
+    ).order_by('run_after').values_list('id', 'status')[:limit]
+
+    claimed = []
+    for job_id, status in candidates:
+        # Only one worker wins the status flip for a given job
+        updated = BackgroundJob.objects.filter(id=job_id, status=status).update(
+            status='running', started_at=now, attempts=F('attempts') + 1
+        )
+        if updated:
+            claimed.append(job_id)
+    return BackgroundJob.objects.filter(id__in=claimed).order_by('run_after')
+
+
+def _retry_or_fail(job, error):
+    max_attempts = _setting('JOB_QUEUE_MAX_ATTEMPTS', 3)
+    if job.attempts < max_attempts:
+        try:
+            with transaction.atomic():
+                BackgroundJob.objects.filter(id=job.id).update(
+                    status='pending',
+                    run_after=timezone.now() + timedelta(seconds=30 * job.attempts),
+                    last_error=error
+                )
+        except IntegrityError:
+            # A newer trigger is already pending for this key; that run covers this one
+            BackgroundJob.objects.filter(id=job.id).delete()
+    else:
+        BackgroundJob.objects.filter(id=job.id).update(status='failed', last_error=error)
+
+
+def run_due_jobs(limit=100):
+    """
+    Run up to `limit` jobs that are due. Returns (succeeded, failed).
+    """
+    succeeded = failed = 0
+    for job in _claim(limit):
+        handler = _handlers.get(job.name)
+        try:
+            if handler is None:
+                raise LookupError(f'No handler registered for job "{job.name}"')
+            handler(job.key, job.payload)
+        except Exception:
+            failed += 1
+            _retry_or_fail(job, traceback.format_exc())
+        else:
+            succeeded += 1
+            BackgroundJob.objects.filter(id=job.id).delete()
+    return succeeded, failed
+
+
+def _worker_loop(interval):
+    while True:
+        try:
+            close_old_connections()
+            run_due_jobs()
+        except Exception:
+            logger.exception('Background job worker error')
+        time.sleep(interval)
+
+
+def start_worker_thread(interval=None):
+    """
+    Start a daemon thread in this process that polls for due jobs (once per process)
+    """
+    global _worker_thread
+    if _worker_thread is not None and _worker_thread.is_alive():
+        return _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            if interval is None:
+                interval = _setting('JOB_QUEUE_POLL_SECONDS', 2)
+            _worker_thread = threading.Thread(
+                target=_worker_loop, args=(interval,), name='background-jobs', daemon=True
+            )
+            _worker_thread.start()
+    return _worker_thread
@@ -0,0 +1,237 @@
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+try:
+    import httpx
+    from openai import OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+
+class LLMBackend:
+    """
+    A chat-completion provider. `request` is the dict built by
+    CareerRecommendationLLM.chat_request (model, messages, max_tokens, temperature).
+    """
+    name = 'base'
+
+    @property
+    def available(self):
+        return True
+
+    def complete(self, request, timeout):
+        """
+        The full completion text
+        """
+        raise NotImplementedError
+
+    def stream(self, request, timeout):
+        """
+        Yield completion text chunks as they arrive
+        """
+        yield self.complete(request, timeout)
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    The hosted OpenAI API through the openai (v1) client. One client, and so one
+    httpx connection pool, is created per backend and reused for every call.
+    """
+    name = 'openai'
+
+    def __init__(self, base_url='https://api.openai.com/v1'):
+        self.api_key = os.getenv('OPENAI_API_KEY', '')
+        self.client = None
+        if OPENAI_AVAILABLE and self.api_key:
+            # Retries are left to the caller's deadline and circuit breaker
+            self.client = OpenAI(api_key=self.api_key, base_url=base_url, max_retries=0,
+                                 http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=20)))
+
+    @property
+    def available(self):
+        return self.client is not None
+
+    def complete(self, request, timeout):
+        response = self.client.chat.completions.create(timeout=timeout, **request)
+        return response.choices[0].message.content
+
+    def stream(self, request, timeout):
+        response = self.client.chat.completions.create(timeout=timeout, stream=True, **request)
+        try:
+            for chunk in response:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    yield text
+        finally:
+            # Abandoned streams give their connection back to the pool
+            response.response.close()
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Any OpenAI-compatible /chat/completions server (llama.cpp, vLLM, Ollama, ...).
+    Each thread keeps one keep-alive connection open and reuses it.
+    """
+    name = 'local'
+
+    def __init__(self, base_url, api_key='', model=None):
+        parts = urlsplit(base_url.rstrip('/'))
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path + '/chat/completions'
+        self.headers = {'Content-Type': 'application/json'}
+        if api_key:
+            self.headers['Authorization'] = f'Bearer {api_key}'
+        self.model = model
+        self._local = threading.local()
+
+    def _connection(self, timeout):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(self.host, self.port, timeout=timeout)
+            self._local.connection = connection
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _post(self, request, timeout, stream=False):
+        body = dict(request, stream=stream)
+        if self.model:
+            body['model'] = self.model
+        payload = json.dumps(body).encode()
+
+        for attempt in range(2):
+            connection = self._connection(timeout)
+            try:
+                connection.request('POST', self.path, body=payload, headers=self.headers)
+                response = connection.getresponse()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server closed an idle keep-alive connection; retry once on a fresh one
+                self._drop_connection()
+                if attempt:
+                    raise
+            except Exception:
+                self._drop_connection()
+                raise
+
+        if response.status >= 400:
+            content = response.read()
+            raise RuntimeError(f'HTTP {response.status}: {content[:200]!r}')
+        return response
+
+    def complete(self, request, timeout):
+        response = self._post(request, timeout)
+        return json.loads(response.read())['choices'][0]['message']['content']
+
+    def stream(self, request, timeout):
+        response = self._post(request, timeout, stream=True)
+        finished = False
+        try:
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    break
+                text = json.loads(data)['choices'][0].get('delta', {}).get('content') or ''
+                if text:
+                    yield text
+            finished = True
+        finally:
+            if finished:
+                # Only the tail after [DONE] is left; read it so the connection can be reused
+                response.read()
+            else:
+                # Abandoned or failed mid-generation: hang up instead of waiting for the rest
+                response.close()
+                self._drop_connection()
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic, in-process backend for tests and benchmarks: the same prompt always
+    gets the same JSON answer, after an optional fixed delay
+    """
+    name = 'stub'
+
+    CAREERS = {
+        'Tech': ['Software Engineer', 'Data Scientist'],
+        'Creative': ['UX/UI Designer', 'Content Creator'],
+        'Analytical': ['Data Analyst', 'Financial Analyst'],
+        'Collaborative': ['Project Manager', 'Consultant'],
+    }
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def complete(self, request, timeout):
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+        prompt = request['messages'][-1]['content']
+        careers = [career for category, names in self.CAREERS.items() if category in prompt for career in names]
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return json.dumps({
+            'careers': careers[:3] or ['Software Engineer'],
+            'skills': ['Problem Solving', 'Communication'],
+            'courses': ['Foundations Course'],
+            'trends': f'Stub outlook {digest}',
+            'additional_insights': 'Generated by the stub backend',
+        })
+
+    def stream(self, request, timeout):
+        text = self.complete(request, timeout)
+        for i in range(0, len(text), 16):
+            yield text[i:i + 16]
+
+
+_backend = {'key': None, 'instance': None}
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    The process-wide backend selected by settings.LLM_BACKEND ('openai', 'local' or 'stub').
+    Backends hold persistent connections, so one instance is reused per configuration.
+    """
+    name = getattr(settings, 'LLM_BACKEND', 'openai')
+    key = (
+        name,
+        getattr(settings, 'LLM_LOCAL_BASE_URL', 'http://localhost:8080/v1'),
+        getattr(settings, 'LLM_LOCAL_MODEL', None),
+        getattr(settings, 'LLM_STUB_LATENCY_SECONDS', 0.0),
+        getattr(settings, 'LLM_API_BASE_URL', 'https://api.openai.com/v1'),
+    )
+    with _backend_lock:
+        if _backend['key'] != key:
+            if name == 'local':
+                _backend['instance'] = HTTPBackend(key[1], os.getenv('LLM_LOCAL_API_KEY', ''), key[2])
+            elif name == 'stub':
+                _backend['instance'] = StubBackend(key[3])
+            elif name == 'openai':
+                _backend['instance'] = OpenAIBackend(key[4])
+            else:
+                raise ValueError(f'Unknown LLM_BACKEND "{name}"')
+            _backend['key'] = key
+        return _backend['instance']
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.db import transaction
+from . import llm_cache
+from .llm_integration import CareerRecommendationLLM
+from .models import CareerRecommendationHistory, Notification, Student
+from .profiles import build_profiles, canonicalize
+from .recommendations import bridging_courses, history_entry, ready_notification
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    pass
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, with bursts of up to `capacity`
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ChatClient:
+    """
+    Minimal async client for an OpenAI-compatible /chat/completions endpoint.
+    Uses httpx when installed, otherwise urllib calls in worker threads.
+    """
+
+    def __init__(self, base_url, api_key='', timeout=30, model=None):
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.headers = {'Content-Type': 'application/json'}
+        if api_key:
+            self.headers['Authorization'] = f'Bearer {api_key}'
+        self.timeout = timeout
+        self._client = httpx.AsyncClient(timeout=timeout) if HTTPX_AVAILABLE else None
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+    def _post_blocking(self, body):
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise RetryableError(str(e))
+
+    async def complete(self, payload):
+        """
+        The assistant message content for a chat request
+        """
+        if self.model:
+            payload = dict(payload, model=self.model)
+        body = json.dumps(payload).encode()
+        if self._client is not None:
+            try:
+                response = await self._client.post(self.url, content=body, headers=self.headers)
+            except httpx.TransportError as e:
+                raise RetryableError(str(e))
+            status, content = response.status_code, response.content
+        else:
+            status, content = await asyncio.to_thread(self._post_blocking, body)
+
+        if status in RETRY_STATUSES:
+            raise RetryableError(f'HTTP {status}')
+        if status >= 400:
+            raise RuntimeError(f'HTTP {status}: {content[:200]!r}')
+        return json.loads(content)['choices'][0]['message']['content']
+
+
+async def _with_retries(func, retries, base_delay, max_delay=30.0):
+    """
+    Await func(), retrying RetryableError with exponential backoff and full jitter
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await func()
+        except RetryableError:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+def default_base_url():
+    """
+    The local server when LLM_BACKEND is 'local', otherwise LLM_API_BASE_URL
+    """
+    if getattr(settings, 'LLM_BACKEND', 'openai') == 'local':
+        return getattr(settings, 'LLM_LOCAL_BASE_URL', 'http://localhost:8080/v1')
+    return getattr(settings, 'LLM_API_BASE_URL', 'https://api.openai.com/v1')
+
+
+def default_api_key(base_url):
+    """
+    The key llm_backends would send to `base_url`: OPENAI_API_KEY for the OpenAI
+    endpoint (LLM_API_BASE_URL), LLM_LOCAL_API_KEY for LLM_LOCAL_BASE_URL, and
+    none for any other server, so a key is never sent to an endpoint it wasn't issued for
+    """
+    base_url = base_url.rstrip('/')
+    if base_url == getattr(settings, 'LLM_API_BASE_URL', 'https://api.openai.com/v1').rstrip('/'):
+        return os.getenv('OPENAI_API_KEY', '')
+    if base_url == getattr(settings, 'LLM_LOCAL_BASE_URL', 'http://localhost:8080/v1').rstrip('/'):
+        return os.getenv('LLM_LOCAL_API_KEY', '')
+    return ''
+
+
+def endpoint_identity(llm, base_url):
+    """
+    (model, cache_model) for requests sent to `base_url`: the model the configured
+    backend would send, and the identity its answers are cached under. Answers share
+    the web path's cache entries only when they come from the same endpoint as the
+    configured OpenAI or local backend; any other endpoint gets its own key.
+    """
+    backend = getattr(settings, 'LLM_BACKEND', 'openai')
+    model = (getattr(settings, 'LLM_LOCAL_MODEL', None) if backend == 'local' else None) or llm.MODEL
+    base_url = base_url.rstrip('/')
+    if backend in ('openai', 'local') and base_url == default_base_url().rstrip('/'):
+        return model, llm.cache_model
+    return model, f'{base_url}:{model}'
+
+
+def _persist(batch):
+    """
+    Save one batch of (student, profile, recommendations, llm_used) results
+    """
+    histories, notifications = [], []
+    for student, profile, recommendations, llm_used in batch:
+        histories.append(history_entry(student, recommendations, bridging_courses(profile, recommendations), llm_used))
+        notifications.append(ready_notification(student, recommendations))
+    with transaction.atomic():
+        CareerRecommendationHistory.objects.bulk_create(histories)
+        Notification.objects.bulk_create(notifications)
+
+
+async def _generate(groups, llm, client, concurrency, rate, retries, base_delay, results, counts):
+    """
+    One request per distinct canonical profile. Each finished group is put on the
+    `results` queue as (cache_key or None, recommendations, rows) for the caller to
+    save, and counted in `counts` ('requests', 'failed') as it finishes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate)
+
+    async def run_group(cache_key, canonical_profile, members):
+        async def call():
+            await bucket.acquire()
+            prompt = llm._create_recommendation_prompt(canonical_profile)
+            return await client.complete(llm.chat_request(prompt))
+
+        async with semaphore:
+            try:
+                content = await _with_retries(call, retries, base_delay)
+            except Exception as e:
+                print(f"LLM Error: {e}")
+                counts['requests'] += 1
+                counts['failed'] += 1
+                rows = [(student, profile, llm._fallback_recommendations(profile), False) for student, profile in members]
+                results.put((None, None, rows))
+                return
+
+        counts['requests'] += 1
+        recommendations = llm._parse_llm_response(content)
+        results.put((cache_key, recommendations, [(student, profile, recommendations, True) for student, profile in members]))
+
+    await asyncio.gather(*(
+        run_group(cache_key, canonical_profile, members)
+        for cache_key, (canonical_profile, members) in groups.items()
+    ))
+
+
+def generate_all(students=None, concurrency=None, rate=None, retries=None, base_url=None, api_key=None,
+                 batch_size=100, use_cache=True, report=lambda counts: None):
+    """
+    Generate and store career recommendations for many students at once.
+
+    Profiles are built up front and grouped by canonical key; groups already in
+    the response cache are saved directly. The rest are sent to the chat endpoint
+    from an asyncio loop in a worker thread, with at most `concurrency` requests
+    in flight and `rate` requests per second, while this thread saves finished
+    results in batches (so all ORM work stays on the calling thread).
+    `report(counts)` is called after each saved batch. Returns the counts:
+    requests and failed (finished API calls), students (saved from fresh
+    responses or fallbacks) and cached_students (saved from the cache).
+    """
+    llm = CareerRecommendationLLM()
+    concurrency = concurrency or getattr(settings, 'LLM_BULK_CONCURRENCY', 8)
+    rate = rate or getattr(settings, 'LLM_BULK_RATE_PER_SECOND', 5)
+    retries = getattr(settings, 'LLM_BULK_MAX_RETRIES', 4) if retries is None else retries
+    base_url = base_url or default_base_url()
+    api_key = default_api_key(base_url) if api_key is None else api_key
+    model, cache_model = endpoint_identity(llm, base_url)
+
+    if students is None:
+        students = Student.objects.filter(is_active=True)
+    students = {student.id: student for student in students}
+    profiles = build_profiles(list(students))
+
+    groups = {}
+    for student_id, profile in profiles.items():
+        canonical_profile = canonicalize(profile)
+        cache_key = llm_cache.make_key(canonical_profile, cache_model, llm.PROMPT_VERSION)
+        groups.setdefault(cache_key, (canonical_profile, []))[1].append((students[student_id], profile))
+
+    counts = {'requests': 0, 'failed': 0, 'students': 0, 'cached_students': 0}
+    batch = []
+    unsaved = {'students': 0, 'cached_students': 0}
+
+    def save():
+        _persist(batch)
+        batch.clear()
+        for key in unsaved:
+            counts[key] += unsaved[key]
+            unsaved[key] = 0
+        report(counts)
+
+    def collect(rows, cached=False):
+        batch.extend(rows)
+        unsaved['cached_students' if cached else 'students'] += len(rows)
+        if len(batch) >= batch_size:
+            save()
+
+    if use_cache:
+        for cache_key in list(groups):
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                members = groups.pop(cache_key)[1]
+                collect([(student, profile, cached, True) for student, profile in members], cached=True)
+
+    results = queue.Queue()
+    outcome = {}
+
+    def run_loop():
+        async def run():
+            client = ChatClient(base_url, api_key, model=model)
+            try:
+                await _generate(groups, llm, client, concurrency, rate, retries, 0.5, results, counts)
+            finally:
+                await client.close()
+        try:
+            asyncio.run(run())
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            results.put(None)
+
+    if groups:
+        worker = threading.Thread(target=run_loop, name='llm-bulk', daemon=True)
+        worker.start()
+        while (item := results.get()) is not None:
+            cache_key, recommendations, rows = item
+            if cache_key is not None:
+                llm_cache.put(cache_key, recommendations, cache_model, llm.PROMPT_VERSION)
+            collect(rows)
+        worker.join()
+        if 'error' in outcome:
+            raise outcome['error']
+
+    if batch:
+        save()
+    return counts
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import LLMResponseCache
+
+# In-process counters; persisted totals live on the rows themselves (hit_count)
+_stats = {'hits': 0, 'misses': 0, 'hit_seconds': 0.0, 'miss_seconds': 0.0, 'evicted': 0}
+_stats_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize(value):
+    """
+    Order-independent, whitespace- and case-insensitive form of a profile, for hashing
+    """
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, str):
+        return ' '.join(value.split()).lower()
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def make_key(profile, model_name, prompt_version):
+    payload = json.dumps(
+        [normalize(profile), model_name, str(prompt_version)],
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _record(hit, seconds):
+    with _stats_lock:
+        _stats['hits' if hit else 'misses'] += 1
+        _stats['hit_seconds' if hit else 'miss_seconds'] += seconds
+
+
+def get(key):
+    """
+    The cached response for `key`, or None when missing or expired. Counts as a hit or miss.
+    """
+    start = time.perf_counter()
+    now = timezone.now()
+    entry = LLMResponseCache.objects.filter(key=key, expires_at__gt=now).values_list('id', 'response').first()
+    if entry is None:
+        _record(False, time.perf_counter() - start)
+        return None
+
+    LLMResponseCache.objects.filter(id=entry[0]).update(last_hit_at=now, hit_count=F('hit_count') + 1)
+    _record(True, time.perf_counter() - start)
+    return entry[1]
+
+
+def record_miss_latency(seconds):
+    """
+    Add the upstream call time for a miss, so miss latency reflects what the user waited for
+    """
+    with _stats_lock:
+        _stats['miss_seconds'] += seconds
+
+
+def put(key, response, model_name, prompt_version):
+    now = timezone.now()
+    values = dict(
+        model_name=model_name,
+        prompt_version=str(prompt_version),
+        response=response,
+        expires_at=now + timedelta(seconds=_setting('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+        last_hit_at=now,
+    )
+    try:
+        LLMResponseCache.objects.update_or_create(key=key, defaults=values)
+    except IntegrityError:
+        # Another worker stored the same key first
+        LLMResponseCache.objects.filter(key=key).update(**values)
+    evict()
+
+
+def evict(max_entries=None):
+    """
+    Drop expired rows, then the least recently used ones beyond LLM_CACHE_MAX_ENTRIES
+    """
+    if max_entries is None:
+        max_entries = _setting('LLM_CACHE_MAX_ENTRIES', 10000)
+    removed, _ = LLMResponseCache.objects.filter(expires_at__lte=timezone.now()).delete()
+
+    overflow = LLMResponseCache.objects.count() - max_entries
+    if overflow > 0:
+        oldest = LLMResponseCache.objects.order_by('last_hit_at', 'id').values_list('id', flat=True)[:overflow]
+        removed += LLMResponseCache.objects.filter(id__in=list(oldest)).delete()[0]
+
+    with _stats_lock:
+        _stats['evicted'] += removed
+    return removed
+
+
+def clear():
+    return LLMResponseCache.objects.all().delete()[0]
+
+
+def stats():
+    """
+    Hit/miss counts and mean latencies for this process, plus table-wide totals
+    """
+    with _stats_lock:
+        current = dict(_stats)
+    lookups = current['hits'] + current['misses']
+    return {
+        'hits': current['hits'],
+        'misses': current['misses'],
+        'hit_rate': current['hits'] / lookups if lookups else 0.0,
+        'avg_hit_ms': current['hit_seconds'] * 1000 / current['hits'] if current['hits'] else 0.0,
+        'avg_miss_ms': current['miss_seconds'] * 1000 / current['misses'] if current['misses'] else 0.0,
+        'evicted': current['evicted'],
+        'entries': LLMResponseCache.objects.count(),
+        'stored_hits': LLMResponseCache.objects.aggregate(total=Sum('hit_count'))['total'] or 0,
+    }
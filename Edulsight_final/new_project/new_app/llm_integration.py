@@ -1,21 +1,140 @@
-import os
+import csv
+import heapq
 import json
+import math
+import re
+import threading
+import time
+from collections import deque
 from typing import List, Dict
 from django.conf import settings
+from . import llm_cache
+from .profiles import canonicalize
+from .llm_backends import get_backend
+from .llm_output import extract_json, validate, schema_instructions
+
+LIST_ITEM = re.compile(r'^(?:[-•*]|\d+[.)])\s+(.+)$')
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome and latency of recent LLM calls in this process.
+
+    closed: calls go through. Opens when the failure rate or p95 latency of the
+    last `window` calls crosses its threshold. open: calls are refused until
+    `cooldown` seconds have passed, then one probe call is let through
+    (half-open); its result closes or re-opens the breaker.
+    """
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, p95_seconds=8.0, cooldown=30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate
+        self.p95_threshold = p95_seconds
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.state = 'closed'
+            self.recent = deque(maxlen=self.window)  # (ok, seconds)
+            self.opened_at = None
+            self.probe_in_flight = False
+            self.counters = {'calls': 0, 'successes': 0, 'failures': 0, 'short_circuited': 0, 'times_opened': 0}
+            self.last_error = ''
+
+    def allow(self):
+        """
+        True if a call may be attempted now
+        """
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.counters['short_circuited'] += 1
+            return False
+
+    def release(self):
+        """
+        A call was abandoned without an outcome (the client went away): free the
+        half-open probe slot so a later call can probe, without counting anything
+        """
+        with self.lock:
+            self.probe_in_flight = False
+
+    def record(self, ok, seconds, error=''):
+        with self.lock:
+            self.counters['calls'] += 1
+            self.counters['successes' if ok else 'failures'] += 1
+            if error:
+                self.last_error = error
+            self.recent.append((ok, seconds))
+
+            if self.state == 'half_open':
+                self.probe_in_flight = False
+                if ok:
+                    self.state = 'closed'
+                    self.recent.clear()
+                else:
+                    self._open()
+            elif self.state == 'closed' and len(self.recent) >= self.min_calls:
+                if self._failure_rate() >= self.failure_rate_threshold or self._p95() > self.p95_threshold:
+                    self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.counters['times_opened'] += 1
+
+    def _failure_rate(self):
+        return sum(1 for ok, _ in self.recent if not ok) / len(self.recent) if self.recent else 0.0
+
+    def _p95(self):
+        latencies = sorted(seconds for _, seconds in self.recent)
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            return {
+                'state': self.state,
+                'failure_rate': self._failure_rate(),
+                'p95_seconds': self._p95(),
+                'window_calls': len(self.recent),
+                'retry_in_seconds': retry_in,
+                'last_error': self.last_error,
+                **self.counters,
+            }
+
+
+breaker = CircuitBreaker(
+    window=getattr(settings, 'LLM_BREAKER_WINDOW', 20),
+    min_calls=getattr(settings, 'LLM_BREAKER_MIN_CALLS', 5),
+    failure_rate=getattr(settings, 'LLM_BREAKER_FAILURE_RATE', 0.5),
+    p95_seconds=getattr(settings, 'LLM_BREAKER_P95_SECONDS', 8.0),
+    cooldown=getattr(settings, 'LLM_BREAKER_COOLDOWN_SECONDS', 30.0),
+)
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
 
 class CareerRecommendationLLM:
+    MODEL = getattr(settings, 'LLM_MODEL', "gpt-3.5-turbo")
+    # Bump whenever the prompt or system message changes so cached answers are not reused
+    PROMPT_VERSION = "3"
+
     def __init__(self):
-        # Initialize OpenAI API (can be replaced with local LLM)
-        self.api_key = os.getenv('OPENAI_API_KEY', '')
-        if OPENAI_AVAILABLE and self.api_key:
-            openai.api_key = self.api_key
-        self.use_llm = OPENAI_AVAILABLE and bool(self.api_key)
+        # OpenAI, a local OpenAI-compatible server or the stub, per settings.LLM_BACKEND
+        self.backend = get_backend()
+        self.use_llm = self.backend.available
+        # Responses are cached per backend and model, so stub or local answers never stand in for OpenAI ones
+        model = getattr(self.backend, 'model', None) or self.MODEL
+        self.cache_model = model if self.backend.name == 'openai' else f'{self.backend.name}:{model}'
 
     def generate_career_recommendations(self, student_profile: Dict) -> Dict:
         """
@@ -24,26 +143,116 @@ class CareerRecommendationLLM:
         if not self.use_llm:
             return self._fallback_recommendations(student_profile)
 
+        # Equivalent profiles (same score bands and categories) share a prompt and a cache entry
+        canonical_profile = canonicalize(student_profile)
+        cache_key = llm_cache.make_key(canonical_profile, self.cache_model, self.PROMPT_VERSION)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # While the API is failing or slow, skip straight to the fallback
+        if not breaker.allow():
+            return self._fallback_recommendations(student_profile)
+
+        start = time.perf_counter()
         try:
-            prompt = self._create_recommendation_prompt(student_profile)
-
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert career counselor specializing in student guidance."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.7
+            prompt = self._create_recommendation_prompt(canonical_profile)
+            content = self.backend.complete(
+                self.chat_request(prompt), getattr(settings, 'LLM_CALL_DEADLINE_SECONDS', 10)
             )
+            elapsed = time.perf_counter() - start
+            llm_cache.record_miss_latency(elapsed)
+            breaker.record(True, elapsed)
 
-            recommendations = self._parse_llm_response(response.choices[0].message.content)
+            recommendations = self._parse_llm_response(content)
+            llm_cache.put(cache_key, recommendations, self.cache_model, self.PROMPT_VERSION)
             return recommendations
 
         except Exception as e:
             print(f"LLM Error: {e}")
+            breaker.record(False, time.perf_counter() - start, str(e))
             return self._fallback_recommendations(student_profile)
 
+    def stream_career_recommendations(self, student_profile: Dict):
+        """
+        Like generate_career_recommendations, but yields ('text', chunk) pairs while the
+        completion streams in, then a final ('result', (recommendations, llm_used)) pair.
+        Cached, fallback and short-circuited results are yielded as one JSON text chunk.
+        """
+        if not self.use_llm:
+            recommendations = self._fallback_recommendations(student_profile)
+            yield 'text', json.dumps(recommendations)
+            yield 'result', (recommendations, False)
+            return
+
+        canonical_profile = canonicalize(student_profile)
+        cache_key = llm_cache.make_key(canonical_profile, self.cache_model, self.PROMPT_VERSION)
+        cached = llm_cache.get(cache_key)
+        if cached is None and not breaker.allow():
+            cached = self._fallback_recommendations(student_profile)
+            llm_used = False
+        else:
+            llm_used = True
+        if cached is not None:
+            yield 'text', json.dumps(cached)
+            yield 'result', (cached, llm_used)
+            return
+
+        start = time.perf_counter()
+        parts = []
+        chunks = None
+        outcome = None  # stays None if the consumer closes the stream early
+        try:
+            chunks = self.backend.stream(
+                self.chat_request(self._create_recommendation_prompt(canonical_profile)),
+                getattr(settings, 'LLM_CALL_DEADLINE_SECONDS', 10)
+            )
+            for text in chunks:
+                parts.append(text)
+                yield 'text', text
+            outcome = (True, '')
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            outcome = (False, str(e))
+        finally:
+            # Runs on GeneratorExit too. A client disconnect says nothing about the
+            # backend, so it only frees the probe slot, and the partial text is
+            # dropped: it is neither cached nor returned for saving.
+            elapsed = time.perf_counter() - start
+            if chunks is not None:
+                chunks.close()
+            if outcome is None:
+                breaker.release()
+            else:
+                breaker.record(outcome[0], elapsed, outcome[1])
+
+        if not outcome[0]:
+            yield 'result', (self._fallback_recommendations(student_profile), False)
+            return
+
+        llm_cache.record_miss_latency(elapsed)
+        recommendations = self._parse_llm_response(''.join(parts))
+        llm_cache.put(cache_key, recommendations, self.cache_model, self.PROMPT_VERSION)
+        yield 'result', (recommendations, True)
+
+    def chat_request(self, prompt: str) -> Dict:
+        """
+        Chat completion parameters for a prompt (shared by the sync and bulk async paths)
+        """
+        request = {
+            'model': self.MODEL,
+            'messages': [
+                {"role": "system", "content": "You are an expert career counselor specializing in student guidance."},
+                {"role": "user", "content": prompt}
+            ],
+            'max_tokens': 800,
+            'temperature': 0.7
+        }
+        if getattr(settings, 'LLM_STRUCTURED_OUTPUT', True):
+            request['messages'][0]['content'] += '\n' + schema_instructions()
+            request['response_format'] = {'type': 'json_object'}
+        return request
+
     def _create_recommendation_prompt(self, student_profile: Dict) -> str:
         """
         Create a detailed prompt for LLM
@@ -72,40 +281,48 @@ class CareerRecommendationLLM:
 
     def _parse_llm_response(self, response: str) -> Dict:
         """
-        Parse LLM response into structured format
+        Parse LLM response into structured format: the first JSON object in the text,
+        validated against RECOMMENDATION_SCHEMA, or failing that the text sections.
+        Always returns every schema key, so one completion gives one usable result.
         """
-        try:
-            # Attempt to parse JSON response
-            return json.loads(response)
-        except:
-            # Parse text response
-            lines = response.strip().split('\n')
-            recommendations = {
-                'careers': [],
-                'skills': [],
-                'courses': [],
-                'trends': '',
-                'additional_insights': ''
-            }
-
-            current_section = None
-            for line in lines:
-                line = line.strip()
-                if 'career' in line.lower() or 'recommendation' in line.lower():
-                    current_section = 'careers'
-                elif 'skill' in line.lower():
-                    current_section = 'skills'
-                elif 'course' in line.lower() or 'certification' in line.lower():
-                    current_section = 'courses'
-                elif line and current_section:
-                    if current_section == 'careers' and line.startswith(('1.', '2.', '3.', '-', '•')):
-                        recommendations['careers'].append(line.lstrip('1234567890.- •'))
-                    elif current_section == 'skills' and line.startswith(('-', '•')):
-                        recommendations['skills'].append(line.lstrip('- •'))
-                    elif current_section == 'courses' and line.startswith(('-', '•')):
-                        recommendations['courses'].append(line.lstrip('- •'))
+        data = extract_json(response or '')
+        if data is None:
+            data = self._parse_text_response(response or '')
+        recommendations, errors = validate(data)
+        if errors:
+            print(f"LLM response issues: {'; '.join(errors)}")
+        return recommendations
 
-            return recommendations
+    def _parse_text_response(self, response: str) -> Dict:
+        """
+        Plain-text answers: headings choose the section, list items ('-', '•', '*', '1.') fill it
+        """
+        recommendations = {'careers': [], 'skills': [], 'courses': [], 'trends': []}
+        current_section = None
+        for line in response.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            item = LIST_ITEM.match(line)
+            if item:
+                if current_section:
+                    recommendations[current_section].append(item.group(1).strip())
+                continue
+
+            heading = line.lower()
+            if 'skill' in heading:
+                current_section = 'skills'
+            elif 'course' in heading or 'certification' in heading:
+                current_section = 'courses'
+            elif 'career' in heading or 'recommendation' in heading:
+                current_section = 'careers'
+            elif 'trend' in heading or 'outlook' in heading:
+                current_section = 'trends'
+            elif current_section == 'trends':
+                recommendations['trends'].append(line)
+
+        recommendations['trends'] = ' '.join(recommendations['trends'])
+        return recommendations
 
     def _fallback_recommendations(self, student_profile: Dict) -> Dict:
         """
@@ -174,82 +391,233 @@ class CareerRecommendationLLM:
         return recommendations
 
 
-class CourseRecommendationEngine:
-    def __init__(self):
-        self.course_database = {
-            'Tech': {
-                'beginner': [
-                    'Introduction to Programming',
-                    'Web Development Basics',
-                    'Computer Science Fundamentals'
-                ],
-                'intermediate': [
-                    'Data Structures and Algorithms',
-                    'Database Management',
-                    'Full Stack Development'
-                ],
-                'advanced': [
-                    'Machine Learning',
-                    'Cloud Computing',
-                    'Cybersecurity'
-                ]
-            },
-            'Creative': {
-                'beginner': [
-                    'Introduction to Design',
-                    'Digital Art Basics',
-                    'Creative Writing'
-                ],
-                'intermediate': [
-                    'Advanced Graphic Design',
-                    'Video Production',
-                    'Brand Development'
-                ],
-                'advanced': [
-                    'Motion Graphics',
-                    '3D Modeling',
-                    'Creative Direction'
-                ]
-            },
-            'Analytical': {
-                'beginner': [
-                    'Introduction to Statistics',
-                    'Business Analytics Basics',
-                    'Excel Fundamentals'
-                ],
-                'intermediate': [
-                    'Data Visualization',
-                    'Financial Analysis',
-                    'Research Methods'
-                ],
-                'advanced': [
-                    'Predictive Analytics',
-                    'Advanced Statistics',
-                    'Business Intelligence'
-                ]
-            },
-            'Collaborative': {
-                'beginner': [
-                    'Communication Skills',
-                    'Team Building',
-                    'Introduction to Management'
-                ],
-                'intermediate': [
-                    'Project Management',
-                    'Conflict Resolution',
-                    'Leadership Development'
-                ],
-                'advanced': [
-                    'Strategic Management',
-                    'Organizational Behavior',
-                    'Executive Leadership'
-                ]
+# Built-in catalogue, used when settings.COURSE_CATALOGUE_FILE is not set
+DEFAULT_COURSE_DATABASE = {
+    'Tech': {
+        'beginner': [
+            'Introduction to Programming',
+            'Web Development Basics',
+            'Computer Science Fundamentals'
+        ],
+        'intermediate': [
+            'Data Structures and Algorithms',
+            'Database Management',
+            'Full Stack Development'
+        ],
+        'advanced': [
+            'Machine Learning',
+            'Cloud Computing',
+            'Cybersecurity'
+        ]
+    },
+    'Creative': {
+        'beginner': [
+            'Introduction to Design',
+            'Digital Art Basics',
+            'Creative Writing'
+        ],
+        'intermediate': [
+            'Advanced Graphic Design',
+            'Video Production',
+            'Brand Development'
+        ],
+        'advanced': [
+            'Motion Graphics',
+            '3D Modeling',
+            'Creative Direction'
+        ]
+    },
+    'Analytical': {
+        'beginner': [
+            'Introduction to Statistics',
+            'Business Analytics Basics',
+            'Excel Fundamentals'
+        ],
+        'intermediate': [
+            'Data Visualization',
+            'Financial Analysis',
+            'Research Methods'
+        ],
+        'advanced': [
+            'Predictive Analytics',
+            'Advanced Statistics',
+            'Business Intelligence'
+        ]
+    },
+    'Collaborative': {
+        'beginner': [
+            'Communication Skills',
+            'Team Building',
+            'Introduction to Management'
+        ],
+        'intermediate': [
+            'Project Management',
+            'Conflict Resolution',
+            'Leadership Development'
+        ],
+        'advanced': [
+            'Strategic Management',
+            'Organizational Behavior',
+            'Executive Leadership'
+        ]
+    }
+}
+
+# Keyword in a course name -> skills it teaches (for catalogue entries without explicit skills)
+SKILL_KEYWORDS = {
+    'Programming': ['Python', 'JavaScript', 'Problem Solving'],
+    'Design': ['UI/UX', 'Color Theory', 'Typography'],
+    'Analytics': ['Data Analysis', 'Visualization', 'Reporting'],
+    'Management': ['Leadership', 'Planning', 'Communication'],
+    'Development': ['Coding', 'Testing', 'Debugging'],
+    'Statistics': ['Analysis', 'Probability', 'Modeling']
+}
+DEFAULT_SKILLS = ['Critical Thinking', 'Problem Solving', 'Application']
+
+LEVEL_DURATIONS = {
+    'beginner': '4-6 weeks',
+    'intermediate': '8-12 weeks',
+    'advanced': '12-16 weeks'
+}
+
+
+def _skill_key(skill):
+    return ' '.join(str(skill).lower().split())
+
+
+def skills_for_course_name(course_name: str) -> List[str]:
+    """
+    Skills for a course without an explicit list, from SKILL_KEYWORDS
+    """
+    for keyword, skills in SKILL_KEYWORDS.items():
+        if keyword.lower() in course_name.lower():
+            return skills
+    return DEFAULT_SKILLS
+
+
+class CourseCatalogue:
+    """
+    Courses with precomputed lookups:
+    skills_of[i]           course i -> skill keys
+    courses_for_skill[k]   skill key -> course indexes (inverted index)
+    by_category_level      (category, level) -> course indexes, in catalogue order
+    """
+
+    def __init__(self, courses: List[Dict]):
+        self.courses = []
+        self.skills_of = []
+        self.courses_for_skill = {}
+        self.by_category_level = {}
+        for course in courses:
+            skills = course.get('skills') or skills_for_course_name(course['name'])
+            course = {
+                'name': course['name'],
+                'category': course['category'],
+                'level': course['level'],
+                'duration': course.get('duration') or LEVEL_DURATIONS.get(course['level'], '8 weeks'),
+                'skills': list(skills),
             }
+            index = len(self.courses)
+            self.courses.append(course)
+            keys = {_skill_key(skill) for skill in skills}
+            self.skills_of.append(keys)
+            for key in keys:
+                self.courses_for_skill.setdefault(key, []).append(index)
+            self.by_category_level.setdefault((course['category'], course['level']), []).append(index)
+
+        # Rarer skills say more about a course than ones most courses teach
+        total = len(self.courses)
+        self.skill_weight = {
+            key: math.log(1 + total / len(indexes)) for key, indexes in self.courses_for_skill.items()
         }
 
-    def recommend_bridging_courses(self, current_performance: Dict, career_goals: List[str]) -> List[Dict]:
+    @classmethod
+    def from_nested(cls, database: Dict) -> 'CourseCatalogue':
+        return cls([
+            {'name': name, 'category': category, 'level': level}
+            for category, levels in database.items()
+            for level, names in levels.items()
+            for name in names
+        ])
+
+    @classmethod
+    def from_file(cls, path: str) -> 'CourseCatalogue':
+        """
+        JSON: a list of {name, category, level, skills?, duration?} objects.
+        CSV: columns name, category, level and optionally skills (';'-separated) and duration.
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                return cls(json.load(f))
+            rows = []
+            for row in csv.DictReader(f):
+                skills = [skill.strip() for skill in (row.get('skills') or '').split(';') if skill.strip()]
+                rows.append(dict(row, skills=skills))
+            return cls(rows)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def in_category_level(self, category: str, level: str) -> List[Dict]:
+        return [self.courses[i] for i in self.by_category_level.get((category, level), [])]
+
+    def rank(self, target_skills: List[str], k: int = 5, categories: List[str] = None, level: str = None) -> List[Dict]:
+        """
+        Top-k courses teaching the most (idf-weighted) target skills, optionally restricted
+        to categories and/or a level. Only courses sharing at least one skill are scored.
+        Returns [{'course', 'score', 'matched_skills'}] best first.
+        """
+        scores = {}
+        matched = {}
+        for skill in dict.fromkeys(_skill_key(s) for s in target_skills):
+            for index in self.courses_for_skill.get(skill, ()):
+                scores[index] = scores.get(index, 0.0) + self.skill_weight[skill]
+                matched.setdefault(index, []).append(skill)
+
+        wanted = set(categories) if categories is not None else None
+
+        def allowed(index):
+            course = self.courses[index]
+            return (wanted is None or course['category'] in wanted) and (level is None or course['level'] == level)
+
+        candidates = ((score, index) for index, score in scores.items() if allowed(index))
+        best = heapq.nsmallest(k, candidates, key=lambda item: (-item[0], item[1]))
+        return [
+            {'course': self.courses[index], 'score': round(score, 3), 'matched_skills': matched[index]}
+            for score, index in best
+        ]
+
+
+_catalogue = {'path': None, 'catalogue': None}
+_catalogue_lock = threading.Lock()
+
+
+def get_catalogue() -> CourseCatalogue:
+    """
+    The process-wide catalogue: settings.COURSE_CATALOGUE_FILE if set, else the built-in list.
+    Built on first use and reused until the setting changes.
+    """
+    path = getattr(settings, 'COURSE_CATALOGUE_FILE', None)
+    with _catalogue_lock:
+        if _catalogue['catalogue'] is None or _catalogue['path'] != path:
+            if path:
+                _catalogue['catalogue'] = CourseCatalogue.from_file(str(path))
+            else:
+                _catalogue['catalogue'] = CourseCatalogue.from_nested(DEFAULT_COURSE_DATABASE)
+            _catalogue['path'] = path
+        return _catalogue['catalogue']
+
+
+class CourseRecommendationEngine:
+    def __init__(self):
+        self.catalogue = get_catalogue()
+
+    def recommend_bridging_courses(self, current_performance: Dict, career_goals: List[str],
+                                   target_skills: List[str] = None) -> List[Dict]:
         """
-        Recommend bridging courses based on current performance and career goals
+        Recommend bridging courses based on current performance and career goals.
+        With target_skills, the two courses per category are the best skill matches
+        at the student's level rather than the first two listed.
         """
         performance_level = self._determine_level(current_performance.get('average_grade', 70))
         categories = current_performance.get('categories', ['Tech'])
@@ -257,20 +625,42 @@ class CourseRecommendationEngine:
         recommendations = []
 
         for category in categories[:2]:
-            if category in self.course_database:
-                courses = self.course_database[category][performance_level]
-                for course in courses[:2]:
-                    recommendations.append({
-                        'course_name': course,
-                        'category': category,
-                        'level': performance_level,
-                        'duration': self._estimate_duration(performance_level),
-                        'priority': 'High' if category == categories[0] else 'Medium',
-                        'skills_gained': self._get_skills_for_course(course)
-                    })
+            courses = self.catalogue.in_category_level(category, performance_level)
+            if target_skills:
+                ranked = [item['course'] for item in self.catalogue.rank(
+                    target_skills, k=2, categories=[category], level=performance_level
+                )]
+                courses = ranked + [course for course in courses if course not in ranked]
+            for course in courses[:2]:
+                recommendations.append({
+                    'course_name': course['name'],
+                    'category': category,
+                    'level': performance_level,
+                    'duration': course['duration'],
+                    'priority': 'High' if category == categories[0] else 'Medium',
+                    'skills_gained': course['skills']
+                })
 
         return recommendations
 
+    def rank_courses(self, target_skills: List[str], k: int = 5, categories: List[str] = None,
+                     level: str = None) -> List[Dict]:
+        """
+        Top-k courses for the skills a career recommendation calls for
+        """
+        return [
+            {
+                'course_name': item['course']['name'],
+                'category': item['course']['category'],
+                'level': item['course']['level'],
+                'duration': item['course']['duration'],
+                'skills_gained': item['course']['skills'],
+                'matched_skills': item['matched_skills'],
+                'score': item['score'],
+            }
+            for item in self.catalogue.rank(target_skills, k, categories, level)
+        ]
+
     def _determine_level(self, grade: float) -> str:
         """
         Determine skill level based on grade
@@ -286,28 +676,4 @@ class CourseRecommendationEngine:
         """
         Estimate course duration based on level
         """
-        durations = {
-            'beginner': '4-6 weeks',
-            'intermediate': '8-12 weeks',
-            'advanced': '12-16 weeks'
-        }
-        return durations.get(level, '8 weeks')
-
-    def _get_skills_for_course(self, course_name: str) -> List[str]:
-        """
-        Get skills that will be gained from a course
-        """
-        skills_map = {
-            'Programming': ['Python', 'JavaScript', 'Problem Solving'],
-            'Design': ['UI/UX', 'Color Theory', 'Typography'],
-            'Analytics': ['Data Analysis', 'Visualization', 'Reporting'],
-            'Management': ['Leadership', 'Planning', 'Communication'],
-            'Development': ['Coding', 'Testing', 'Debugging'],
-            'Statistics': ['Analysis', 'Probability', 'Modeling']
-        }
-
-        for keyword, skills in skills_map.items():
-            if keyword.lower() in course_name.lower():
-                return skills
-
-        return ['Critical Thinking', 'Problem Solving', 'Application']
\ No newline at end of file
+        return LEVEL_DURATIONS.get(level, '8 weeks')
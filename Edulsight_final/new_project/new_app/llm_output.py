@@ -0,0 +1,106 @@
+import json
+
+# Shape of a career recommendation answer. Requested from the model in structured
+# mode and enforced on whatever comes back.
+RECOMMENDATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'careers': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 5},
+        'skills': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 10},
+        'courses': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 10},
+        'trends': {'type': 'string'},
+        'additional_insights': {'type': 'string'},
+    },
+    'required': ['careers', 'skills', 'courses'],
+}
+
+# Keys models commonly use for the name of an item when they return objects instead of strings
+NAME_KEYS = ('name', 'title', 'career', 'skill', 'course')
+
+
+def extract_json(text):
+    """
+    The first balanced JSON object in `text` (markdown fences, prose before or after),
+    or None. Scans once, tracking string and escape state so braces inside strings
+    don't count; a balanced candidate that isn't valid JSON is skipped whole, objects
+    nested in it included, so the scan stays linear.
+    """
+    start = None
+    depth = 0
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if start is None:
+            if char == '{':
+                start, depth = i, 1
+        elif in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                try:
+                    value = json.loads(text[start:i + 1])
+                    if isinstance(value, dict):
+                        return value
+                except ValueError:
+                    pass
+                # Not valid JSON: carry on after this candidate's closing brace
+                start = None
+    return None
+
+
+def _as_text(item):
+    if isinstance(item, dict):
+        for key in NAME_KEYS:
+            if isinstance(item.get(key), str):
+                return item[key].strip()
+        return ''
+    return str(item).strip() if item is not None else ''
+
+
+def validate(data, schema=RECOMMENDATION_SCHEMA):
+    """
+    Coerce `data` to the schema: arrays of strings (objects reduced to their name,
+    a bare string wrapped in a list, blanks and duplicates dropped, maxItems applied)
+    and strings. Returns (result, errors); result always has every schema property.
+    """
+    errors = []
+    result = {}
+    if not isinstance(data, dict):
+        errors.append('response is not a JSON object')
+        data = {}
+
+    for key, spec in schema['properties'].items():
+        value = data.get(key)
+        if value is None:
+            if key in schema.get('required', []):
+                errors.append(f'missing "{key}"')
+            result[key] = [] if spec['type'] == 'array' else ''
+            continue
+
+        if spec['type'] == 'array':
+            if not isinstance(value, list):
+                errors.append(f'"{key}" should be an array')
+                value = [value]
+            items = [text for text in (_as_text(item) for item in value) if text]
+            result[key] = list(dict.fromkeys(items))[:spec.get('maxItems')]
+        else:
+            if not isinstance(value, str):
+                errors.append(f'"{key}" should be a string')
+            result[key] = value.strip() if isinstance(value, str) else json.dumps(value)
+    return result, errors
+
+
+def schema_instructions(schema=RECOMMENDATION_SCHEMA):
+    return (
+        'Respond with a single JSON object only, no markdown, matching this JSON Schema:\n'
+        + json.dumps(schema)
+    )
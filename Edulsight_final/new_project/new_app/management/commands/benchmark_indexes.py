@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from new_app import synthetic
+from new_app.models import Attendance, Grade, Notification, Student, Teacher, WeeklyTest
+
+MODELS = [Attendance, WeeklyTest, Grade, Notification]
+
+
+def hot_queries(student, teacher, window):
+    """
+    (label, queryset) for the access paths the views, alerts and features use
+    """
+    today = date.today()
+    return [
+        ('attendance by student, by date', Attendance.objects.filter(student=student).order_by('-date')[:30]),
+        ('attendance by student+teacher', Attendance.objects.filter(student=student, teacher=teacher).order_by('date')),
+        ('weekly attendance rates', Attendance.objects.filter(student_id__in=window, date__gte=today - timedelta(days=7))
+            .values('student_id').annotate(total=Count('id'), present=Count('id', filter=Q(status='Present'))).order_by()),
+        ('tests by student, by date', WeeklyTest.objects.filter(student=student).order_by('-test_date')),
+        ('tests by student+teacher', WeeklyTest.objects.filter(student=student, teacher=teacher).order_by('test_date')),
+        ('grades by student, by date', Grade.objects.filter(student=student).order_by('-date')),
+        ('grades by student+type+subject', Grade.objects.filter(student=student, grade_type='quiz', subject='Math')
+            .order_by('date')),
+        ("teacher's recent grades", Grade.objects.filter(teacher=teacher).order_by('-date')[:10]),
+        ('notifications by student', Notification.objects.filter(student=student).order_by('-created_at')[:50]),
+        ('unread notification count', Notification.objects.filter(student=student, is_read=False)),
+        ('recent notifications by type', Notification.objects.filter(
+            student=student, notification_type='attendance',
+            created_at__gte=timezone.now() - timedelta(days=7)).order_by('-created_at')),
+    ]
+
+
+def measure(queries, repeat):
+    """
+    {label: (median ms, plan)}
+    """
+    results = {}
+    for label, queryset in queries:
+        count = label.endswith('count')
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count() if count else list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = (statistics.median(timings), queryset.explain())
+    return results
+
+
+class Command(BaseCommand):
+    help = ('Shows query plans and timings for the hot Attendance/WeeklyTest/Grade/Notification filters '
+            'with the composite indexes and with them dropped (inside a transaction that is rolled back)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000,
+                            help='Synthetic students to add for the run (0 uses the existing data only)')
+        parser.add_argument('--teachers', type=int, default=3)
+        parser.add_argument('--days', type=int, default=90, help='Calendar days of history per synthetic student')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query; the median is reported')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-plans', action='store_true', help='Only print timings')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            if options['students']:
+                start = time.perf_counter()
+                synthetic.generate(students=options['students'], teachers=options['teachers'],
+                                   days=options['days'], seed=options['seed'], prefix='benchmark')
+                roster = list(Student.objects.filter(email__endswith='@' + synthetic.domain('benchmark')).order_by('id'))
+                staff = list(Teacher.objects.filter(email__endswith='@' + synthetic.domain('benchmark')).order_by('id'))
+                self.stdout.write(f"Generated {len(roster)} students in {time.perf_counter() - start:.1f}s")
+            else:
+                roster = list(Student.objects.order_by('id')[:1000])
+                staff = list(Teacher.objects.order_by('id')[:10])
+            if not roster or not staff:
+                self.stdout.write(self.style.WARNING('No students or teachers to benchmark with.'))
+                return
+
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            student = rng.choice(roster)
+            # A teacher who actually teaches the sampled student, so the per-teacher queries return rows
+            teacher = Teacher.objects.filter(attendance__student=student).first() or rng.choice(staff)
+            queries = hot_queries(student, teacher, [s.id for s in roster[:200]])
+            after = measure(queries, options['repeat'])
+
+            editor = connection.schema_editor()
+            with connection.cursor() as cursor:
+                for model in MODELS:
+                    for index in model._meta.indexes:
+                        cursor.execute(str(index.remove_sql(model, editor)))
+                if connection.vendor in ('sqlite', 'postgresql'):
+                    cursor.execute('ANALYZE')
+            before = measure(queries, options['repeat'])
+            transaction.set_rollback(True)
+
+        width = max(len(label) for label, _ in queries)
+        self.stdout.write(f"\n{'query'.ljust(width)}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+        for label, _ in queries:
+            was, now = before[label][0], after[label][0]
+            self.stdout.write(f"{label.ljust(width)}  {was:10.3f}  {now:10.3f}  {was / now if now else 0:7.1f}x")
+
+        if not options['no_plans']:
+            for label, _ in queries:
+                self.stdout.write(f"\n== {label}\n-- before:\n{before[label][1]}\n-- after:\n{after[label][1]}")
@@ -0,0 +1,60 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from new_app.llm_bulk import default_api_key, default_base_url, generate_all
+from new_app.models import Student
+
+
+class Command(BaseCommand):
+    help = 'Generates LLM career recommendations for every active student with bounded concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, help='Requests in flight (default LLM_BULK_CONCURRENCY)')
+        parser.add_argument('--rate', type=float, help='Requests per second (default LLM_BULK_RATE_PER_SECOND)')
+        parser.add_argument('--retries', type=int, help='Retries per request (default LLM_BULK_MAX_RETRIES)')
+        parser.add_argument('--batch-size', type=int, default=100, help='History rows saved per batch')
+        parser.add_argument('--base-url', help='OpenAI-compatible API base URL (default LLM_API_BASE_URL)')
+        parser.add_argument('--api-key-env', metavar='NAME',
+                            help='Environment variable holding the key for --base-url (default: OPENAI_API_KEY '
+                                 'for LLM_API_BASE_URL, LLM_LOCAL_API_KEY for LLM_LOCAL_BASE_URL, none otherwise)')
+        parser.add_argument('--no-cache', action='store_true', help='Ignore cached responses')
+        parser.add_argument('--students', type=int, nargs='*', help='Only these student ids')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'] or default_base_url()
+        if options['api_key_env']:
+            api_key = os.getenv(options['api_key_env'])
+            if not api_key:
+                raise CommandError(f"{options['api_key_env']} is not set.")
+        else:
+            api_key = default_api_key(base_url)
+        if 'api.openai.com' in base_url and not api_key:
+            raise CommandError('OPENAI_API_KEY is not set.')
+
+        students = Student.objects.filter(is_active=True)
+        if options['students']:
+            students = students.filter(id__in=options['students'])
+
+        def report(counts):
+            self.stdout.write(f"  saved {counts['students']} generated and {counts['cached_students']} cached "
+                              f"students ({counts['requests']} requests, {counts['failed']} failed)")
+
+        start = time.perf_counter()
+        counts = generate_all(
+            students,
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            retries=options['retries'],
+            base_url=base_url,
+            api_key=api_key,
+            batch_size=options['batch_size'],
+            use_cache=not options['no_cache'],
+            report=report,
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated recommendations for {counts['students'] + counts['cached_students']} students "
+            f"({counts['cached_students']} from cache, {counts['requests']} API requests, "
+            f"{counts['failed']} fell back) in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from new_app import synthetic
+from new_app.models import Question, Student
+
+
+class Command(BaseCommand):
+    help = ('Generates a reproducible synthetic dataset (students, teachers and their attendance, tests, '
+            'grades, answers, notifications and exams) for load testing and benchmarks')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--teachers', type=int, default=50)
+        parser.add_argument('--days', type=int, default=30, help='Calendar days of history, ending today')
+        parser.add_argument('--teachers-per-student', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0, help='Same seed and sizes give the same data')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Accounts are created as <name>@<prefix>.example.com')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Students inserted per transaction')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete data previously generated with this prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['flush']:
+            synthetic.flush(prefix)
+        elif Student.objects.filter(email__endswith='@' + synthetic.domain(prefix)).exists():
+            raise CommandError(f'Synthetic data with prefix "{prefix}" already exists; '
+                               f'use --flush to replace it or pick another --prefix.')
+        if not Question.objects.filter(is_active=True).exists():
+            self.stdout.write(self.style.WARNING(
+                'No active questions, so no answers will be generated (run populate_questions first).'
+            ))
+
+        start = time.perf_counter()
+
+        def report(done, total):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{done}/{total} students ({elapsed:.0f}s)')
+
+        counts = synthetic.generate(
+            students=options['students'], teachers=options['teachers'], days=options['days'],
+            seed=options['seed'], prefix=prefix, teachers_per_student=options['teachers_per_student'],
+            chunk_size=options['chunk_size'], report=report,
+        )
+        for name, count in counts.items():
+            self.stdout.write(f'  {name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(counts.values())} rows in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from new_app import imports
+from new_app.models import Teacher
+
+
+class Command(BaseCommand):
+    help = 'Imports grades or weekly test scores from a CSV or XLSX file, matching students by email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(imports.COLUMNS), help='What the file contains')
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument('--teacher', required=True, help='Email of the teacher the rows are recorded under')
+        parser.add_argument('--chunk-size', type=int, default=imports.CHUNK_SIZE,
+                            help='Rows inserted per bulk_create')
+
+    def handle(self, *args, **options):
+        teacher = Teacher.objects.filter(email__iexact=options['teacher']).first()
+        if teacher is None:
+            raise CommandError(f"No teacher with email {options['teacher']}")
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as f:
+                result = imports.import_records(
+                    options['kind'], imports.read_rows(f, options['path']), teacher, options['chunk_size']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        for line, error in result['errors']:
+            self.stdout.write(self.style.WARNING(f'Line {line}: {error}'))
+        if result['skipped'] > len(result['errors']):
+            self.stdout.write(self.style.WARNING(f"... {result['skipped'] - len(result['errors'])} more skipped rows"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['imported']} {options['kind']} for {result['students']} students "
+            f"({result['skipped']} skipped) in {elapsed:.2f}s"
+        ))
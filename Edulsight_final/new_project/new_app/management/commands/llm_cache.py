@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from new_app import llm_cache
+
+
+class Command(BaseCommand):
+    help = 'Shows LLM response cache statistics; optionally evicts expired/LRU entries or clears the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true', help='Apply TTL and LRU eviction now')
+        parser.add_argument('--clear', action='store_true', help='Delete every cached response')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {llm_cache.clear()} cached responses'))
+        elif options['evict']:
+            self.stdout.write(self.style.SUCCESS(f'Evicted {llm_cache.evict()} cached responses'))
+
+        stats = llm_cache.stats()
+        self.stdout.write(f"Entries: {stats['entries']} (lifetime hits on stored entries: {stats['stored_hits']})")
@@ -0,0 +1,34 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from new_app.career_matching import batch_match
+
+
+class Command(BaseCommand):
+    help = 'Scores every student against every active career and writes the ranked matches as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='CSV file to write (default: stdout)')
+        parser.add_argument('--top', type=int, default=6, help='Matches to keep per student')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        matches = batch_match(top_k=options['top'])
+        elapsed = time.perf_counter() - start
+
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(['student_id', 'rank', 'career_id', 'career', 'category', 'score'])
+            for student_id, ranked in matches.items():
+                for rank, (career, score) in enumerate(ranked, start=1):
+                    writer.writerow([student_id, rank, career.id, career.name, career.category, f'{score:.1f}'])
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Matched {len(matches)} students in {elapsed:.3f}s'
+        ))
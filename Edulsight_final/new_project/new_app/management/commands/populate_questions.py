@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from new_app.models import Career, Question, Option
+from new_app import questionnaire
 
 class Command(BaseCommand):
     help = 'Populates the database with example careers and questions for Edulsight'
@@ -172,4 +173,5 @@ class Command(BaseCommand):
                     )
             self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} question: {question.text}'))
 
+        questionnaire.invalidate()
         self.stdout.write(self.style.SUCCESS('Database populated successfully!'))
\ No newline at end of file
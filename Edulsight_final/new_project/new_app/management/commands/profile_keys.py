@@ -0,0 +1,42 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from new_app.llm_cache import make_key
+from new_app.llm_integration import CareerRecommendationLLM
+from new_app.profiles import build_profiles, canonicalize
+
+
+def _key(profile):
+    return make_key(profile, CareerRecommendationLLM.MODEL, CareerRecommendationLLM.PROMPT_VERSION)
+
+
+class Command(BaseCommand):
+    help = 'Counts the distinct canonical LLM profile keys across active students (sizes a precomputation run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Show the N most shared profiles')
+
+    def handle(self, *args, **options):
+        profiles = build_profiles()
+        raw_keys = {_key(profile) for profile in profiles.values()}
+
+        keys = Counter()
+        examples = {}
+        for profile in profiles.values():
+            canonical = canonicalize(profile)
+            key = _key(canonical)
+            keys[key] += 1
+            examples.setdefault(key, canonical)
+
+        students = len(profiles)
+        self.stdout.write(f'Students: {students}')
+        self.stdout.write(f'Distinct raw profiles: {len(raw_keys)}')
+        self.stdout.write(self.style.SUCCESS(f'Distinct canonical keys: {len(keys)}'))
+        if students:
+            self.stdout.write(f'Best-case cache hit rate after one pass: {1 - len(keys) / students:.1%}')
+
+        for key, count in keys.most_common(options['top']):
+            profile = examples[key]
+            self.stdout.write(
+                f"  {count:>6}  grade {profile['performance_grade']}, categories {', '.join(profile['categories'])}"
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from new_app.stats import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the StudentStats / StudentSubjectStats / StudentTeacherStats rollups from raw records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare stored rollups with a full recompute; do not write')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = verify_rollups()
+            for mismatch in mismatches[:50]:
+                self.stdout.write(self.style.WARNING(mismatch))
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} rollup values differ from the raw records. '
+                                   f'Run without --verify to rebuild them.')
+            self.stdout.write(self.style.SUCCESS('All rollups match the raw records.'))
+            return
+
+        counts = rebuild_rollups()
+        for name, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} {name} rows'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from new_app.alerts import run_alert_scan
+
+
+class Command(BaseCommand):
+    help = 'Creates automated notifications for students with new activity since the last run'
+
+    def handle(self, *args, **options):
+        timer = run_alert_scan()
+        for name, stage in timer.stages.items():
+            self.stdout.write(f"  {name}: {stage['rows']} rows in {stage['seconds']:.3f}s")
+        self.stdout.write(self.style.SUCCESS('Alert scan complete'))
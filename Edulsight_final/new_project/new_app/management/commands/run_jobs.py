@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from new_app import jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs (course suggestions, etc.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due and exit')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds between polls')
+        parser.add_argument('--limit', type=int, default=100, help='Maximum jobs per poll')
+
+    def handle(self, *args, **options):
+        while True:
+            succeeded, failed = jobs.run_due_jobs(limit=options['limit'])
+            if succeeded or failed:
+                self.stdout.write(f'Ran {succeeded} jobs, {failed} failed')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,141 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from new_app.models import Student, PerformancePrediction, ImprovementStrategy, Notification
+from new_app.ml_models import PerformancePredictionModel, ImprovementStrategyGenerator, FEATURE_COLUMNS
+from new_app.features import extract_features
+
+
+def score_chunk(student_ids):
+    """
+    Predict, and store predictions/strategies/notifications for one chunk of students.
+    Returns the number of rows inserted per model.
+    """
+    features = extract_features(student_ids)
+    result = PerformancePredictionModel().predict_batch(features.matrix())
+    strategy_generator = ImprovementStrategyGenerator()
+
+    predictions, strategies, notifications = [], [], []
+    for i, student_id in enumerate(features.student_ids.tolist()):
+        student_data = {name: float(features.columns[name][i]) for name in FEATURE_COLUMNS}
+        prediction_result = {
+            'predicted_grade': float(result['predicted_grade'][i]),
+            'confidence': result['confidence'][i],
+            'trend': result['trend'][i],
+        }
+
+        predictions.append(PerformancePrediction(
+            student_id=student_id,
+            predicted_grade=prediction_result['predicted_grade'],
+            confidence_level=prediction_result['confidence'],
+            trend=prediction_result['trend'],
+            factors=student_data
+        ))
+
+        generated = strategy_generator.generate_strategies(student_data, prediction_result)
+        category = generated['priority_areas'][0] if generated['priority_areas'] else 'general'
+        for position, strategy_text in enumerate(generated['strategies']):
+            strategies.append(ImprovementStrategy(
+                student_id=student_id,
+                strategy_text=strategy_text,
+                priority='High' if position < 2 else 'Medium',
+                category=category
+            ))
+
+        notifications.append(Notification(
+            student_id=student_id,
+            title='New Performance Prediction Available',
+            message=f'Your predicted grade is {prediction_result["predicted_grade"]}% with {prediction_result["confidence"]} confidence. Your performance trend is {prediction_result["trend"]}.',
+            notification_type='performance',
+            priority='high' if prediction_result['predicted_grade'] < 60 else 'medium'
+        ))
+
+    with transaction.atomic():
+        PerformancePrediction.objects.bulk_create(predictions)
+        ImprovementStrategy.objects.bulk_create(strategies)
+        Notification.objects.bulk_create(notifications)
+
+    return {
+        'predictions': len(predictions),
+        'strategies': len(strategies),
+        'notifications': len(notifications),
+    }
+
+
+def _close_inherited_connections():
+    # Forked workers must not share the parent's database connection
+    connections.close_all()
+
+
+def _worker_context():
+    """
+    Workers are forked so they inherit the configured Django app registry; a
+    spawned interpreter would import this module (and the models) before any
+    initializer could run django.setup(). None where fork is not available.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Scores every active student and stores fresh performance predictions (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Students scored and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of worker processes to split chunks across')
+
+    def iter_chunks(self, chunk_size):
+        chunk = []
+        student_ids = Student.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+        for student_id in student_ids.iterator(chunk_size=chunk_size):
+            chunk.append(student_id)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        totals = {'predictions': 0, 'strategies': 0, 'notifications': 0}
+        started = time.perf_counter()
+
+        context = _worker_context() if workers > 1 else None
+        if workers > 1 and context is None:
+            self.stdout.write(self.style.WARNING('Worker processes need fork; scoring in this process.'))
+
+        if context is None:
+            results = map(score_chunk, self.iter_chunks(chunk_size))
+            self._collect(results, totals, started)
+        else:
+            chunks = list(self.iter_chunks(chunk_size))
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_close_inherited_connections) as pool:
+                self._collect(pool.map(score_chunk, chunks), totals, started)
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        rate = totals['predictions'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {totals['predictions']} students in {elapsed:.2f}s "
+            f"({rate:.0f} students/s, {rows / elapsed if elapsed else 0:.0f} rows/s); "
+            f"{totals['strategies']} strategies, {totals['notifications']} notifications"
+        ))
+
+    def _collect(self, results, totals, started):
+        for counts in results:
+            for key, value in counts.items():
+                totals[key] += value
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  {totals['predictions']} students scored "
+                f"({totals['predictions'] / elapsed if elapsed else 0:.0f}/s)"
+            )
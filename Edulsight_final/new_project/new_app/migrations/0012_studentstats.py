@@ -0,0 +1,113 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:15
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def backfill_stats(apps, schema_editor):
+    Attendance = apps.get_model('new_app', 'Attendance')
+    WeeklyTest = apps.get_model('new_app', 'WeeklyTest')
+    Grade = apps.get_model('new_app', 'Grade')
+    StudentStats = apps.get_model('new_app', 'StudentStats')
+    StudentSubjectStats = apps.get_model('new_app', 'StudentSubjectStats')
+    StudentTeacherStats = apps.get_model('new_app', 'StudentTeacherStats')
+
+    per_student = defaultdict(dict)
+    per_subject = defaultdict(dict)
+    per_teacher = defaultdict(dict)
+
+    attendance = dict(attendance_total=Count('id'), attendance_present=Count('id', filter=Q(status='Present')))
+    for row in Attendance.objects.values('student_id', 'teacher_id').annotate(**attendance).order_by():
+        per_teacher[(row['student_id'], row['teacher_id'])].update(
+            attendance_total=row['attendance_total'], attendance_present=row['attendance_present'])
+        totals = per_student[row['student_id']]
+        totals['attendance_total'] = totals.get('attendance_total', 0) + row['attendance_total']
+        totals['attendance_present'] = totals.get('attendance_present', 0) + row['attendance_present']
+
+    tests = dict(test_count=Count('id'), test_score_sum=Sum('score'))
+    for row in WeeklyTest.objects.values('student_id', 'teacher_id').annotate(**tests).order_by():
+        if row['teacher_id']:
+            per_teacher[(row['student_id'], row['teacher_id'])].update(
+                test_count=row['test_count'], test_score_sum=row['test_score_sum'])
+        totals = per_student[row['student_id']]
+        totals['test_count'] = totals.get('test_count', 0) + row['test_count']
+        totals['test_score_sum'] = totals.get('test_score_sum', 0) + row['test_score_sum']
+
+    grades = dict(grade_count=Count('id'), grade_percentage_sum=Sum('percentage'))
+    for row in Grade.objects.values('student_id', 'teacher_id', 'subject').annotate(**grades).order_by():
+        for totals in (
+            per_student[row['student_id']],
+            per_subject[(row['student_id'], row['subject'])],
+            per_teacher[(row['student_id'], row['teacher_id'])],
+        ):
+            totals['grade_count'] = totals.get('grade_count', 0) + row['grade_count']
+            totals['grade_percentage_sum'] = totals.get('grade_percentage_sum', 0) + row['grade_percentage_sum']
+
+    StudentStats.objects.bulk_create(
+        [StudentStats(student_id=key, **values) for key, values in per_student.items()], batch_size=1000)
+    StudentSubjectStats.objects.bulk_create(
+        [StudentSubjectStats(student_id=key[0], subject=key[1], **values) for key, values in per_subject.items()],
+        batch_size=1000)
+    StudentTeacherStats.objects.bulk_create(
+        [StudentTeacherStats(student_id=key[0], teacher_id=key[1], **values) for key, values in per_teacher.items()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('new_app', '0011_predictionfeedback_examschedule_coursesuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='new_app.student')),
+                ('attendance_total', models.IntegerField(default=0)),
+                ('attendance_present', models.IntegerField(default=0)),
+                ('test_count', models.IntegerField(default=0)),
+                ('test_score_sum', models.FloatField(default=0)),
+                ('grade_count', models.IntegerField(default=0)),
+                ('grade_percentage_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentTeacherStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attendance_total', models.IntegerField(default=0)),
+                ('attendance_present', models.IntegerField(default=0)),
+                ('test_count', models.IntegerField(default=0)),
+                ('test_score_sum', models.FloatField(default=0)),
+                ('grade_count', models.IntegerField(default=0)),
+                ('grade_percentage_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teacher_stats', to='new_app.student')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_stats', to='new_app.teacher')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentSubjectStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=100)),
+                ('grade_count', models.IntegerField(default=0)),
+                ('grade_percentage_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_stats', to='new_app.student')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='studentteacherstats',
+            constraint=models.UniqueConstraint(fields=('student', 'teacher'), name='unique_student_teacher_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentsubjectstats',
+            constraint=models.UniqueConstraint(fields=('student', 'subject'), name='unique_student_subject_stats'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
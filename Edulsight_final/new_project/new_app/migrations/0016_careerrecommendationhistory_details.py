@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('new_app', '0015_llmresponsecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careerrecommendationhistory',
+            name='details',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    """
+    Keep the latest record for each (student, teacher, date) and take the
+    removed ones back out of the attendance rollups
+    """
+    Attendance = apps.get_model('new_app', 'Attendance')
+    StudentStats = apps.get_model('new_app', 'StudentStats')
+    StudentTeacherStats = apps.get_model('new_app', 'StudentTeacherStats')
+
+    duplicated = Attendance.objects.values('student_id', 'teacher_id', 'date') \
+        .annotate(keep=Max('id'), n=Count('id')).filter(n__gt=1).order_by()
+    for group in duplicated:
+        extra = Attendance.objects.filter(
+            student_id=group['student_id'], teacher_id=group['teacher_id'], date=group['date']
+        ).exclude(id=group['keep'])
+        total = extra.count()
+        present = extra.filter(status='Present').count()
+        extra.delete()
+
+        changes = {'attendance_total': F('attendance_total') - total,
+                   'attendance_present': F('attendance_present') - present}
+        StudentStats.objects.filter(student_id=group['student_id']).update(**changes)
+        StudentTeacherStats.objects.filter(
+            student_id=group['student_id'], teacher_id=group['teacher_id']
+        ).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('new_app', '0016_careerrecommendationhistory_details'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('student', 'teacher', 'date'), name='unique_attendance_per_teacher_day'),
+        ),
+    ]
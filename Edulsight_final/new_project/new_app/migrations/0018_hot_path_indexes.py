@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:41
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    """
+    Keep the latest answer for each (student, question)
+    """
+    Answer = apps.get_model('new_app', 'Answer')
+    duplicated = Answer.objects.values('student_id', 'question_id') \
+        .annotate(keep=Max('id'), n=Count('id')).filter(n__gt=1).order_by()
+    for group in duplicated:
+        Answer.objects.filter(
+            student_id=group['student_id'], question_id=group['question_id']
+        ).exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('new_app', '0017_attendance_unique_attendance_per_teacher_day'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'date', 'status'], name='attendance_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'date'], name='grade_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'grade_type', 'subject', 'date'], name='grade_student_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['teacher', 'date'], name='grade_teacher_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['student', 'created_at'], name='notification_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['student', 'notification_type', 'created_at'], name='notification_student_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['teacher', 'created_at'], name='notification_teacher_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['student', 'created_at'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklytest',
+            index=models.Index(fields=['student', 'test_date'], name='weeklytest_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklytest',
+            index=models.Index(fields=['student', 'teacher', 'test_date'], name='weeklytest_student_teacher_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(fields=('student', 'question'), name='unique_answer_per_question'),
+        ),
+    ]
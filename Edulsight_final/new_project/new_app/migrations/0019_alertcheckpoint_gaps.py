@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('new_app', '0018_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertcheckpoint',
+            name='gaps',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
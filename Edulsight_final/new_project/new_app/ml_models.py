@@ -7,15 +7,157 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from django.conf import settings
 
+
+class ModelRegistry:
+    """
+    Process-wide cache of the trained model bundle (one joblib file holding
+    {'model', 'scaler'}, so a retrain replaces both with a single rename).
+
+    Each worker unpickles the file once; after that a lookup only compares
+    a version stamp (mtime/size of the file, re-checked at most every
+    check_interval seconds) and swaps in freshly loaded objects when a
+    retrain has replaced it on disk. A bare model pickle from before bundles
+    is still loaded, together with the scaler pickle at legacy_scaler_path.
+    """
+
+    def __init__(self, model_path, legacy_scaler_path=None, check_interval=None):
+        self.model_path = model_path
+        self.legacy_scaler_path = legacy_scaler_path
+        if check_interval is None:
+            check_interval = getattr(settings, 'MODEL_REGISTRY_CHECK_INTERVAL', 5)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # (version, model, scaler) - replaced as a whole so readers never see a mixed pair
+        self._entry = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.last_load_seconds = 0.0
+        self.loaded_at = None
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        bundle = joblib.load(self.model_path)
+        if isinstance(bundle, dict):
+            return bundle['model'], bundle['scaler']
+        return bundle, joblib.load(self.legacy_scaler_path)
+
+    def get(self):
+        """
+        Return (model, scaler), or (None, None) when no trained model exists
+        """
+        entry = self._entry
+        now = time.monotonic()
+        if entry is not None and now - self._checked_at < self.check_interval:
+            self.hits += 1
+            return entry[1], entry[2]
+
+        version = self._file_version()
+        if entry is not None and entry[0] == version:
+            self._checked_at = now
+            self.hits += 1
+            return entry[1], entry[2]
+
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == version:
+                self._checked_at = now
+                self.hits += 1
+                return entry[1], entry[2]
+
+            self.misses += 1
+            if version is None:
+                self._entry = (None, None, None)
+            else:
+                start = time.perf_counter()
+                model, scaler = self._load()
+                self.last_load_seconds = time.perf_counter() - start
+                self.loaded_at = datetime.now()
+                if entry is not None and entry[1] is not None:
+                    self.reloads += 1
+                self._entry = (version, model, scaler)
+            self._checked_at = now
+            return self._entry[1], self._entry[2]
+
+    def invalidate(self):
+        """
+        Force the next lookup to re-check the files on disk
+        """
+        self._checked_at = 0.0
+
+    def stats(self):
+        entry = self._entry
+        total = self.hits + self.misses
+        return {
+            'model_path': self.model_path,
+            'loaded': entry is not None and entry[1] is not None,
+            'version': entry[0] if entry else None,
+            'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+            'last_load_ms': round(self.last_load_seconds * 1000, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry(model_path, legacy_scaler_path=None):
+    """
+    Return the shared registry for a model bundle, creating it on first use
+    """
+    key = (str(model_path), str(legacy_scaler_path))
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = ModelRegistry(model_path, legacy_scaler_path)
+                _registries[key] = registry
+    return registry
+
+
+FEATURE_COLUMNS = [
+    'attendance_rate',
+    'test_average',
+    'assignments_completed',
+    'participation_score',
+    'previous_grade',
+    'study_hours',
+    'quiz_scores',
+]
+
+# Untrained fallback: DEFAULT_BASE_SCORE plus weighted differences from the default
+# feature values, which also stand in for features that are missing
+DEFAULT_BASE_SCORE = 70
+DEFAULT_FEATURE_VALUES = {'attendance_rate': 75, 'test_average': 70, 'participation_score': 70}
+DEFAULT_FEATURE_WEIGHTS = {'attendance_rate': 0.3, 'test_average': 0.4, 'participation_score': 0.3}
+
+
 class PerformancePredictionModel:
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
+        # The model and its scaler, saved together as one bundle
         self.model_path = os.path.join(settings.BASE_DIR, 'ml_models', 'performance_model.pkl')
+        # Written next to the model by versions that saved two files
         self.scaler_path = os.path.join(settings.BASE_DIR, 'ml_models', 'scaler.pkl')
+        self.registry = get_model_registry(self.model_path, self.scaler_path)
 
     def prepare_features(self, student_data):
         """
@@ -32,6 +174,24 @@ class PerformancePredictionModel:
         }
         return pd.DataFrame([features])
 
+    def prepare_feature_matrix(self, students):
+        """
+        Build an (n_students, n_features) float matrix in FEATURE_COLUMNS order.
+        Accepts a NumPy array (passed through) or a list of student_data dicts;
+        missing or None values become NaN so callers can tell them apart from zeros.
+        """
+        if isinstance(students, np.ndarray):
+            matrix = students.astype(float, copy=False)
+        else:
+            matrix = np.array([
+                [np.nan if row.get(col) is None else row.get(col) for col in FEATURE_COLUMNS]
+                for row in students
+            ], dtype=float).reshape(-1, len(FEATURE_COLUMNS))
+
+        if matrix.ndim != 2 or matrix.shape[1] != len(FEATURE_COLUMNS):
+            raise ValueError(f'Expected a matrix with {len(FEATURE_COLUMNS)} feature columns, got shape {matrix.shape}')
+        return matrix
+
     def train_model(self, training_data):
         """
         Train the performance prediction model
@@ -59,10 +219,12 @@ class PerformancePredictionModel:
         mae = mean_absolute_error(y_test, predictions)
         r2 = r2_score(y_test, predictions)
 
-        # Save model
+        # Save model and scaler as one bundle (written to a temp file and renamed, so running
+        # workers see either the old pair or the new one, never a partial or mixed one)
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.scaler, self.scaler_path)
+        joblib.dump({'model': self.model, 'scaler': self.scaler}, self.model_path + '.tmp')
+        os.replace(self.model_path + '.tmp', self.model_path)
+        self.registry.invalidate()
 
         return {'mae': mae, 'r2': r2}
 
@@ -70,18 +232,14 @@ class PerformancePredictionModel:
         """
         Predict student performance
         """
-        if not self.model:
-            if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
-            else:
-                # Use default model if not trained
-                self.model = LinearRegression()
-                return self._default_prediction(student_data)
+        model, scaler = self._get_model()
+        if model is None:
+            # Use default model if not trained
+            return self._default_prediction(student_data)
 
         features = self.prepare_features(student_data)
-        features_scaled = self.scaler.transform(features)
-        prediction = self.model.predict(features_scaled)[0]
+        features_scaled = scaler.transform(features)
+        prediction = model.predict(features_scaled)[0]
 
         # Ensure prediction is within valid range
         prediction = max(0, min(100, prediction))
@@ -92,20 +250,48 @@ class PerformancePredictionModel:
             'trend': self._analyze_trend(student_data)
         }
 
+    def predict_batch(self, students):
+        """
+        Predict performance for many students with one scaler/model call.
+        Returns a dict of arrays aligned with the input rows:
+        predicted_grade (float), confidence (str) and trend (str).
+        """
+        matrix = self.prepare_feature_matrix(students)
+        if len(matrix) == 0:
+            return {
+                'predicted_grade': np.empty(0),
+                'confidence': np.empty(0, dtype=object),
+                'trend': np.empty(0, dtype=object),
+            }
+
+        model, scaler = self._get_model()
+        if model is None:
+            return self._default_prediction_batch(matrix)
+
+        features = pd.DataFrame(np.nan_to_num(matrix, nan=0.0), columns=FEATURE_COLUMNS)
+        predictions = model.predict(scaler.transform(features))
+
+        return {
+            'predicted_grade': np.round(np.clip(predictions, 0, 100), 2),
+            'confidence': self._calculate_confidence_batch(matrix),
+            'trend': self._analyze_trend_batch(matrix),
+        }
+
+    def _get_model(self):
+        """
+        Use the model trained on this instance, otherwise the shared registry copy
+        """
+        if self.model is not None:
+            return self.model, self.scaler
+        return self.registry.get()
+
     def _default_prediction(self, student_data):
         """
         Default prediction when model is not available
         """
-        base_score = 70
-        attendance_weight = 0.3
-        test_weight = 0.4
-        participation_weight = 0.3
-
-        predicted = (
-            base_score +
-            (student_data.get('attendance_rate', 75) - 75) * attendance_weight +
-            (student_data.get('test_average', 70) - 70) * test_weight +
-            (student_data.get('participation_score', 70) - 70) * participation_weight
+        predicted = DEFAULT_BASE_SCORE + sum(
+            (student_data.get(name, DEFAULT_FEATURE_VALUES[name]) - DEFAULT_FEATURE_VALUES[name]) * weight
+            for name, weight in DEFAULT_FEATURE_WEIGHTS.items()
         )
 
         return {
@@ -114,6 +300,50 @@ class PerformancePredictionModel:
             'trend': 'Stable'
         }
 
+    def _default_prediction_batch(self, matrix):
+        """
+        Vectorized _default_prediction; NaN features take the same defaults
+        """
+        predicted = DEFAULT_BASE_SCORE + sum(
+            (self._column(matrix, name, default=DEFAULT_FEATURE_VALUES[name]) - DEFAULT_FEATURE_VALUES[name]) * weight
+            for name, weight in DEFAULT_FEATURE_WEIGHTS.items()
+        )
+
+        return {
+            'predicted_grade': np.round(np.clip(predicted, 0, 100), 2),
+            'confidence': np.full(len(matrix), 'Medium', dtype=object),
+            'trend': np.full(len(matrix), 'Stable', dtype=object),
+        }
+
+    def _column(self, matrix, name, default=0):
+        column = matrix[:, FEATURE_COLUMNS.index(name)]
+        return np.where(np.isnan(column), default, column)
+
+    def _calculate_confidence_batch(self, matrix):
+        """
+        Vectorized _calculate_confidence
+        """
+        tracked = [FEATURE_COLUMNS.index(key) for key in ['attendance_rate', 'test_average', 'assignments_completed']]
+        data_completeness = (~np.isnan(matrix[:, tracked])).sum(axis=1) / 7
+
+        return np.select(
+            [data_completeness > 0.8, data_completeness > 0.5],
+            ['High', 'Medium'],
+            default='Low'
+        ).astype(object)
+
+    def _analyze_trend_batch(self, matrix):
+        """
+        Vectorized _analyze_trend
+        """
+        diff = self._column(matrix, 'test_average') - self._column(matrix, 'previous_grade')
+
+        return np.select(
+            [diff > 5, diff < -5],
+            ['Improving', 'Declining'],
+            default='Stable'
+        ).astype(object)
+
     def _calculate_confidence(self, student_data):
         """
         Calculate confidence level of prediction
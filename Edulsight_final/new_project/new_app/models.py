@@ -27,6 +27,11 @@ class Answer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     score = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'question'], name='unique_answer_per_question'),
+        ]
+
 class Career(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -73,6 +78,16 @@ class Attendance(models.Model):
     date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=[('Present', 'Present'), ('Absent', 'Absent')])
 
+    class Meta:
+        constraints = [
+            # One record per student per teacher per day; re-marking corrects it
+            models.UniqueConstraint(fields=['student', 'teacher', 'date'], name='unique_attendance_per_teacher_day'),
+        ]
+        indexes = [
+            # Per-student history ordered by date and the weekly alert window; status rides
+            # along so present/total counts are answered from the index alone
+            models.Index(fields=['student', 'date', 'status'], name='attendance_student_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.first_name} - {self.date} ({self.status})"
@@ -84,6 +99,12 @@ class WeeklyTest(models.Model):
     test_date = models.DateField(auto_now_add=True)
     score = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'test_date'], name='weeklytest_student_date_idx'),
+            models.Index(fields=['student', 'teacher', 'test_date'], name='weeklytest_student_teacher_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.first_name} - {self.score}"
 
@@ -153,6 +174,14 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['student', 'created_at'], name='notification_student_idx'),
+            models.Index(fields=['student', 'notification_type', 'created_at'], name='notification_student_type_idx'),
+            models.Index(fields=['teacher', 'created_at'], name='notification_teacher_idx'),
+            # Unread badges and mark-as-read only touch the (small) unread set
+            models.Index(fields=['student', 'created_at'], condition=models.Q(is_read=False),
+                         name='notification_unread_idx'),
+        ]
 
 
 class CareerRecommendationHistory(models.Model):
@@ -160,6 +189,8 @@ class CareerRecommendationHistory(models.Model):
     careers = models.JSONField()
     skills_recommended = models.JSONField()
     courses_suggested = models.JSONField()
+    # Full recommendation payload (trends, insights, ...) as returned by CareerRecommendationLLM
+    details = models.JSONField(default=dict, blank=True)
     llm_used = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     feedback_rating = models.IntegerField(null=True, blank=True)
@@ -185,6 +216,13 @@ class Grade(models.Model):
     date = models.DateField(auto_now_add=True)
     comments = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'date'], name='grade_student_date_idx'),
+            models.Index(fields=['student', 'grade_type', 'subject', 'date'], name='grade_student_type_idx'),
+            models.Index(fields=['teacher', 'date'], name='grade_teacher_date_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         self.percentage = (self.score / self.max_score) * 100
         super().save(*args, **kwargs)
@@ -289,3 +327,166 @@ class PredictionFeedback(models.Model):
 
 
 
+
+
+class StudentStats(models.Model):
+    """
+    Running totals per student, kept up to date by new_app.stats on every
+    Attendance / WeeklyTest / Grade insert so dashboards read one row
+    instead of aggregating the raw tables.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attendance_total = models.IntegerField(default=0)
+    attendance_present = models.IntegerField(default=0)
+    test_count = models.IntegerField(default=0)
+    test_score_sum = models.FloatField(default=0)
+    grade_count = models.IntegerField(default=0)
+    grade_percentage_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def attendance_rate(self):
+        return (self.attendance_present / self.attendance_total * 100) if self.attendance_total > 0 else 0
+
+    @property
+    def test_average(self):
+        return (self.test_score_sum / self.test_count) if self.test_count > 0 else None
+
+    @property
+    def grade_average(self):
+        return (self.grade_percentage_sum / self.grade_count) if self.grade_count > 0 else None
+
+    def __str__(self):
+        return f"Stats for {self.student_id}"
+
+
+class StudentSubjectStats(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='subject_stats')
+    subject = models.CharField(max_length=100)
+    grade_count = models.IntegerField(default=0)
+    grade_percentage_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def grade_average(self):
+        return (self.grade_percentage_sum / self.grade_count) if self.grade_count > 0 else None
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'subject'], name='unique_student_subject_stats')
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.student_id} - {self.subject}"
+
+
+class StudentTeacherStats(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='teacher_stats')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='student_stats')
+    attendance_total = models.IntegerField(default=0)
+    attendance_present = models.IntegerField(default=0)
+    test_count = models.IntegerField(default=0)
+    test_score_sum = models.FloatField(default=0)
+    grade_count = models.IntegerField(default=0)
+    grade_percentage_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def attendance_rate(self):
+        return (self.attendance_present / self.attendance_total * 100) if self.attendance_total > 0 else 0
+
+    @property
+    def test_average(self):
+        return (self.test_score_sum / self.test_count) if self.test_count > 0 else None
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'teacher'], name='unique_student_teacher_stats')
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.student_id} with teacher {self.teacher_id}"
+
+
+class BackgroundJob(models.Model):
+    """
+    A unit of deferred work for new_app.jobs. At most one pending job exists
+    per (name, key), so repeated triggers before it runs coalesce into one.
+    """
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=[
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed')
+    ], default='pending')
+    run_after = models.DateTimeField()
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_job'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.name}:{self.key} ({self.status})"
+
+
+class AlertCheckpoint(models.Model):
+    """
+    High-water mark (last processed primary key) per source table for new_app.alerts,
+    with the id ranges under it that had no committed row yet when scanned
+    """
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    # [[first_id, last_id, first_seen unix time], ...]
+    gaps = models.JSONField(default=list, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_id}"
+
+
+class DataVersion(models.Model):
+    """
+    Version stamp of a cached, derived data set (see new_app.versions), shared by all processes
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.version}"
+
+
+class LLMResponseCache(models.Model):
+    """
+    Stored LLM responses keyed by a hash of the normalized prompt inputs (see new_app.llm_cache)
+    """
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    prompt_version = models.CharField(max_length=20)
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    last_hit_at = models.DateTimeField()
+    hit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_hit_at'], name='llm_cache_last_hit_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} v{self.prompt_version} {self.key[:12]}"
@@ -10,6 +10,7 @@ from .models import (
     PredictionFeedback, PerformancePrediction,
     CourseSuggestion, Grade, Attendance
 )
+from .alerts import run_alert_scan
 
 
 @login_required
@@ -206,108 +207,11 @@ def exam_schedule_view(request):
 def send_automated_notifications():
     """
     Background task to send automated notifications
-    Should be called by a scheduler (e.g., Celery)
-    """
-    from datetime import date, timedelta
-    today = date.today()
-    tomorrow = today + timedelta(days=1)
-    week_later = today + timedelta(days=7)
-
-    # 1. Exam reminders (24 hours before)
-    upcoming_exams = ExamSchedule.objects.filter(
-        exam_date__date=tomorrow,
-        reminder_sent=False
-    )
-
-    for exam in upcoming_exams:
-        for student in exam.students.all():
-            Notification.objects.create(
-                student=student,
-                title=f'Exam Tomorrow: {exam.subject}',
-                message=f'Reminder: {exam.subject} {exam.get_exam_type_display()} is tomorrow at {exam.exam_date.strftime("%H:%M")}',
-                notification_type='test',
-                priority='high'
-            )
-        exam.reminder_sent = True
-        exam.save()
+    Should be called by a scheduler (e.g., Celery) or `manage.py run_alerts`
 
-    # 2. Low attendance alerts
-    students = Student.objects.filter(is_active=True)
-    for student in students:
-        recent_attendance = Attendance.objects.filter(
-            student=student,
-            date__gte=today - timedelta(days=7)
-        )
-        if recent_attendance.count() > 0:
-            attendance_rate = recent_attendance.filter(
-                status='Present'
-            ).count() / recent_attendance.count() * 100
-
-            if attendance_rate < 50:
-                # Check if we already sent an alert this week
-                recent_alert = Notification.objects.filter(
-                    student=student,
-                    notification_type='attendance',
-                    created_at__gte=timezone.now() - timedelta(days=7)
-                ).exists()
-
-                if not recent_alert:
-                    Notification.objects.create(
-                        student=student,
-                        title='Critical Attendance Alert',
-                        message=f'Your attendance is critically low at {attendance_rate:.1f}%. Immediate improvement required.',
-                        notification_type='attendance',
-                        priority='high'
-                    )
-
-    # 3. Performance decline alerts
-    for student in students:
-        recent_grades = Grade.objects.filter(
-            student=student,
-            date__gte=today - timedelta(days=30)
-        ).order_by('-date')
-
-        if recent_grades.count() >= 3:
-            recent_avg = sum([g.percentage for g in recent_grades[:3]]) / 3
-            older_grades = Grade.objects.filter(
-                student=student,
-                date__lt=today - timedelta(days=30)
-            ).order_by('-date')[:3]
-
-            if older_grades.count() >= 3:
-                older_avg = sum([g.percentage for g in older_grades]) / 3
-
-                if recent_avg < older_avg - 10:  # 10% decline
-                    Notification.objects.create(
-                        student=student,
-                        title='Performance Decline Detected',
-                        message=f'Your recent average ({recent_avg:.1f}%) shows a decline from previous performance ({older_avg:.1f}%). Consider reviewing improvement strategies.',
-                        notification_type='performance',
-                        priority='high'
-                    )
-
-    # 4. New course suggestion reminders
-    unaccepted_suggestions = CourseSuggestion.objects.filter(
-        is_accepted__isnull=True,
-        created_at__gte=timezone.now() - timedelta(days=7),
-        created_at__lt=timezone.now() - timedelta(days=3)
-    )
-
-    for suggestion in unaccepted_suggestions:
-        # Check if reminder already sent
-        recent_reminder = Notification.objects.filter(
-            student=suggestion.student,
-            message__contains=suggestion.course_name,
-            created_at__gte=timezone.now() - timedelta(days=3)
-        ).exists()
-
-        if not recent_reminder:
-            Notification.objects.create(
-                student=suggestion.student,
-                title='Pending Course Suggestion',
-                message=f'Reminder: Please review the suggested course "{suggestion.course_name}" and provide your feedback.',
-                notification_type='career',
-                priority='medium'
-            )
-
-    return f"Automated notifications sent successfully at {timezone.now()}"
\ No newline at end of file
+    Delegates to the incremental alert engine in new_app.alerts, which only
+    evaluates students with new attendance/test/grade rows since its last run.
+    """
+    timer = run_alert_scan()
+    send_automated_notifications.last_run = timer.stages
+    return f"Automated notifications sent successfully at {timezone.now()} ({timer.summary()})"
@@ -0,0 +1,78 @@
+from django.db.models import Avg
+from .models import Answer, Student, StudentStats
+
+# Questionnaire category average needed to count as an interest
+INTEREST_THRESHOLD = 3
+# Width of the bands numeric profile fields are quantized into
+SCORE_BAND = 10
+
+NUMERIC_FIELDS = ('performance_grade', 'test_average')
+LIST_FIELDS = ('strong_subjects', 'interests', 'skills', 'categories')
+
+
+def _make_profile(test_average, category_averages):
+    categories = [cat for cat, avg_score in category_averages.items() if avg_score > INTEREST_THRESHOLD]
+    return {
+        'performance_grade': test_average,
+        'strong_subjects': ['Mathematics', 'Science'],  # Can be enhanced
+        'interests': categories[:3] if categories else ['Technology'],
+        'skills': ['Problem Solving', 'Critical Thinking'],  # Can be enhanced
+        'categories': categories[:2] if categories else ['Tech'],
+        'test_average': test_average
+    }
+
+
+def build_profiles(students=None):
+    """
+    {student_id: profile} for the given students (default: all active students),
+    from two grouped queries
+    """
+    if students is None:
+        students = Student.objects.filter(is_active=True)
+    student_ids = [getattr(s, 'id', s) for s in students]
+
+    test_averages = {
+        stats.student_id: stats.test_average or 0
+        for stats in StudentStats.objects.filter(student_id__in=student_ids)
+    }
+    category_averages = {}
+    rows = Answer.objects.filter(student_id__in=student_ids) \
+        .values_list('student_id', 'question__category').annotate(avg_score=Avg('score')).order_by('student_id', 'question__category')
+    for student_id, category, avg_score in rows:
+        category_averages.setdefault(student_id, {})[category] = avg_score
+
+    return {
+        student_id: _make_profile(test_averages.get(student_id, 0), category_averages.get(student_id, {}))
+        for student_id in student_ids
+    }
+
+
+def build_student_profile(student):
+    return build_profiles([student])[student.id]
+
+
+def band(value, width=SCORE_BAND):
+    """
+    '70-79' style band for a 0-100 score (the top band is '90-100'); None stays None
+    """
+    if value is None:
+        return None
+    low = min(max(int(float(value) // width) * width, 0), 100 - width)
+    high = 100 if low == 100 - width else low + width - 1
+    return f'{low}-{high}'
+
+
+def canonicalize(profile):
+    """
+    The profile as the LLM sees it: numeric fields replaced by bands, list fields
+    sorted and de-duplicated. Students with equivalent profiles share one prompt
+    (and therefore one cached response).
+    """
+    canonical = dict(profile)
+    for field in NUMERIC_FIELDS:
+        if field in canonical:
+            canonical[field] = band(canonical[field])
+    for field in LIST_FIELDS:
+        if field in canonical:
+            canonical[field] = sorted({str(item).strip() for item in canonical[field] if str(item).strip()})
+    return canonical
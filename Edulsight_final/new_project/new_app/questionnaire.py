@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from .models import Question, Option
+from .versions import SharedVersion
+
+GRAPH_KEY = 'questionnaire_graph:{version}'
+
+version = SharedVersion('questionnaire')
+
+# Per-process copy of the compiled graph, reused while the shared version number is unchanged
+_local = {'version': None, 'graph': None}
+
+
+class QuestionnaireGraph:
+    """
+    The active questions, their options and parent/required-answer edges as plain data.
+
+    questions maps id -> {'id', 'text', 'category', 'parent_id', 'required_answer', 'options'}
+    in the order questions are asked; options are {'value', 'text'} dicts.
+    """
+
+    def __init__(self, questions):
+        self.questions = {q['id']: q for q in questions}
+        self.order = [q['id'] for q in questions]
+
+    def __contains__(self, question_id):
+        return question_id in self.questions
+
+    def __len__(self):
+        return len(self.order)
+
+    def is_unlocked(self, question, answers):
+        """
+        A question is available once its parent (if any) has been answered
+        with at least the required score
+        """
+        parent_id = question['parent_id']
+        if parent_id is None:
+            return True
+        parent_score = answers.get(parent_id)
+        if parent_score is None:
+            return False
+        return question['required_answer'] is None or parent_score >= question['required_answer']
+
+    def next_question(self, answers):
+        """
+        The first unanswered, unlocked question, given {question_id: score}; None when finished
+        """
+        for question_id in self.order:
+            if question_id in answers:
+                continue
+            question = self.questions[question_id]
+            if self.is_unlocked(question, answers):
+                return question
+        return None
+
+
+def build_graph():
+    """
+    Compile the graph with two queries (questions, options)
+    """
+    questions = [
+        {
+            'id': q['id'],
+            'text': q['text'],
+            'category': q['category'],
+            'parent_id': q['parent_question_id'],
+            'required_answer': q['required_answer'],
+            'options': [],
+        }
+        for q in Question.objects.filter(is_active=True).order_by('id').values(
+            'id', 'text', 'category', 'parent_question_id', 'required_answer'
+        )
+    ]
+    by_id = {q['id']: q for q in questions}
+    options = Option.objects.filter(question__is_active=True).order_by('value', 'id') \
+        .values_list('question_id', 'value', 'text')
+    for question_id, value, text in options:
+        by_id[question_id]['options'].append({'value': value, 'text': text})
+    return QuestionnaireGraph(questions)
+
+
+def get_graph():
+    """
+    The current compiled questionnaire (no queries while the version is unchanged and
+    was checked recently)
+    """
+    current = version.get()
+    if _local['version'] == current and _local['graph'] is not None:
+        return _local['graph']
+
+    key = GRAPH_KEY.format(version=current)
+    graph = cache.get(key)
+    if graph is None:
+        graph = build_graph()
+        cache.set(key, graph, 24 * 3600)
+    _local['version'], _local['graph'] = current, graph
+    return graph
+
+
+def invalidate():
+    """
+    Call after adding, editing or removing questions or options; every process
+    picks up the new graph within DATA_VERSION_CHECK_SECONDS
+    """
+    version.bump()
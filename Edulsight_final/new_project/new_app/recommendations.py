@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from . import jobs
+from .models import CareerRecommendationHistory, Notification
+from .profiles import build_student_profile
+
+JOB_NAME = 'career_recommendations'
+
+
+def bridging_courses(student_profile, recommendations):
+    from .llm_integration import CourseRecommendationEngine
+    current_performance = {
+        'average_grade': student_profile['test_average'],
+        'categories': student_profile['categories']
+    }
+    return CourseRecommendationEngine().recommend_bridging_courses(
+        current_performance,
+        recommendations.get('careers', []),
+        target_skills=recommendations.get('skills', [])
+    )
+
+
+def history_entry(student, recommendations, courses, llm_used):
+    """
+    Unsaved CareerRecommendationHistory row for a generated result
+    """
+    return CareerRecommendationHistory(
+        student=student,
+        careers=recommendations.get('careers', []),
+        skills_recommended=recommendations.get('skills', []),
+        courses_suggested=[course['course_name'] for course in courses],
+        details=recommendations,
+        llm_used=llm_used
+    )
+
+
+def ready_notification(student, recommendations):
+    return Notification(
+        student=student,
+        title='New Career Recommendations Available',
+        message=f'We have generated personalized career recommendations based on your profile. Top recommendation: {recommendations.get("careers", ["Various options"])[0] if recommendations.get("careers") else "Check your dashboard"}',
+        notification_type='career',
+        priority='medium'
+    )
+
+
+def store(student, student_profile, recommendations, llm_used):
+    """
+    Save a generated result to history and notify the student
+    """
+    history = history_entry(student, recommendations, bridging_courses(student_profile, recommendations), llm_used)
+    history.save()
+    ready_notification(student, recommendations).save()
+    return history
+
+
+def generate_and_store(student):
+    """
+    Run the (possibly slow) LLM call for one student and save the result to history
+    """
+    from .llm_integration import CareerRecommendationLLM
+    student_profile = build_student_profile(student)
+    llm = CareerRecommendationLLM()
+    recommendations = llm.generate_career_recommendations(student_profile)
+    return store(student, student_profile, recommendations, llm.use_llm)
+
+
+def latest(student):
+    return CareerRecommendationHistory.objects.filter(student=student).order_by('-created_at', '-id').first()
+
+
+def as_recommendations(history):
+    """
+    The recommendation dict the templates expect, rebuilt from a history row
+    """
+    recommendations = dict(history.details or {})
+    recommendations.setdefault('careers', history.careers)
+    recommendations.setdefault('skills', history.skills_recommended)
+    recommendations.setdefault('courses', history.courses_suggested)
+    return recommendations
+
+
+def is_pending(student):
+    return jobs.is_pending(JOB_NAME, student.id)
+
+
+def is_stale(history):
+    """
+    True when there is no result yet or it is older than CAREER_RECOMMENDATION_MAX_AGE_SECONDS
+    """
+    max_age = getattr(settings, 'CAREER_RECOMMENDATION_MAX_AGE_SECONDS', 3600)
+    return history is None or history.created_at <= timezone.now() - timedelta(seconds=max_age)
+
+
+def reserve_generation(student):
+    """
+    Claim generation for a request that produces the result itself (streaming).
+    Returns a reservation for release_generation(), or None while another request
+    or a background job is already generating for the student.
+    """
+    return jobs.reserve(JOB_NAME, student.id, getattr(settings, 'JOB_QUEUE_STALE_SECONDS', 600))
+
+
+def release_generation(reservation):
+    jobs.release(reservation)
+
+
+def request_refresh(student, history=None):
+    """
+    Queue generation if the latest result is stale.
+    Returns True while a generation job is waiting or running for the student.
+    """
+    if is_stale(history):
+        jobs.enqueue(JOB_NAME, [student.id], delay=0)
+    return is_pending(student)
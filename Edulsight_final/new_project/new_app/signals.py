@@ -0,0 +1,52 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Attendance, WeeklyTest, Grade, Question, Option, Career
+from . import stats, questionnaire, career_matching
+
+
+# Rollups track inserts and deletes; edits to existing rows are picked up by
+# `manage.py rebuild_student_stats`.
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.record_attendance([instance])
+
+
+@receiver(post_save, sender=WeeklyTest)
+def weekly_test_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.record_tests([instance])
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.record_grades([instance])
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    stats.record_attendance([instance], sign=-1)
+
+
+@receiver(post_delete, sender=WeeklyTest)
+def weekly_test_deleted(sender, instance, **kwargs):
+    stats.record_tests([instance], sign=-1)
+
+
+@receiver(post_delete, sender=Grade)
+def grade_deleted(sender, instance, **kwargs):
+    stats.record_grades([instance], sign=-1)
+
+
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=Option)
+def questionnaire_changed(sender, **kwargs):
+    # Covers the Django admin and scripts; bulk .update() calls must invalidate explicitly
+    questionnaire.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Career)
+def careers_changed(sender, **kwargs):
+    career_matching.invalidate()
@@ -0,0 +1,206 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from .models import (
+    Attendance, WeeklyTest, Grade,
+    StudentStats, StudentSubjectStats, StudentTeacherStats
+)
+
+
+def _apply(model, key_fields, deltas, create=True):
+    """
+    Add each delta dict to the row identified by its key, creating missing rows
+    first unless `create` is False. Deletions never create rows: when a Student or
+    Teacher is deleted the cascade removes their rollups before the records, and
+    re-inserting them would point at a parent that is going away.
+    """
+    if not deltas:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        if create:
+            model.objects.bulk_create(
+                [model(**dict(zip(key_fields, key))) for key in deltas],
+                ignore_conflicts=True
+            )
+        for key, changes in deltas.items():
+            model.objects.filter(**dict(zip(key_fields, key))).update(
+                updated_at=now,
+                **{field: F(field) + value for field, value in changes.items() if value}
+            )
+
+
+def _add(bucket, **values):
+    for field, value in values.items():
+        bucket[field] = bucket.get(field, 0) + value
+
+
+def record_attendance(records, sign=1):
+    """
+    Fold new (sign=1) or deleted (sign=-1) Attendance rows into the rollups.
+    Saves go through new_app.signals; callers using bulk_create must call this themselves.
+    """
+    per_student = defaultdict(dict)
+    per_teacher = defaultdict(dict)
+    for record in records:
+        present = sign if record.status == 'Present' else 0
+        _add(per_student[(record.student_id,)], attendance_total=sign, attendance_present=present)
+        _add(per_teacher[(record.student_id, record.teacher_id)], attendance_total=sign, attendance_present=present)
+
+    _apply(StudentStats, ['student_id'], per_student, create=sign > 0)
+    _apply(StudentTeacherStats, ['student_id', 'teacher_id'], per_teacher, create=sign > 0)
+
+
+def record_tests(records, sign=1):
+    """
+    Fold new (sign=1) or deleted (sign=-1) WeeklyTest rows into the rollups
+    """
+    per_student = defaultdict(dict)
+    per_teacher = defaultdict(dict)
+    for record in records:
+        score = float(record.score) * sign
+        _add(per_student[(record.student_id,)], test_count=sign, test_score_sum=score)
+        if record.teacher_id:
+            _add(per_teacher[(record.student_id, record.teacher_id)], test_count=sign, test_score_sum=score)
+
+    _apply(StudentStats, ['student_id'], per_student, create=sign > 0)
+    _apply(StudentTeacherStats, ['student_id', 'teacher_id'], per_teacher, create=sign > 0)
+
+
+def record_grades(records, sign=1):
+    """
+    Fold new (sign=1) or deleted (sign=-1) Grade rows into the rollups
+    """
+    per_student = defaultdict(dict)
+    per_subject = defaultdict(dict)
+    per_teacher = defaultdict(dict)
+    for record in records:
+        percentage = float(record.percentage) * sign
+        _add(per_student[(record.student_id,)], grade_count=sign, grade_percentage_sum=percentage)
+        _add(per_subject[(record.student_id, record.subject)], grade_count=sign, grade_percentage_sum=percentage)
+        _add(per_teacher[(record.student_id, record.teacher_id)], grade_count=sign, grade_percentage_sum=percentage)
+
+    _apply(StudentStats, ['student_id'], per_student, create=sign > 0)
+    _apply(StudentSubjectStats, ['student_id', 'subject'], per_subject, create=sign > 0)
+    _apply(StudentTeacherStats, ['student_id', 'teacher_id'], per_teacher, create=sign > 0)
+
+
+def get_student_stats(student):
+    """
+    The rollup row for a student; an unsaved all-zero row if they have no records yet
+    """
+    student_id = getattr(student, 'id', student)
+    try:
+        return StudentStats.objects.get(student_id=student_id)
+    except StudentStats.DoesNotExist:
+        return StudentStats(student_id=student_id)
+
+
+def get_subject_averages(student):
+    """
+    {subject: average percentage} for a student, from StudentSubjectStats
+    """
+    student_id = getattr(student, 'id', student)
+    return {
+        row.subject: row.grade_average
+        for row in StudentSubjectStats.objects.filter(student_id=student_id, grade_count__gt=0)
+    }
+
+
+def compute_rollups():
+    """
+    Recompute every rollup from the raw tables with grouped aggregates.
+    Returns {model: {key: {field: value}}}, keyed like the incremental updates.
+    """
+    per_student = defaultdict(dict)
+    per_subject = defaultdict(dict)
+    per_teacher = defaultdict(dict)
+
+    attendance_totals = dict(
+        attendance_total=Count('id'),
+        attendance_present=Count('id', filter=Q(status='Present')),
+    )
+    for row in Attendance.objects.values('student_id').annotate(**attendance_totals).order_by():
+        _add(per_student[(row['student_id'],)], attendance_total=row['attendance_total'],
+             attendance_present=row['attendance_present'])
+    for row in Attendance.objects.values('student_id', 'teacher_id').annotate(**attendance_totals).order_by():
+        _add(per_teacher[(row['student_id'], row['teacher_id'])], attendance_total=row['attendance_total'],
+             attendance_present=row['attendance_present'])
+
+    test_totals = dict(test_count=Count('id'), test_score_sum=Sum('score'))
+    for row in WeeklyTest.objects.values('student_id').annotate(**test_totals).order_by():
+        _add(per_student[(row['student_id'],)], test_count=row['test_count'],
+             test_score_sum=float(row['test_score_sum']))
+    for row in WeeklyTest.objects.filter(teacher__isnull=False).values('student_id', 'teacher_id') \
+            .annotate(**test_totals).order_by():
+        _add(per_teacher[(row['student_id'], row['teacher_id'])], test_count=row['test_count'],
+             test_score_sum=float(row['test_score_sum']))
+
+    grade_totals = dict(grade_count=Count('id'), grade_percentage_sum=Sum('percentage'))
+    for row in Grade.objects.values('student_id').annotate(**grade_totals).order_by():
+        _add(per_student[(row['student_id'],)], grade_count=row['grade_count'],
+             grade_percentage_sum=row['grade_percentage_sum'])
+    for row in Grade.objects.values('student_id', 'subject').annotate(**grade_totals).order_by():
+        _add(per_subject[(row['student_id'], row['subject'])], grade_count=row['grade_count'],
+             grade_percentage_sum=row['grade_percentage_sum'])
+    for row in Grade.objects.values('student_id', 'teacher_id').annotate(**grade_totals).order_by():
+        _add(per_teacher[(row['student_id'], row['teacher_id'])], grade_count=row['grade_count'],
+             grade_percentage_sum=row['grade_percentage_sum'])
+
+    return {
+        StudentStats: per_student,
+        StudentSubjectStats: per_subject,
+        StudentTeacherStats: per_teacher,
+    }
+
+
+ROLLUP_KEYS = {
+    StudentStats: ['student_id'],
+    StudentSubjectStats: ['student_id', 'subject'],
+    StudentTeacherStats: ['student_id', 'teacher_id'],
+}
+
+
+def rebuild_rollups(batch_size=1000):
+    """
+    Replace every rollup row with values recomputed from the raw tables
+    """
+    rollups = compute_rollups()
+    counts = {}
+    with transaction.atomic():
+        for model, key_fields in ROLLUP_KEYS.items():
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                [model(**dict(zip(key_fields, key)), **values) for key, values in rollups[model].items()],
+                batch_size=batch_size
+            )
+            counts[model.__name__] = len(rollups[model])
+    return counts
+
+
+def verify_rollups(tolerance=1e-6):
+    """
+    Compare stored rollups with a full recompute. Returns a list of mismatch descriptions.
+    """
+    expected = compute_rollups()
+    mismatches = []
+    for model, key_fields in ROLLUP_KEYS.items():
+        value_fields = [
+            f.name for f in model._meta.get_fields()
+            if f.concrete and f.name.endswith(('_total', '_present', '_count', '_sum'))
+        ]
+        stored = {
+            tuple(row[k] for k in key_fields): row
+            for row in model.objects.values(*key_fields, *value_fields)
+        }
+        for key in set(stored) | set(expected[model]):
+            want = expected[model].get(key, {})
+            have = stored.get(key, {})
+            for field in value_fields:
+                if abs((have.get(field) or 0) - (want.get(field) or 0)) > tolerance:
+                    mismatches.append(
+                        f"{model.__name__} {dict(zip(key_fields, key))}: {field} is {have.get(field, 0)}, expected {want.get(field, 0)}"
+                    )
+    return mismatches
@@ -0,0 +1,207 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from . import stats
+from .career_matching import CATEGORIES
+from .models import (
+    Answer, Attendance, ExamSchedule, Grade, Notification, Question, Student, Teacher, WeeklyTest
+)
+
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Computer Science', 'Art']
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Ananya', 'Kabir', 'Meera', 'Rohan', 'Saanvi', 'Vihaan', 'Zara',
+               'Arjun', 'Kavya', 'Dev', 'Nisha', 'Aditya', 'Priya', 'Reyansh', 'Tara', 'Yash', 'Riya']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Singh', 'Das', 'Menon', 'Rao',
+              'Kumar', 'Joshi', 'Bose', 'Kapoor', 'Pillai']
+NOTIFICATIONS = [
+    ('performance', 'New Grade Posted', 'You have received a new grade.'),
+    ('attendance', 'Low Attendance Alert', 'Your attendance this week is below 75%.'),
+    ('test', 'Upcoming Test', 'You have a test scheduled this week.'),
+    ('improvement', 'Improvement Suggestion', 'A new study strategy is available for you.'),
+    ('career', 'Career Update', 'Your career recommendations have been refreshed.'),
+]
+
+# Columns written for each history table, in the order _student_rows builds its tuples
+HISTORY = [
+    (Attendance, ['student', 'teacher', 'date', 'status']),
+    (WeeklyTest, ['student', 'teacher', 'test_date', 'score']),
+    (Grade, ['student', 'teacher', 'subject', 'grade_type', 'score', 'max_score', 'percentage', 'date', 'comments']),
+    (Answer, ['student', 'question', 'score']),
+    (Notification, ['student', 'title', 'message', 'notification_type', 'created_at', 'is_read', 'priority']),
+    (ExamSchedule.students.through, ['examschedule', 'student']),
+]
+
+
+def school_days(days, today=None):
+    """
+    Weekdays in the last `days` calendar days, oldest first
+    """
+    today = today or date.today()
+    return [d for d in (today - timedelta(days=n) for n in range(days - 1, -1, -1)) if d.weekday() < 5]
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def domain(prefix):
+    return f'{prefix}.example.com'
+
+
+def flush(prefix):
+    """
+    Delete everything generate() created under `prefix`. The history tables are
+    cleared with plain DELETEs scoped to the prefix's students (no per-row
+    collection or post_delete signals), then the now history-free students,
+    teachers and accounts go through the ORM, and the rollups are rebuilt once.
+    """
+    emails = '@' + domain(prefix)
+    with transaction.atomic():
+        for model, _ in HISTORY:
+            rows = model.objects.filter(student__email__endswith=emails)
+            rows._raw_delete(rows.db)
+        Teacher.objects.filter(email__endswith=emails).delete()
+        Student.objects.filter(email__endswith=emails).delete()
+        User.objects.filter(username__endswith=emails).delete()
+    stats.rebuild_rollups()
+
+
+def _insert_rows(model, fields, rows):
+    """
+    INSERT already-adapted value tuples with one executemany. Used for the
+    append-only history tables, where building millions of model instances for
+    bulk_create (and compiling every value) costs far more than the insert itself.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    sql = (f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+           f'VALUES ({", ".join(["%s"] * len(fields))})')
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _student_rows(student_id, profile, teachers, days, questions, exams, rng, now, span):
+    """
+    Value tuples for one student's history, one list per HISTORY table.
+    `days` is [(date, adapted date), ...] and teachers are (id, subject) pairs.
+    """
+    ability, presence, affinity = profile
+    adapt = connection.ops.adapt_datetimefield_value
+    attendance, tests, grades, answers, notifications, exam_links = [], [], [], [], [], []
+
+    for teacher_id, subject in teachers:
+        for _, day in days:
+            attendance.append((student_id, teacher_id, day, 'Present' if rng.random() < presence else 'Absent'))
+        for _, day in days[4::5]:
+            tests.append((student_id, teacher_id, day, round(_clamp(rng.gauss(ability, 10), 0, 100))))
+        for _, day in days[2::7]:
+            grade_type = rng.choice(['quiz', 'quiz', 'assignment', 'assignment', 'project', 'midterm'])
+            max_score = 50.0 if grade_type == 'quiz' else 100.0
+            score = round(_clamp(rng.gauss(ability, 12), 0, 100) * max_score / 100, 1)
+            grades.append((student_id, teacher_id, subject, grade_type, score, max_score,
+                           score / max_score * 100, day, ''))
+        for exam_id in exams.get(teacher_id, []):
+            exam_links.append((exam_id, student_id))
+
+    for question_id, category in questions:
+        answers.append((student_id, question_id, round(_clamp(rng.gauss(3 + affinity.get(category, 0), 1), 1, 5))))
+
+    for _ in range(rng.randint(1, 6)):
+        notification_type, title, message = rng.choice(NOTIFICATIONS)
+        notifications.append((student_id, title, message, notification_type,
+                              adapt(now - timedelta(days=rng.uniform(0, span))), rng.random() < 0.7,
+                              rng.choice(['high', 'medium', 'medium', 'low'])))
+
+    return attendance, tests, grades, answers, notifications, exam_links
+
+
+def generate(students=1000, teachers=50, days=30, seed=0, prefix='synthetic', teachers_per_student=2,
+             chunk_size=2000, report=lambda done, total: None):
+    """
+    Deterministically create `students` students and `teachers` teachers with
+    `days` calendar days of history ending today: daily attendance and a weekly
+    test per assigned teacher, some grades, one Answer per active question, a few
+    notifications, and past/upcoming exams per teacher. The same arguments
+    (including `seed`) always produce the same data.
+
+    Accounts, students, teachers and exams go in with bulk_create; the history
+    rows are written as plain tuples, `chunk_size` students per transaction, and
+    the stats rollups are rebuilt once at the end. Accounts use
+    `<name>@<prefix>.example.com`, so flush(prefix) removes them.
+    Returns the number of rows created per table.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = timezone.localdate()
+    adapt_date = connection.ops.adapt_datefield_value
+    school = [(day, adapt_date(day)) for day in school_days(days, today)]
+    questions = list(Question.objects.filter(is_active=True).order_by('id').values_list('id', 'category'))
+    password = make_password(None)
+    counts = {}
+
+    def add(model, rows, **lookup):
+        """
+        bulk_create `rows` and return them with primary keys (re-read by `lookup`
+        on backends that can't return ids from a bulk insert)
+        """
+        created = model.objects.bulk_create(rows, batch_size=5000)
+        counts[model.__name__] = counts.get(model.__name__, 0) + len(rows)
+        if created and created[0].pk is None:
+            created = list(model.objects.filter(**lookup).order_by('id'))
+        return created
+
+    with transaction.atomic():
+        staff = add(Teacher, [
+            Teacher(first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    email=f'teacher{i}@{domain(prefix)}', subject=SUBJECTS[i % len(SUBJECTS)])
+            for i in range(teachers)
+        ], email__endswith='@' + domain(prefix))
+
+        exams = add(ExamSchedule, [
+            ExamSchedule(subject=teacher.subject, exam_type=rng.choice(['quiz', 'midterm', 'final', 'project']),
+                         exam_date=timezone.make_aware(datetime.combine(today + timedelta(days=offset), time(10))),
+                         teacher=teacher, reminder_sent=offset < 0)
+            for teacher in staff for offset in (-14, 7, 21)
+        ], teacher__in=staff)
+        exams_by_teacher = {}
+        for exam in exams:
+            exams_by_teacher.setdefault(exam.teacher_id, []).append(exam.id)
+        staff = [(teacher.id, teacher.subject) for teacher in staff]
+
+    for start in range(0, students, chunk_size):
+        numbers = range(start, min(start + chunk_size, students))
+        with transaction.atomic():
+            emails = [f'student{i}@{domain(prefix)}' for i in numbers]
+            users = add(User, [User(username=email, email=email, password=password) for email in emails],
+                        username__in=emails)
+            roster = add(Student, [
+                Student(user_id=user.id, email=user.username,
+                        first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                        date_of_birth=date(2004, 1, 1) + timedelta(days=rng.randrange(4 * 365)))
+                for user in users
+            ], email__in=emails)
+
+            rows = [[] for _ in HISTORY]
+            for student in roster:
+                profile = (
+                    _clamp(rng.gauss(70, 12), 25, 100),
+                    _clamp(rng.gauss(0.88, 0.08), 0.4, 1.0),
+                    {category: rng.choice([-1, 0, 0, 1, 1.5]) for category in CATEGORIES},
+                )
+                assigned = rng.sample(staff, min(teachers_per_student, len(staff)))
+                for bucket, new in zip(rows, _student_rows(student.id, profile, assigned, school, questions,
+                                                           exams_by_teacher, rng, now, days)):
+                    bucket.extend(new)
+
+            for (model, fields), bucket in zip(HISTORY, rows):
+                _insert_rows(model, fields, bucket)
+                counts[model.__name__] = counts.get(model.__name__, 0) + len(bucket)
+        report(numbers[-1] + 1, students)
+
+    stats.rebuild_rollups()
+    return counts
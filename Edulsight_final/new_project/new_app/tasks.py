@@ -0,0 +1,24 @@
+from . import jobs, recommendations
+from .models import Student
+
+
+@jobs.register('course_suggestions')
+def course_suggestions_job(key, payload):
+    from .views import auto_generate_course_suggestions
+    student = Student.objects.filter(id=key).first()
+    if student is not None:
+        auto_generate_course_suggestions(student)
+
+
+def enqueue_course_suggestions(students):
+    """
+    Queue one course-suggestion evaluation per student (coalesced with any already pending)
+    """
+    jobs.enqueue('course_suggestions', [getattr(s, 'id', s) for s in students])
+
+
+@jobs.register(recommendations.JOB_NAME)
+def career_recommendations_job(key, payload):
+    student = Student.objects.filter(id=key).first()
+    if student is not None:
+        recommendations.generate_and_store(student)
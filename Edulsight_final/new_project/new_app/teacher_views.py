@@ -9,6 +9,10 @@ from .models import (
     Feedback, PerformancePrediction, Notification
 )
 from .ml_models import PerformancePredictionModel
+from .features import extract_features
+from .stats import get_subject_averages
+from .tasks import enqueue_course_suggestions
+from . import imports
 import json
 
 
@@ -52,9 +56,8 @@ def teacher_grade_management(request):
             priority='medium'
         )
 
-        # Import and call the auto-suggestion function
-        from .views import auto_generate_course_suggestions
-        auto_generate_course_suggestions(student)
+        # Queue course suggestions (evaluated off the request path)
+        enqueue_course_suggestions([student])
 
         messages.success(request, 'Grade added successfully!')
         return redirect('teacher_grade_management')
@@ -76,6 +79,42 @@ def teacher_grade_management(request):
     return render(request, 'teacher_grade_management.html', context)
 
 
+@login_required
+def teacher_bulk_import(request):
+    """
+    Upload a CSV or XLSX file of grades or weekly test scores
+    """
+    if not hasattr(request.user, 'teacher'):
+        messages.error(request, 'Only teachers can access this page.')
+        return redirect('home')
+
+    result = None
+    kind = request.POST.get('kind', 'grades')
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if kind not in imports.COLUMNS:
+            messages.error(request, 'Choose grades or test scores.')
+        elif upload is None:
+            messages.error(request, 'Choose a file to import.')
+        else:
+            try:
+                result = imports.import_records(kind, imports.read_rows(upload, upload.name), request.user.teacher)
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(
+                    request,
+                    f"Imported {result['imported']} rows for {result['students']} students "
+                    f"({result['skipped']} skipped)."
+                )
+
+    return render(request, 'teacher_bulk_import.html', {
+        'kind': kind,
+        'columns': imports.COLUMNS,
+        'result': result,
+    })
+
+
 @login_required
 def student_performance_analysis(request, student_id):
     """
@@ -246,15 +285,16 @@ def student_grades_view(request):
     present_days = attendance.filter(status='Present').count()
     attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
 
-    # Group grades by subject
-    subjects = grades.values_list('subject', flat=True).distinct()
+    # Group grades by subject (averages come from the per-subject rollup)
+    subject_averages = get_subject_averages(student)
     grades_by_subject = {}
-    for subject in subjects:
-        subject_grades = grades.filter(subject=subject)
-        grades_by_subject[subject] = {
-            'grades': subject_grades,
-            'average': subject_grades.aggregate(Avg('percentage'))['percentage__avg']
-        }
+    for grade in grades:
+        if grade.subject not in grades_by_subject:
+            grades_by_subject[grade.subject] = {
+                'grades': [],
+                'average': subject_averages.get(grade.subject)
+            }
+        grades_by_subject[grade.subject]['grades'].append(grade)
 
     # Get feedback from teachers
     feedback = Feedback.objects.filter(student=student, teacher__isnull=False).order_by('-created_at')
@@ -283,25 +323,11 @@ def performance_prediction_api(request, student_id):
     # Check permission
     if hasattr(request.user, 'teacher') or (hasattr(request.user, 'student') and request.user.student == student):
         # Get data
-        grades = Grade.objects.filter(student=student)
-        attendance = Attendance.objects.filter(student=student)
-        tests = WeeklyTest.objects.filter(student=student)
-
-        # Calculate metrics
-        attendance_rate = attendance.filter(status='Present').count() / attendance.count() * 100 if attendance.count() > 0 else 0
-        grade_avg = grades.aggregate(Avg('percentage'))['percentage__avg'] or 0
-        test_avg = tests.aggregate(Avg('score'))['score__avg'] or 0
-
-        # Prepare ML data
-        student_data = {
-            'attendance_rate': attendance_rate,
-            'test_average': test_avg,
-            'assignments_completed': 85,
-            'participation_score': 75,
-            'previous_grade': grade_avg,
-            'study_hours': 5,
-            'quiz_scores': 80
-        }
+        features = extract_features([student])
+        student_data = features.row(student.id)
+        attendance_rate = student_data['attendance_rate']
+        grade_avg = features.metric('grade_average', student.id)
+        test_avg = student_data['test_average']
 
         # Get prediction
         ml_model = PerformancePredictionModel()
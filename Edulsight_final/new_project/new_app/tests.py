@@ -1,8 +1,29 @@
-from django.test import TestCase, Client
+import io
+import json
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth.models import User
-from new_app.models import Student, Question, Option, Answer, Career, CareerRecommendation
+from new_app.models import Student, Question, Option, Answer, Career, Teacher, Attendance, WeeklyTest, Grade
+from new_app.features import extract_student_features
+from new_app import stats, jobs
+from new_app.models import BackgroundJob, Notification, ExamSchedule, StudentStats, StudentTeacherStats
+from new_app.notification_views import send_automated_notifications
+from datetime import date, timedelta
+from django.utils import timezone
 from django.urls import reverse
 
+
+def add_attendance(student, teacher, status, days_ago=0):
+    """
+    Attendance is unique per student, teacher and day, so history goes on earlier dates
+    """
+    record = Attendance.objects.create(student=student, teacher=teacher, status=status)
+    if days_ago:
+        Attendance.objects.filter(id=record.id).update(date=date.today() - timedelta(days=days_ago))
+    return record
+
+
 class CareerResultsTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -43,4 +64,1237 @@ class CareerResultsTests(TestCase):
         response = self.client.get(reverse('career_results'))
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Software Engineer')
-        self.assertTrue(CareerRecommendation.objects.filter(student=self.student).exists())
\ No newline at end of file
+        # Results are worked out from the stored answers; nothing else is saved
+        self.assertTrue(Answer.objects.filter(student=self.student, question=self.question).exists())
+
+
+class TeacherDashboardTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username='teacher@example.com', password='test123')
+        self.teacher = Teacher.objects.create(
+            user=user,
+            first_name='Test',
+            last_name='Teacher',
+            email='teacher@example.com'
+        )
+        self.other_teacher = Teacher.objects.create(first_name='Other', last_name='Teacher', email='other@example.com')
+        self.client.login(username='teacher@example.com', password='test123')
+
+    def add_students(self, count):
+        for _ in range(count):
+            n = Student.objects.count()
+            user = User.objects.create_user(username=f'student{n}@example.com')
+            student = Student.objects.create(
+                user=user,
+                first_name='Student',
+                last_name=f'Number{n}',
+                email=f'student{n}@example.com',
+                date_of_birth='2000-01-01'
+            )
+            WeeklyTest.objects.create(student=student, teacher=self.teacher, score=60 + n)
+            WeeklyTest.objects.create(student=student, teacher=self.other_teacher, score=10)
+            add_attendance(student, self.teacher, 'Present', days_ago=1)
+            Attendance.objects.create(student=student, teacher=self.teacher, status='Absent')
+            Attendance.objects.create(student=student, teacher=self.other_teacher, status='Absent')
+
+    def dashboard_query_count(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('teacher_dashboard'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_constant_as_students_grow(self):
+        self.add_students(3)
+        few, _ = self.dashboard_query_count()
+        self.add_students(30)
+        many, response = self.dashboard_query_count()
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['students_data']), 33)
+
+    def test_stats_only_count_this_teacher(self):
+        self.add_students(2)
+        _, response = self.dashboard_query_count(sort='-score')
+        rows = response.context['students_data']
+        self.assertEqual([row['avg_test_score'] for row in rows], [61, 60])
+        self.assertEqual([row['attendance_rate'] for row in rows], [50.0, 50.0])
+
+    def test_pagination(self):
+        self.add_students(55)
+        _, response = self.dashboard_query_count(sort='name', page=2)
+        self.assertEqual(len(response.context['students_data']), 5)
+
+
+class StudentStatsTests(TestCase):
+    def setUp(self):
+        self.teacher = Teacher.objects.create(first_name='Test', last_name='Teacher', email='teacher@example.com')
+        self.student = Student.objects.create(
+            user=User.objects.create_user(username='student@example.com'),
+            first_name='Test',
+            last_name='Student',
+            email='student@example.com',
+            date_of_birth='2000-01-01'
+        )
+
+    def test_rollups_follow_inserts_and_deletes(self):
+        add_attendance(self.student, self.teacher, 'Present', days_ago=1)
+        absent = Attendance.objects.create(student=self.student, teacher=self.teacher, status='Absent')
+        WeeklyTest.objects.create(student=self.student, teacher=self.teacher, score='70')
+        WeeklyTest.objects.create(student=self.student, teacher=None, score=90)
+        Grade.objects.create(student=self.student, teacher=self.teacher, subject='Math',
+                             grade_type='quiz', score=40, max_score=50)
+        Grade.objects.create(student=self.student, teacher=self.teacher, subject='Art',
+                             grade_type='project', score=60)
+
+        row = stats.get_student_stats(self.student)
+        self.assertEqual(row.attendance_rate, 50)
+        self.assertEqual(row.test_average, 80)
+        self.assertEqual(row.grade_average, 70)
+        self.assertEqual(stats.get_subject_averages(self.student), {'Math': 80, 'Art': 60})
+        self.assertEqual(stats.verify_rollups(), [])
+
+        absent.delete()
+        self.assertEqual(stats.get_student_stats(self.student).attendance_rate, 100)
+        self.assertEqual(stats.verify_rollups(), [])
+
+    def test_deleting_people_with_history(self):
+        add_attendance(self.student, self.teacher, 'Present', days_ago=1)
+        WeeklyTest.objects.create(student=self.student, teacher=self.teacher, score=70)
+        Grade.objects.create(student=self.student, teacher=self.teacher, subject='Math', grade_type='quiz', score=40)
+        other = Teacher.objects.create(first_name='Other', last_name='Teacher', email='other@example.com')
+        Attendance.objects.create(student=self.student, teacher=other, status='Absent')
+
+        other.delete()
+        self.assertEqual(stats.get_student_stats(self.student).attendance_rate, 100)
+        self.assertEqual(stats.verify_rollups(), [])
+
+        self.student.delete()
+        self.assertFalse(StudentStats.objects.exists())
+        self.assertFalse(StudentTeacherStats.objects.exists())
+        self.assertEqual(stats.verify_rollups(), [])
+
+    def test_rebuild_repairs_drift(self):
+        WeeklyTest.objects.create(student=self.student, teacher=self.teacher, score=70)
+        WeeklyTest.objects.filter(student=self.student).update(score=50)
+        self.assertNotEqual(stats.verify_rollups(), [])
+        stats.rebuild_rollups()
+        self.assertEqual(stats.verify_rollups(), [])
+        self.assertEqual(stats.get_student_stats(self.student).test_average, 50)
+
+
+@override_settings(JOB_QUEUE_THREAD_WORKER=False, JOB_QUEUE_EAGER=False)
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        jobs.register('test_job')(lambda key, payload: self.calls.append(key))
+
+    def test_triggers_coalesce_per_key(self):
+        for _ in range(5):
+            jobs.enqueue('test_job', [1, 2], delay=0)
+        self.assertEqual(BackgroundJob.objects.count(), 2)
+        self.assertEqual(jobs.run_due_jobs(), (2, 0))
+        self.assertEqual(sorted(self.calls), ['1', '2'])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_jobs_wait_for_window(self):
+        jobs.enqueue('test_job', [1], delay=60)
+        self.assertEqual(jobs.run_due_jobs(), (0, 0))
+        self.assertTrue(jobs.is_pending('test_job', 1))
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        def broken(key, payload):
+            raise ValueError('boom')
+        jobs.register('broken_job')(broken)
+        jobs.enqueue('broken_job', [1], delay=0)
+        with override_settings(JOB_QUEUE_MAX_ATTEMPTS=1):
+            self.assertEqual(jobs.run_due_jobs(), (0, 1))
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('boom', job.last_error)
+
+
+class AutomatedNotificationTests(TestCase):
+    def setUp(self):
+        self.teacher = Teacher.objects.create(first_name='Test', last_name='Teacher', email='teacher@example.com')
+
+    def add_student(self, n, present, absent, recent_grades=(), older_grades=()):
+        student = Student.objects.create(
+            user=User.objects.create_user(username=f'student{n}@example.com'),
+            first_name='Student',
+            last_name=f'Number{n}',
+            email=f'student{n}@example.com',
+            date_of_birth='2000-01-01'
+        )
+        statuses = ['Present'] * present + ['Absent'] * absent
+        for days_ago, status in enumerate(statuses, start=1):
+            add_attendance(student, self.teacher, status, days_ago)
+        for score in recent_grades:
+            Grade.objects.create(student=student, teacher=self.teacher, subject='Math', grade_type='quiz', score=score)
+        for score in older_grades:
+            grade = Grade.objects.create(student=student, teacher=self.teacher, subject='Math',
+                                         grade_type='quiz', score=score)
+            Grade.objects.filter(id=grade.id).update(date=date.today() - timedelta(days=40))
+        return student
+
+    def test_alerts_are_created_once(self):
+        low = self.add_student(1, present=1, absent=3)
+        self.add_student(2, present=3, absent=1)
+        declining = self.add_student(3, present=4, absent=0, recent_grades=[50, 50, 50], older_grades=[90, 90, 90])
+        exam = ExamSchedule.objects.create(subject='Math', exam_type='quiz', teacher=self.teacher,
+                                           exam_date=timezone.now() + timedelta(days=1))
+        exam.students.add(low, declining)
+
+        send_automated_notifications()
+        self.assertEqual(
+            sorted(Notification.objects.values_list('student_id', 'notification_type')),
+            sorted([(low.id, 'attendance'), (declining.id, 'performance'),
+                    (low.id, 'test'), (declining.id, 'test')])
+        )
+        self.assertEqual(send_automated_notifications.last_run['changed_students']['rows'], 3)
+
+        send_automated_notifications()
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertEqual(send_automated_notifications.last_run['changed_students']['rows'], 0)
+
+    def test_only_students_with_new_activity_are_evaluated(self):
+        first = self.add_student(1, present=1, absent=3)
+        self.add_student(2, present=1, absent=3)
+        send_automated_notifications()
+        self.assertEqual(Notification.objects.count(), 2)
+
+        Notification.objects.all().delete()
+        Attendance.objects.create(student=first, teacher=self.teacher, status='Absent')
+        send_automated_notifications()
+        self.assertEqual(send_automated_notifications.last_run['changed_students']['rows'], 1)
+        self.assertEqual(list(Notification.objects.values_list('student_id', flat=True)), [first.id])
+
+    def test_rows_committed_under_the_mark_are_evaluated(self):
+        from new_app.models import AlertCheckpoint
+        student = self.add_student(1, present=4, absent=0)
+        late = Attendance.objects.create(student=student, teacher=self.teacher, status='Absent')
+        late_id = late.id
+        # Still uncommitted when the scan runs, while a later insert is already visible
+        late.delete()
+        add_attendance(student, self.teacher, 'Absent', days_ago=5)
+        send_automated_notifications()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual([gap[:2] for gap in AlertCheckpoint.objects.get(source='attendance').gaps],
+                         [[late_id, late_id]])
+
+        Attendance.objects.create(id=late_id, student=student, teacher=self.teacher, status='Absent')
+        send_automated_notifications()
+        self.assertEqual(send_automated_notifications.last_run['changed_students']['rows'], 1)
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['Low Attendance Alert'])
+        self.assertEqual(AlertCheckpoint.objects.get(source='attendance').gaps, [])
+
+    def test_row_committed_during_a_scan_is_not_skipped(self):
+        from unittest import mock
+        from new_app import alerts
+        student = self.add_student(1, present=4, absent=0)
+        late = Attendance.objects.create(student=student, teacher=self.teacher, status='Absent')
+        late_id = late.id
+        late.delete()
+        add_attendance(student, self.teacher, 'Absent', days_ago=5)
+        send_automated_notifications()
+
+        remaining_gaps = alerts._remaining_gaps
+
+        def commit_then_check(gaps, filled):
+            # The late row commits while the scan is between its queries
+            Attendance.objects.create(id=late_id, student=student, teacher=self.teacher, status='Absent')
+            return remaining_gaps(gaps, filled)
+
+        with mock.patch.object(alerts, '_remaining_gaps', side_effect=commit_then_check):
+            send_automated_notifications()
+        self.assertEqual(send_automated_notifications.last_run['changed_students']['rows'], 1)
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['Low Attendance Alert'])
+
+    @override_settings(ALERT_LATE_COMMIT_SECONDS=0)
+    def test_old_gaps_are_forgotten(self):
+        from new_app.models import AlertCheckpoint
+        student = self.add_student(1, present=1, absent=0)
+        Attendance.objects.create(student=student, teacher=self.teacher, status='Present').delete()
+        add_attendance(student, self.teacher, 'Present', days_ago=5)
+        send_automated_notifications()
+        self.assertEqual(len(AlertCheckpoint.objects.get(source='attendance').gaps), 1)
+        send_automated_notifications()
+        self.assertEqual(AlertCheckpoint.objects.get(source='attendance').gaps, [])
+
+    def test_query_count_independent_of_students(self):
+        send_automated_notifications()
+        for n in range(3):
+            self.add_student(n, present=1, absent=3, recent_grades=[50, 50, 50], older_grades=[90, 90, 90])
+        with CaptureQueriesContext(connection) as few:
+            send_automated_notifications()
+        for n in range(3, 20):
+            self.add_student(n, present=1, absent=3, recent_grades=[50, 50, 50], older_grades=[90, 90, 90])
+        with CaptureQueriesContext(connection) as many:
+            send_automated_notifications()
+        self.assertEqual(len(few), len(many))
+
+
+class PerformanceModelTests(TestCase):
+    def setUp(self):
+        import tempfile
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(BASE_DIR=self.directory, MODEL_REGISTRY_CHECK_INTERVAL=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def training_data(self, seed, rows=40):
+        import numpy as np
+        import pandas as pd
+        from new_app.ml_models import FEATURE_COLUMNS
+        rng = np.random.default_rng(seed)
+        data = pd.DataFrame(rng.uniform(0, 100, (rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        data['actual_grade'] = data['test_average'] * 0.6 + data['attendance_rate'] * 0.4
+        return data
+
+    def test_registry_reuses_model_until_retrained(self):
+        import os
+        from new_app.ml_models import PerformancePredictionModel
+        registry = PerformancePredictionModel().registry
+        self.assertEqual(registry.get(), (None, None))
+        self.assertEqual(registry.get(), (None, None))
+        self.assertEqual((registry.hits, registry.misses), (1, 1))
+
+        PerformancePredictionModel().train_model(self.training_data(1))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'ml_models', 'scaler.pkl')))
+        model, scaler = registry.get()
+        self.assertIsNotNone(model)
+        # Unchanged stamp: the same unpickled objects, no reload
+        self.assertIs(registry.get()[0], model)
+        self.assertIs(registry.get()[1], scaler)
+        self.assertEqual((registry.hits, registry.misses, registry.reloads), (3, 2, 0))
+
+        PerformancePredictionModel().train_model(self.training_data(2, rows=60))
+        retrained, retrained_scaler = registry.get()
+        self.assertIsNot(retrained, model)
+        self.assertIsNot(retrained_scaler, scaler)
+        self.assertEqual((registry.hits, registry.misses, registry.reloads), (3, 3, 1))
+        self.assertEqual(registry.stats()['hit_rate'], 0.5)
+
+    def test_batch_matches_single_predictions(self):
+        from new_app.ml_models import PerformancePredictionModel
+        students = [
+            {},
+            {'attendance_rate': 40.0},
+            {'attendance_rate': 95.0, 'test_average': 88.0, 'participation_score': 60.0},
+            {'attendance_rate': 100.0, 'test_average': 100.0, 'participation_score': 100.0,
+             'assignments_completed': 12, 'previous_grade': 70.0},
+            {'test_average': 52.5, 'previous_grade': 71.0, 'quiz_scores': 48.0, 'study_hours': 3},
+        ]
+
+        def compare(model):
+            batch = model.predict_batch(students)
+            for i, student in enumerate(students):
+                single = model.predict_performance(student)
+                self.assertEqual(single['predicted_grade'], batch['predicted_grade'][i], student)
+                self.assertEqual(single['confidence'], batch['confidence'][i], student)
+                self.assertEqual(single['trend'], batch['trend'][i], student)
+
+        compare(PerformancePredictionModel())  # untrained: the default formula
+        trained = PerformancePredictionModel()
+        trained.train_model(self.training_data(1))
+        compare(trained)
+        compare(PerformancePredictionModel())  # loaded through the registry
+
+    def test_loads_legacy_model_and_scaler_files(self):
+        import os
+        import joblib
+        from new_app.ml_models import PerformancePredictionModel
+        trained = PerformancePredictionModel()
+        trained.train_model(self.training_data(1))
+        os.remove(trained.model_path)
+        joblib.dump(trained.model, trained.model_path)
+        joblib.dump(trained.scaler, trained.scaler_path)
+
+        student = {'attendance_rate': 90, 'test_average': 80, 'previous_grade': 70}
+        self.assertEqual(PerformancePredictionModel().predict_performance(student),
+                         trained.predict_performance(student))
+
+
+class ScoreStudentsTests(TestCase):
+    def test_scores_active_students(self):
+        from django.core.management import call_command
+        from new_app.models import ImprovementStrategy, PerformancePrediction
+        teacher = Teacher.objects.create(user=User.objects.create_user(username='t@example.com'),
+                                         first_name='T', last_name='Teacher', email='t@example.com')
+        students = [
+            Student.objects.create(user=User.objects.create_user(username=f's{n}@example.com'), first_name='S',
+                                   last_name=str(n), email=f's{n}@example.com', date_of_birth='2000-01-01',
+                                   is_active=n < 3)
+            for n in range(4)
+        ]
+        add_attendance(students[0], teacher, 'Absent')
+        WeeklyTest.objects.create(student=students[0], teacher=teacher, score=40)
+
+        out = io.StringIO()
+        call_command('score_students', workers=1, chunk_size=2, stdout=out)
+        self.assertIn('Scored 3 students', out.getvalue())
+        self.assertEqual(sorted(PerformancePrediction.objects.values_list('student_id', flat=True)),
+                         [s.id for s in students[:3]])
+        self.assertEqual(Notification.objects.filter(notification_type='performance').count(), 3)
+        self.assertTrue(ImprovementStrategy.objects.filter(student=students[0], category='attendance').exists())
+
+
+def per_student_features(student):
+    """
+    The per-student queries ai_views.predict_performance ran before extract_features
+    """
+    from django.db.models import Avg
+    attendance_data = Attendance.objects.filter(student=student)
+    total_days = attendance_data.count()
+    present_days = attendance_data.filter(status='Present').count()
+    attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
+    test_average = WeeklyTest.objects.filter(student=student).aggregate(Avg('score'))['score__avg'] or 0
+    grades = Grade.objects.filter(student=student)
+    assignments_completed = grades.filter(grade_type='assignment').aggregate(
+        Avg('percentage'))['percentage__avg'] or test_average
+    quiz_scores = grades.filter(grade_type='quiz').aggregate(Avg('percentage'))['percentage__avg'] or test_average
+    previous_grade = grades.aggregate(Avg('percentage'))['percentage__avg'] or test_average
+    return {
+        'attendance_rate': attendance_rate,
+        'test_average': test_average,
+        'assignments_completed': assignments_completed,
+        'participation_score': attendance_rate * 0.5 + quiz_scores * 0.5,
+        'previous_grade': previous_grade,
+        'study_hours': min(10, max(2, test_average / 10)),
+        'quiz_scores': quiz_scores,
+    }
+
+
+class FeatureExtractionTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='teacher@example.com')
+        self.teacher = Teacher.objects.create(user=user, first_name='Test', last_name='Teacher',
+                                              email='teacher@example.com')
+        self.students = [
+            Student.objects.create(user=User.objects.create_user(username=f'f{n}@example.com'), first_name='F',
+                                   last_name=str(n), email=f'f{n}@example.com', date_of_birth='2000-01-01')
+            for n in range(5)
+        ]
+        full, absent_only, tests_only, zero_quiz, _ = self.students  # the last has no history at all
+        for days_ago, status in enumerate(['Present', 'Present', 'Absent', 'Present'], start=1):
+            add_attendance(full, self.teacher, status, days_ago)
+        for score in (72, 85, 91):
+            WeeklyTest.objects.create(student=full, teacher=self.teacher, score=score)
+        for grade_type, score, max_score in [('assignment', 18, 20), ('assignment', 70, 100),
+                                             ('quiz', 30, 50), ('midterm', 64, 80)]:
+            Grade.objects.create(student=full, teacher=self.teacher, subject='Math', grade_type=grade_type,
+                                 score=score, max_score=max_score)
+        add_attendance(absent_only, self.teacher, 'Absent')
+        WeeklyTest.objects.create(student=tests_only, teacher=self.teacher, score=15)
+        WeeklyTest.objects.create(student=zero_quiz, teacher=self.teacher, score=66)
+        Grade.objects.create(student=zero_quiz, teacher=self.teacher, subject='Art', grade_type='quiz',
+                             score=0, max_score=50)
+
+    def test_vectorised_features_match_per_student_queries(self):
+        from new_app.features import extract_features
+        from new_app.ml_models import FEATURE_COLUMNS
+        table = extract_features(Student.objects.all())
+        self.assertEqual(sorted(table.student_ids.tolist()), sorted(s.id for s in self.students))
+        for student in self.students:
+            expected = per_student_features(student)
+            for name, row in (('table', table.row(student.id)), ('single', extract_student_features(student))):
+                for column in FEATURE_COLUMNS:
+                    self.assertAlmostEqual(row[column], expected[column], places=9,
+                                           msg=f'{name} {column} for student {student.last_name}')
+
+
+class QuestionnaireGraphTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username='student@example.com', password='test123')
+        Student.objects.create(user=user, first_name='Test', last_name='Student',
+                               email='student@example.com', date_of_birth='2000-01-01')
+        self.root = Question.objects.create(text='Do you enjoy coding?', category='Tech')
+        self.child = Question.objects.create(text='Would you build a compiler?', category='Tech',
+                                             parent_question=self.root, required_answer=4)
+        self.other = Question.objects.create(text='Do you enjoy drawing?', category='Creative')
+        for question in (self.root, self.child, self.other):
+            for value in range(1, 6):
+                Option.objects.create(question=question, text=str(value), value=value)
+        self.client.login(username='student@example.com', password='test123')
+
+    def answer(self, question, score):
+        return self.client.post(reverse('career_questionnaire'), {'question_id': question.id, 'score': score})
+
+    def test_dependent_question_follows_parent_answer(self):
+        self.answer(self.root, 5)
+        response = self.client.get(reverse('career_questionnaire'))
+        self.assertEqual(response.context['question']['id'], self.child.id)
+        self.assertEqual(len(response.context['options']), 5)
+
+    def test_dependent_question_skipped_below_required_answer(self):
+        self.answer(self.root, 2)
+        response = self.client.get(reverse('career_questionnaire'))
+        self.assertEqual(response.context['question']['id'], self.other.id)
+        self.assertRedirects(self.answer(self.other, 3), reverse('career_results'), fetch_redirect_response=False)
+
+    def test_one_answer_per_question(self):
+        from django.db import IntegrityError, transaction
+        self.answer(self.root, 5)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Answer.objects.create(student=Student.objects.get(), question=self.root, score=1)
+        self.assertEqual(list(Answer.objects.values_list('score', flat=True)), [5])
+
+    def test_graph_rebuilt_after_question_edit(self):
+        self.client.get(reverse('career_questionnaire'))
+        Question.objects.create(text='Do you like puzzles?', category='Analytical')
+        Question.objects.filter(id__in=[self.root.id, self.child.id, self.other.id]).update(is_active=False)
+        from new_app import questionnaire
+        questionnaire.invalidate()
+        response = self.client.get(reverse('career_questionnaire'))
+        self.assertEqual(response.context['question']['text'], 'Do you like puzzles?')
+
+
+    def test_graph_follows_changes_made_by_other_processes(self):
+        from new_app import questionnaire
+        from new_app.models import DataVersion
+        self.client.get(reverse('career_questionnaire'))
+        # Another process edits the questions (no signals here) and calls invalidate(),
+        # which only changes the shared version row
+        Question.objects.bulk_create([Question(text='Do you like puzzles?', category='Analytical')])
+        Question.objects.filter(id__in=[self.root.id, self.child.id, self.other.id]).update(is_active=False)
+        DataVersion.objects.filter(name='questionnaire').update(version=0)
+        with override_settings(DATA_VERSION_CHECK_SECONDS=3600):
+            self.assertIn(self.root.id, questionnaire.get_graph())
+        with override_settings(DATA_VERSION_CHECK_SECONDS=0):
+            response = self.client.get(reverse('career_questionnaire'))
+        self.assertEqual(response.context['question']['text'], 'Do you like puzzles?')
+
+class CareerMatchingTests(TestCase):
+    def setUp(self):
+        from new_app import career_matching
+        career_matching.invalidate()
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f's{i}@example.com'), first_name=f'S{i}',
+                                   last_name='Student', email=f's{i}@example.com', date_of_birth='2000-01-01')
+            for i in range(3)
+        ]
+        self.careers = {
+            category: [Career.objects.create(name=f'{category} {i}', description='...', category=category)
+                       for i in range(4)]
+            for category in ['Tech', 'Creative', 'Analytical', 'Collaborative']
+        }
+        questions = {category: Question.objects.create(text=category, category=category) for category in self.careers}
+        for student, scores in zip(self.students, [(5, 1, 3, 2), (2, 4, 4, 1), (0, 0, 0, 0)]):
+            for category, score in zip(self.careers, scores):
+                Answer.objects.create(student=student, question=questions[category], score=score)
+
+    def test_ranks_top_two_categories(self):
+        from new_app import career_matching
+        career_matching.get_index()
+        with self.assertNumQueries(1):
+            scores, matches = career_matching.match_student(self.students[0])
+        self.assertEqual(scores['Tech'], 5)
+        self.assertEqual([m['career'] for m in matches], self.careers['Tech'][:3] + self.careers['Analytical'][:3])
+        self.assertEqual(matches[0]['score'], 100.0)
+        self.assertEqual(matches[3]['score'], 60.0)
+
+    def test_batch_matches_single_student_ranking(self):
+        from new_app import career_matching
+        results = career_matching.batch_match()
+        for student in self.students:
+            _, matches = career_matching.match_student(student)
+            self.assertEqual(results[student.id], [(m['career'], m['score']) for m in matches])
+        self.assertEqual(results[self.students[2].id], [])
+
+    def test_batch_breaks_ties_like_single_student(self):
+        from new_app import career_matching
+        student = Student.objects.create(user=User.objects.create(username='tie@example.com'), first_name='Tie',
+                                         last_name='Student', email='tie@example.com', date_of_birth='2000-01-01')
+        for category, score in {'Tech': 5, 'Analytical': 3, 'Collaborative': 3}.items():
+            Answer.objects.create(student=student, question=Question.objects.get(text=category), score=score)
+        _, matches = career_matching.match_student(student)
+        self.assertEqual([m['category'] for m in matches], ['Tech'] * 3 + ['Collaborative'] * 3)
+        results = career_matching.batch_match(top_k=3 * career_matching.CAREERS_PER_CATEGORY)
+        for other in self.students + [student]:
+            _, matches = career_matching.match_student(other)
+            self.assertEqual(results.get(other.id, []), [(m['career'], m['score']) for m in matches])
+
+    def test_index_refreshed_when_careers_change(self):
+        from new_app import career_matching
+        first = self.careers['Tech'][0]
+        career_matching.get_index()
+        Career.objects.filter(id=first.id).update(is_active=False)
+        self.assertIn(first, career_matching.get_index().careers)
+        Career.objects.create(name='Tech 5', description='...', category='Tech')
+        self.assertNotIn(first, career_matching.get_index().careers)
+
+    def test_index_follows_changes_made_by_other_processes(self):
+        from new_app import career_matching
+        from new_app.models import DataVersion
+        first = self.careers['Tech'][0]
+        career_matching.get_index()
+        # manage_careers in another worker: the edit plus its invalidate() on the shared row
+        Career.objects.filter(id=first.id).update(is_active=False)
+        DataVersion.objects.filter(name='career_catalogue').update(version=0)
+        with override_settings(DATA_VERSION_CHECK_SECONDS=0):
+            self.assertNotIn(first, career_matching.get_index().careers)
+
+    def test_similarity_mode_prefers_matching_descriptions(self):
+        from new_app import career_matching
+        compiler = Career.objects.create(name='Compiler Engineer', description='Builds compilers and software tooling',
+                                         category='Tech')
+        question = Question.objects.create(text='Would you enjoy writing compilers and software tooling?', category='Tech')
+        Answer.objects.create(student=self.students[1], question=question, score=5)
+        _, matches = career_matching.match_student(self.students[1], mode='similarity')
+        self.assertEqual(matches[0]['career'], compiler)
+        self.assertTrue(all(0 < m['score'] <= 100 for m in matches))
+        self.assertEqual(career_matching.rank_by_similarity(career_matching.profile_vector([])), [])
+
+
+class LLMResponseCacheTests(TestCase):
+    def test_key_ignores_order_case_and_whitespace(self):
+        from new_app import llm_cache
+        a = llm_cache.make_key({'categories': ['Tech'], 'skills': ['Problem  Solving']}, 'm', 1)
+        b = llm_cache.make_key({'skills': ['problem solving'], 'categories': ['tech']}, 'm', '1')
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, llm_cache.make_key({'categories': ['Tech']}, 'm', 2))
+
+    def test_hit_miss_and_ttl(self):
+        from new_app import llm_cache
+        from new_app.models import LLMResponseCache
+        self.assertIsNone(llm_cache.get('k'))
+        llm_cache.put('k', {'careers': ['Data Analyst']}, 'm', 1)
+        self.assertEqual(llm_cache.get('k'), {'careers': ['Data Analyst']})
+        self.assertEqual(LLMResponseCache.objects.get(key='k').hit_count, 1)
+        LLMResponseCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(llm_cache.get('k'))
+        self.assertEqual(llm_cache.evict(), 1)
+
+    def test_lru_eviction(self):
+        from new_app import llm_cache
+        from new_app.models import LLMResponseCache
+        with override_settings(LLM_CACHE_MAX_ENTRIES=2):
+            llm_cache.put('a', {}, 'm', 1)
+            llm_cache.put('b', {}, 'm', 1)
+            LLMResponseCache.objects.filter(key='a').update(last_hit_at=timezone.now() - timedelta(hours=1))
+            llm_cache.put('c', {}, 'm', 1)
+        self.assertEqual(set(LLMResponseCache.objects.values_list('key', flat=True)), {'b', 'c'})
+
+
+class ProfileCanonicalizationTests(TestCase):
+    def test_equivalent_profiles_share_a_key(self):
+        from new_app import llm_cache
+        from new_app.profiles import canonicalize
+        a = {'performance_grade': 71.2, 'test_average': 71.2, 'categories': ['Tech', 'Creative'], 'skills': ['X']}
+        b = {'performance_grade': 71.4, 'test_average': 71.4, 'categories': ['Creative', 'Tech', 'Tech'], 'skills': ['X']}
+        self.assertEqual(canonicalize(a), canonicalize(b))
+        self.assertEqual(canonicalize(a)['test_average'], '70-79')
+        self.assertEqual(llm_cache.make_key(canonicalize(a), 'm', 1), llm_cache.make_key(canonicalize(b), 'm', 1))
+        self.assertNotEqual(canonicalize(a), canonicalize(dict(a, test_average=69.9)))
+
+    def test_bands(self):
+        from new_app.profiles import band
+        self.assertEqual([band(0), band(79.99), band(90), band(100), band(None)],
+                         ['0-9', '70-79', '90-100', '90-100', None])
+
+
+@override_settings(JOB_QUEUE_THREAD_WORKER=False, JOB_QUEUE_EAGER=False)
+class AsyncRecommendationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username='student@example.com', password='test123')
+        self.student = Student.objects.create(user=user, first_name='Test', last_name='Student',
+                                              email='student@example.com', date_of_birth='2000-01-01')
+        self.client.login(username='student@example.com', password='test123')
+
+    def test_view_returns_fallback_and_queues_generation(self):
+        from new_app.models import CareerRecommendationHistory
+        response = self.client.get(reverse('advanced_career_recommendations'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['pending'])
+        self.assertTrue(response.context['recommendations']['careers'])
+        self.assertFalse(CareerRecommendationHistory.objects.exists())
+
+        status = self.client.get(reverse('career_recommendations_status')).json()
+        self.assertEqual(status['status'], 'pending')
+
+        self.assertEqual(jobs.run_due_jobs(), (1, 0))
+        status = self.client.get(reverse('career_recommendations_status')).json()
+        self.assertEqual(status['status'], 'ready')
+        self.assertEqual(status['history_id'], CareerRecommendationHistory.objects.get().id)
+
+    def test_fresh_result_is_not_regenerated(self):
+        from new_app import recommendations
+        recommendations.generate_and_store(self.student)
+        response = self.client.get(reverse('advanced_career_recommendations'))
+        self.assertFalse(response.context['pending'])
+        self.assertFalse(BackgroundJob.objects.exists())
+        self.assertIn('trends', response.context['recommendations'])
+
+    @override_settings(CAREER_RECOMMENDATION_STREAMING=True)
+    def test_streaming_mode_streams_and_persists(self):
+        from new_app.models import CareerRecommendationHistory
+        response = self.client.get(reverse('advanced_career_recommendations'))
+        self.assertTrue(response.context['stream'])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+        response = self.client.get(reverse('stream_career_recommendations'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith(': connected'))
+        self.assertIn('event: chunk', body)
+        self.assertIn(f'"history_id": {CareerRecommendationHistory.objects.get().id}', body)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+        # Reloading while the result is fresh serves it without generating again
+        body = b''.join(self.client.get(reverse('stream_career_recommendations')).streaming_content).decode()
+        self.assertNotIn('event: chunk', body)
+        self.assertIn(f'"history_id": {CareerRecommendationHistory.objects.get().id}', body)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    @override_settings(CAREER_RECOMMENDATION_STREAMING=True)
+    def test_stream_does_not_generate_while_another_generation_runs(self):
+        from new_app import recommendations
+        from new_app.models import CareerRecommendationHistory
+        reservation = recommendations.reserve_generation(self.student)
+        self.assertIsNone(recommendations.reserve_generation(self.student))
+        body = b''.join(self.client.get(reverse('stream_career_recommendations')).streaming_content).decode()
+        self.assertIn('"pending": true', body)
+        self.assertFalse(CareerRecommendationHistory.objects.exists())
+
+        recommendations.release_generation(reservation)
+        body = b''.join(self.client.get(reverse('stream_career_recommendations')).streaming_content).decode()
+        self.assertIn('event: chunk', body)
+        self.assertEqual(CareerRecommendationHistory.objects.count(), 1)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    @override_settings(LLM_BACKEND='stub')
+    def test_streamed_completion_is_parsed_at_the_end(self):
+        from new_app import llm_integration
+        from new_app.profiles import build_student_profile
+        llm_integration.breaker.reset()
+        llm = llm_integration.CareerRecommendationLLM()
+        events = list(llm.stream_career_recommendations(build_student_profile(self.student)))
+        self.assertGreater(len(events), 2)
+        self.assertEqual({kind for kind, _ in events[:-1]}, {'text'})
+        recommendations, llm_used = events[-1][1]
+        self.assertTrue(llm_used)
+        self.assertEqual(recommendations, llm._parse_llm_response(''.join(text for _, text in events[:-1])))
+
+
+    @override_settings(LLM_BACKEND='stub')
+    def test_closing_stream_early_frees_the_probe(self):
+        import time
+        from new_app import llm_integration
+        from new_app.models import LLMResponseCache
+        from new_app.profiles import build_student_profile
+        breaker = llm_integration.breaker
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        breaker.state, breaker.opened_at = 'open', time.monotonic() - breaker.cooldown
+
+        stream = llm_integration.CareerRecommendationLLM().stream_career_recommendations(
+            build_student_profile(self.student)
+        )
+        self.assertEqual(next(stream)[0], 'text')
+        self.assertTrue(breaker.probe_in_flight)
+        stream.close()  # what the server does when the client disconnects
+
+        self.assertFalse(breaker.probe_in_flight)
+        self.assertEqual(breaker.snapshot()['state'], 'half_open')
+        self.assertEqual(breaker.counters['calls'], 0)
+        self.assertFalse(LLMResponseCache.objects.exists())
+        self.assertTrue(breaker.allow())
+
+
+class BulkRecommendationTests(TestCase):
+    def setUp(self):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.requests = []
+        self.authorization = []
+        test = self
+
+        class StubHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                test.requests.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                test.authorization.append(self.headers.get('Authorization'))
+                if len(test.requests) == 1:
+                    self.send_response(429)
+                    self.end_headers()
+                    return
+                content = json.dumps({'careers': ['Data Scientist'], 'skills': ['Python'], 'trends': 'Growing'})
+                body = json.dumps({'choices': [{'message': {'content': content}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}/v1'
+
+        for i in range(3):
+            Student.objects.create(user=User.objects.create(username=f'b{i}@example.com'), first_name=f'B{i}',
+                                   last_name='Student', email=f'b{i}@example.com', date_of_birth='2000-01-01')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_generates_once_per_canonical_profile_with_retry(self):
+        from new_app.llm_bulk import generate_all
+        from new_app.models import CareerRecommendationHistory
+        counts = generate_all(base_url=self.base_url, concurrency=2, rate=100, retries=2, batch_size=2)
+        # Identical profiles share one request; the first attempt was rejected with 429 and retried
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(counts['requests'], 1)
+        self.assertEqual(counts['failed'], 0)
+        self.assertEqual(CareerRecommendationHistory.objects.filter(llm_used=True).count(), 3)
+        self.assertEqual(Notification.objects.count(), 3)
+
+        counts = generate_all(base_url=self.base_url)
+        self.assertEqual(counts['cached_students'], 3)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_api_key_only_sent_to_the_endpoint_it_belongs_to(self):
+        import os
+        from unittest import mock
+        from new_app.llm_bulk import generate_all
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-openai', 'LLM_LOCAL_API_KEY': 'local-key'}):
+            generate_all(base_url=self.base_url, rate=100, retries=2, use_cache=False)
+            self.assertEqual(set(self.authorization), {None})
+
+            with override_settings(LLM_BACKEND='local', LLM_LOCAL_BASE_URL=self.base_url):
+                generate_all(rate=100, use_cache=False)
+            self.assertEqual(self.authorization[-1], 'Bearer local-key')
+
+    @override_settings(LLM_BACKEND='local', LLM_LOCAL_MODEL='llama3', LLM_LOCAL_BASE_URL='http://localhost:1/v1')
+    def test_uses_backend_model_and_endpoint_scoped_cache(self):
+        from new_app import llm_cache
+        from new_app.llm_bulk import generate_all
+        from new_app.llm_integration import CareerRecommendationLLM
+        from new_app.profiles import build_student_profile, canonicalize
+        reports = []
+        counts = generate_all(base_url=self.base_url, rate=100, retries=2,
+                              report=lambda counts: reports.append(dict(counts)))
+        self.assertEqual(self.requests[-1]['model'], 'llama3')
+        # Progress reflects the finished request, not zeros merged in afterwards
+        self.assertEqual(reports[-1]['requests'], 1)
+        self.assertEqual(counts['students'], 3)
+        self.assertEqual(counts['cached_students'], 0)
+
+        # Answers from another endpoint are not served to the configured local backend
+        llm = CareerRecommendationLLM()
+        profile = canonicalize(build_student_profile(Student.objects.first()))
+        self.assertIsNone(llm_cache.get(llm_cache.make_key(profile, llm.cache_model, llm.PROMPT_VERSION)))
+        counts = generate_all(base_url=self.base_url)
+        self.assertEqual((counts['students'], counts['cached_students']), (0, 3))
+
+
+class CircuitBreakerTests(TestCase):
+    def test_opens_on_failures_and_probes_after_cooldown(self):
+        from new_app.llm_integration import CircuitBreaker
+        breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, p95_seconds=5, cooldown=0.05)
+        for ok in (True, False, False, True):
+            self.assertTrue(breaker.allow())
+            breaker.record(ok, 0.1)
+        self.assertEqual(breaker.snapshot()['state'], 'open')
+        self.assertFalse(breaker.allow())
+
+        import time
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())   # the single probe
+        self.assertFalse(breaker.allow())
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.snapshot()['state'], 'closed')
+        self.assertEqual(breaker.snapshot()['short_circuited'], 2)
+
+    def test_opens_on_slow_calls(self):
+        from new_app.llm_integration import CircuitBreaker
+        breaker = CircuitBreaker(min_calls=3, p95_seconds=1.0)
+        for _ in range(3):
+            breaker.record(True, 2.0)
+        self.assertEqual(breaker.snapshot()['state'], 'open')
+
+    def test_status_page_for_staff(self):
+        User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        self.client.login(username='admin', password='admin123')
+        response = self.client.get(reverse('llm_status'))
+        self.assertContains(response, 'Circuit Breaker')
+
+
+
+class LLMBackendTests(TestCase):
+    def setUp(self):
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.clients = set()
+        test = self
+
+        class StubHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                test.clients.add(self.client_address)
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if request['messages'][-1]['content'] == 'slow':
+                    # A long generation: one event every 50ms
+                    event = b'data: ' + json.dumps({'choices': [{'delta': {'content': 'x'}}]}).encode() + b'\n\n'
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Content-Length', str(len(event) * 100))
+                    self.end_headers()
+                    try:
+                        for _ in range(100):
+                            self.wfile.write(event)
+                            self.wfile.flush()
+                            time.sleep(0.05)
+                    except OSError:
+                        self.close_connection = True
+                    return
+                if request.get('stream'):
+                    body = b''.join(
+                        b'data: ' + json.dumps({'choices': [{'delta': {'content': part}}]}).encode() + b'\n\n'
+                        for part in ['{"careers": ', '["Data Analyst"]}']
+                    ) + b'data: [DONE]\n\n'
+                    content_type = 'text/event-stream'
+                else:
+                    content = json.dumps({'careers': [request['model']]})
+                    body = json.dumps({'choices': [{'message': {'content': content}}]}).encode()
+                    content_type = 'application/json'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}/v1'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_local_backend_reuses_one_connection(self):
+        from new_app.llm_backends import HTTPBackend
+        backend = HTTPBackend(self.base_url, model='local-model')
+        request = {'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': 'hi'}]}
+        self.assertEqual(backend.complete(request, 5), '{"careers": ["local-model"]}')
+        self.assertEqual(''.join(backend.stream(request, 5)), '{"careers": ["Data Analyst"]}')
+        self.assertEqual(backend.complete(request, 5), '{"careers": ["local-model"]}')
+        self.assertEqual(len(self.clients), 1)
+
+    def test_abandoned_stream_hangs_up(self):
+        import time
+        from new_app.llm_backends import HTTPBackend
+        backend = HTTPBackend(self.base_url)
+        stream = backend.stream({'model': 'm', 'messages': [{'role': 'user', 'content': 'slow'}]}, 5)
+        self.assertEqual(next(stream), 'x')
+        start = time.monotonic()
+        stream.close()
+        self.assertLess(time.monotonic() - start, 1)
+        # The next call opens a fresh connection instead of reusing the abandoned one
+        request = {'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': 'hi'}]}
+        self.assertEqual(backend.complete(request, 5), '{"careers": ["gpt-3.5-turbo"]}')
+        self.assertEqual(len(self.clients), 2)
+
+    def test_backend_selected_by_settings(self):
+        from new_app.llm_backends import get_backend, HTTPBackend, StubBackend
+        with override_settings(LLM_BACKEND='local', LLM_LOCAL_BASE_URL=self.base_url):
+            self.assertIsInstance(get_backend(), HTTPBackend)
+            self.assertIs(get_backend(), get_backend())
+        with override_settings(LLM_BACKEND='stub'):
+            from new_app.llm_integration import CareerRecommendationLLM
+            llm = CareerRecommendationLLM()
+            self.assertIsInstance(llm.backend, StubBackend)
+            profile = {'categories': ['Tech'], 'performance_grade': 75, 'test_average': 75}
+            self.assertEqual(llm.generate_career_recommendations(profile),
+                             llm.generate_career_recommendations(dict(profile)))
+            self.assertEqual(llm.cache_model, 'stub:gpt-3.5-turbo')
+
+
+class LLMOutputParsingTests(TestCase):
+    def test_extracts_first_balanced_object_from_chatty_text(self):
+        from new_app.llm_output import extract_json
+        text = 'Sure! {not json} Here you go:\n```json\n{"careers": ["A {b}"], "skills": ["x\\"}"]}\n```\nThanks {"x": 1}'
+        self.assertEqual(extract_json(text), {'careers': ['A {b}'], 'skills': ['x"}']})
+        self.assertIsNone(extract_json('no json here {'))
+        nested = '{' * 20000 + '}' * 20000
+        self.assertEqual(extract_json(nested + ' {"careers": []}'), {'careers': []})
+
+    def test_validation_coerces_to_schema(self):
+        from new_app.llm_output import validate
+        result, errors = validate({
+            'careers': [{'title': 'Data Scientist', 'explanation': '...'}, 'Data Scientist', ''],
+            'skills': 'Python',
+            'trends': 'Growing',
+        })
+        self.assertEqual(result['careers'], ['Data Scientist'])
+        self.assertEqual(result['skills'], ['Python'])
+        self.assertEqual(result['courses'], [])
+        self.assertEqual(len(errors), 2)
+
+    def test_text_sections_are_not_misclassified(self):
+        from new_app.llm_integration import CareerRecommendationLLM
+        parsed = CareerRecommendationLLM()._parse_llm_response(
+            'Career Recommendations:\n1. Software Engineer\n2. Career Counselor\n'
+            'Required skills for each career:\n- Programming\n- Course design\n'
+            'Suggested courses:\n- 3D Modeling\nIndustry trends:\nDemand is rising.'
+        )
+        self.assertEqual(parsed['careers'], ['Software Engineer', 'Career Counselor'])
+        self.assertEqual(parsed['skills'], ['Programming', 'Course design'])
+        self.assertEqual(parsed['courses'], ['3D Modeling'])
+        self.assertEqual(parsed['trends'], 'Demand is rising.')
+
+    def test_structured_request(self):
+        from new_app.llm_integration import CareerRecommendationLLM
+        request = CareerRecommendationLLM().chat_request('prompt')
+        self.assertEqual(request['response_format'], {'type': 'json_object'})
+        self.assertIn('"required"', request['messages'][0]['content'])
+
+
+class CourseCatalogueTests(TestCase):
+    def test_default_catalogue_keeps_bridging_courses(self):
+        from new_app.llm_integration import CourseRecommendationEngine
+        courses = CourseRecommendationEngine().recommend_bridging_courses(
+            {'average_grade': 65, 'categories': ['Analytical', 'Tech']}, []
+        )
+        self.assertEqual([c['course_name'] for c in courses],
+                         ['Data Visualization', 'Financial Analysis',
+                          'Data Structures and Algorithms', 'Database Management'])
+        self.assertEqual(courses[0]['duration'], '8-12 weeks')
+
+    def test_rank_from_csv_catalogue(self):
+        import os
+        import tempfile
+        from new_app.llm_integration import CourseRecommendationEngine
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('name,category,level,skills\n'
+                    'Intro to Python,Tech,beginner,Python;Problem Solving\n'
+                    'Deep Learning,Tech,advanced,Python;Machine Learning;Statistics\n'
+                    'Public Speaking,Collaborative,beginner,Communication\n'
+                    'ML Ops,Tech,advanced,Machine Learning;Cloud\n')
+        self.addCleanup(os.unlink, f.name)
+        with override_settings(COURSE_CATALOGUE_FILE=f.name):
+            engine = CourseRecommendationEngine()
+            ranked = engine.rank_courses(['machine  learning', 'Statistics'], k=2)
+            self.assertEqual([c['course_name'] for c in ranked], ['Deep Learning', 'ML Ops'])
+            self.assertEqual(ranked[0]['matched_skills'], ['machine learning', 'statistics'])
+            self.assertEqual(engine.rank_courses(['Communication'], level='advanced'), [])
+            self.assertEqual([c['course_name'] for c in engine.rank_courses(
+                ['Python', 'Communication'], categories=['Tech', 'Collaborative'], level='beginner'
+            )], ['Public Speaking', 'Intro to Python'])
+
+            courses = engine.recommend_bridging_courses(
+                {'average_grade': 90, 'categories': ['Tech']}, [], target_skills=['Cloud']
+            )
+            self.assertEqual([c['course_name'] for c in courses], ['ML Ops', 'Deep Learning'])
+
+
+@override_settings(JOB_QUEUE_THREAD_WORKER=False, JOB_QUEUE_EAGER=False)
+class ClassRollTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='teacher@example.com', password='test123')
+        self.teacher = Teacher.objects.create(user=user, first_name='Test', last_name='Teacher',
+                                              email='teacher@example.com')
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'student{n}@example.com'),
+                first_name='Student', last_name=f'Number{n}',
+                email=f'student{n}@example.com', date_of_birth='2000-01-01'
+            )
+            for n in range(3)
+        ]
+        self.client = Client()
+        self.client.login(username='teacher@example.com', password='test123')
+
+    def test_roll_is_saved_then_corrected(self):
+        post = {f'status_{s.id}': 'Present' for s in self.students}
+        response = self.client.post(reverse('class_roll'), post)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Attendance.objects.filter(status='Present').count(), 3)
+
+        post[f'status_{self.students[0].id}'] = 'Absent'
+        response = self.client.post(reverse('class_roll'), json.dumps({'statuses': {
+            str(s.id): post[f'status_{s.id}'] for s in self.students
+        }}), content_type='application/json')
+        self.assertEqual(response.json(), {'created': 0, 'updated': 1, 'unchanged': 2})
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(stats.get_student_stats(self.students[0]).attendance_rate, 0)
+        self.assertEqual(stats.verify_rollups(), [])
+        self.assertEqual(BackgroundJob.objects.filter(name='course_suggestions').count(), 3)
+
+        response = self.client.get(reverse('class_roll'))
+        self.assertEqual([row['status'] for row in response.context['rows']], ['Absent', 'Present', 'Present'])
+
+    def test_concurrent_first_mark_becomes_an_update(self):
+        from unittest import mock
+        from new_app import attendance
+        real = attendance._todays_rows
+        reads = []
+        # Committed by another request after this one read today's (empty) roll
+        Attendance.objects.create(student=self.students[0], teacher=self.teacher, status='Present')
+
+        def todays_rows(teacher, student_ids):
+            reads.append(student_ids)
+            return {} if len(reads) == 1 else real(teacher, student_ids)
+
+        with mock.patch.object(attendance, '_todays_rows', side_effect=todays_rows):
+            counts = attendance.mark_attendance(self.teacher, {s.id: 'Absent' for s in self.students})
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(counts, {'created': 2, 'updated': 1, 'unchanged': 0})
+        self.assertEqual(list(Attendance.objects.values_list('status', flat=True).distinct()), ['Absent'])
+        self.assertEqual(stats.verify_rollups(), [])
+
+    def test_invalid_roll_saves_nothing(self):
+        response = self.client.post(reverse('class_roll'), json.dumps({'statuses': {
+            str(self.students[0].id): 'Present', str(self.students[1].id): 'Late'
+        }}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+
+@override_settings(JOB_QUEUE_THREAD_WORKER=False, JOB_QUEUE_EAGER=False)
+class ScoreImportTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='teacher@example.com', password='test123')
+        self.teacher = Teacher.objects.create(user=user, first_name='Test', last_name='Teacher',
+                                              email='teacher@example.com')
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'student{n}@example.com'),
+                first_name='Student', last_name=f'Number{n}',
+                email=f'student{n}@example.com', date_of_birth='2000-01-01'
+            )
+            for n in range(2)
+        ]
+
+    def test_grade_upload(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('grades.csv', (
+            'Email,Subject,Grade_Type,Score,Max_Score\n'
+            'STUDENT0@example.com,Math,quiz,40,50\n'
+            'student0@example.com,Art,project,60\n'
+            'student1@example.com,Math,final,45,50\n'
+            'nobody@example.com,Math,quiz,10,50\n'
+            'student1@example.com,Math,exam,10,50\n'
+        ).encode())
+        client = Client()
+        client.login(username='teacher@example.com', password='test123')
+        response = client.post(reverse('teacher_bulk_import'), {'kind': 'grades', 'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual((result['imported'], result['skipped'], result['students']), (3, 2, 2))
+        self.assertEqual([line for line, _ in result['errors']], [5, 6])
+        self.assertEqual(sorted(Grade.objects.values_list('percentage', flat=True)), [60, 80, 90])
+        self.assertEqual(stats.get_subject_averages(self.students[0]), {'Math': 80, 'Art': 60})
+        self.assertEqual(stats.verify_rollups(), [])
+        self.assertEqual(Notification.objects.filter(student=self.students[0]).count(), 1)
+        self.assertEqual(BackgroundJob.objects.filter(name='course_suggestions').count(), 2)
+
+    def test_command_imports_in_chunks(self):
+        import os
+        import tempfile
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('email,score\n' + ''.join(
+                f'student{n % 2}@example.com,{60 + n}\n' for n in range(5)
+            ))
+        self.addCleanup(os.unlink, f.name)
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_scores', 'tests', f.name, teacher='teacher@example.com',
+                         chunk_size=2, stdout=open(os.devnull, 'w'))
+        self.assertEqual(WeeklyTest.objects.count(), 5)
+        self.assertEqual(stats.get_student_stats(self.students[0]).test_average, 62)
+        self.assertEqual(stats.verify_rollups(), [])
+        self.assertEqual(Notification.objects.filter(notification_type='test').count(), 2)
+        self.assertEqual(len([q for q in queries if 'INSERT INTO "new_app_weeklytest"' in q['sql']]), 3)
+
+    def test_out_of_range_scores_are_row_errors(self):
+        from new_app import imports
+        grades = imports.read_rows(io.StringIO(
+            'email,subject,grade_type,score,max_score\n'
+            'student0@example.com,Math,quiz,-1,50\n'
+            'student0@example.com,Math,quiz,51,50\n'
+            'student0@example.com,Math,quiz,50,50\n'
+            'student1@example.com,Math,quiz,0,50\n'
+        ), 'grades.csv')
+        result = imports.import_records('grades', grades, self.teacher)
+        self.assertEqual((result['imported'], result['skipped']), (2, 2))
+        self.assertEqual(result['errors'], [(2, '"score" must be between 0 and max_score (50), got -1'),
+                                            (3, '"score" must be between 0 and max_score (50), got 51')])
+
+        tests = imports.read_rows(io.StringIO('email,score\nstudent0@example.com,101\n'
+                                              'student0@example.com,-5\nstudent1@example.com,100\n'), 'tests.csv')
+        result = imports.import_records('tests', tests, self.teacher)
+        self.assertEqual((result['imported'], [line for line, _ in result['errors']]), (1, [2, 3]))
+        self.assertEqual(list(WeeklyTest.objects.values_list('score', flat=True)), [100])
+        self.assertEqual(stats.verify_rollups(), [])
+
+    def test_missing_column(self):
+        from new_app import imports
+        rows = imports.read_rows(io.StringIO('email,subject\nstudent0@example.com,Math\n'), 'grades.csv')
+        with self.assertRaisesMessage(ValueError, 'Missing column(s): grade_type, score'):
+            imports.import_records('grades', rows, self.teacher)
+        self.assertFalse(Grade.objects.exists())
+
+
+class IndexBenchmarkTests(TestCase):
+    def test_benchmark_rolls_back(self):
+        import os
+        from django.core.management import call_command
+        call_command('benchmark_indexes', students=3, teachers=2, days=10, repeat=1, stdout=open(os.devnull, 'w'))
+        self.assertFalse(Student.objects.exists())
+        self.assertFalse(Attendance.objects.exists())
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Attendance._meta.db_table)
+        self.assertIn('attendance_student_date_idx', indexes)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generation_is_reproducible(self):
+        from new_app import synthetic
+        Question.objects.create(text='Do you enjoy coding?', category='Tech')
+
+        def history(prefix):
+            return list(Attendance.objects.filter(student__email__endswith=synthetic.domain(prefix))
+                        .order_by('student_id', 'teacher_id', 'date').values_list('date', 'status'))
+
+        counts = synthetic.generate(students=6, teachers=3, days=14, seed=7, prefix='a', chunk_size=4)
+        self.assertEqual(counts['Student'], 6)
+        self.assertEqual(counts['Attendance'], 6 * 2 * 10)
+        self.assertEqual(Answer.objects.count(), 6)
+        self.assertEqual(ExamSchedule.objects.count(), 9)
+        self.assertEqual(stats.verify_rollups(), [])
+
+        synthetic.generate(students=6, teachers=3, days=14, seed=7, prefix='b', chunk_size=4)
+        self.assertEqual(history('a'), history('b'))
+        self.assertEqual(len({d for d, _ in history('a')}), 10)
+
+        synthetic.flush('a')
+        self.assertFalse(Student.objects.filter(email__endswith='a.example.com').exists())
+        self.assertEqual(Student.objects.count(), 6)
+
+    def test_flush_then_regenerate(self):
+        from new_app import synthetic
+        Question.objects.create(text='Do you enjoy coding?', category='Tech')
+        first = synthetic.generate(students=5, teachers=2, days=14, seed=3, prefix='c', chunk_size=2)
+        synthetic.flush('c')
+        for model in (User, Student, Teacher, Attendance, WeeklyTest, Grade, Answer, Notification, ExamSchedule,
+                      StudentStats, StudentTeacherStats):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+        self.assertEqual(synthetic.generate(students=5, teachers=2, days=14, seed=3, prefix='c', chunk_size=2), first)
+        self.assertEqual(stats.verify_rollups(), [])
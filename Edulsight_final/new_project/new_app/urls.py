@@ -24,6 +24,7 @@ urlpatterns = [
     path('analytics-dashboard/', views.analytics_dashboard, name='analytics_dashboard'),
     path('admin-login/', views.admin_login, name='admin_login'),
     path('registered-teachers/', views.registered_teachers, name='registered_teachers'), 
+    path('llm-status/', views.llm_status, name='llm_status'),
 
     # Questionnaire & results
     path('career-questionnaire/', views.career_questionnaire, name='career_questionnaire'),
@@ -34,19 +35,24 @@ urlpatterns = [
     path('submit-feedback/<int:career_id>/', views.submit_feedback, name='submit_feedback'),
     # ✅ Teacher operations (only one set, clean)
     path('teacher/attendance/<int:student_id>/', views.manage_attendance, name='manage_attendance'),
+    path('teacher/class-roll/', views.class_roll, name='class_roll'),
     path('teacher/tests/<int:student_id>/', views.manage_tests, name='manage_tests'),
     path('teacher/suggestions/<int:student_id>/', views.suggest_courses, name='suggest_courses'),
 
     # AI-Powered Features
     path('predict-performance/', ai_views.predict_performance, name='predict_performance'),
     path('advanced-career-recommendations/', ai_views.advanced_career_recommendations, name='advanced_career_recommendations'),
+    path('api/career-recommendations/status/', ai_views.career_recommendations_status, name='career_recommendations_status'),
+    path('api/career-recommendations/stream/', ai_views.stream_career_recommendations, name='stream_career_recommendations'),
     path('notifications/', ai_views.notifications_view, name='notifications'),
     path('notification/<int:notification_id>/read/', ai_views.mark_notification_read, name='mark_notification_read'),
     path('improvement-strategies/', ai_views.improvement_strategies_view, name='improvement_strategies'),
     path('performance-dashboard/', ai_views.performance_dashboard, name='performance_dashboard'),
+    path('api/llm-cache-stats/', ai_views.llm_cache_stats, name='llm_cache_stats'),
 
     # Teacher Grade & Feedback Management
     path('teacher/grades/', teacher_views.teacher_grade_management, name='teacher_grade_management'),
+    path('teacher/import/', teacher_views.teacher_bulk_import, name='teacher_bulk_import'),
     path('teacher/analysis/<int:student_id>/', teacher_views.student_performance_analysis, name='student_performance_analysis'),
     path('teacher/feedback/', teacher_views.teacher_feedback_form, name='teacher_feedback_form'),
 
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from .models import DataVersion
+
+
+class SharedVersion:
+    """
+    A version number kept in the database, so bump() in any process (a management
+    command, another web worker) reaches every process holding a derived copy.
+
+    Each process re-reads the row at most every DATA_VERSION_CHECK_SECONDS, which
+    bounds how long another process's change stays invisible; bump() in this
+    process is seen on the next get(). Versions are timestamps, so a restored or
+    re-created row never brings back an old number.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= getattr(settings, 'DATA_VERSION_CHECK_SECONDS', 5):
+            self._version = DataVersion.objects.get_or_create(
+                name=self.name, defaults={'version': time.time_ns()}
+            )[0].version
+            self._checked_at = now
+        return self._version
+
+    def bump(self):
+        version = time.time_ns()
+        if not DataVersion.objects.filter(name=self.name).update(version=version):
+            DataVersion.objects.get_or_create(name=self.name, defaults={'version': version})
+        self._version = None
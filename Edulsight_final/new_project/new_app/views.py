@@ -5,18 +5,21 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.mail import send_mail
-from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.db.models import Avg, Sum
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from .models import Student, Question, Option, Answer, Career, Feedback
 from datetime import date, datetime, timedelta
+import json
 import re
 from django.contrib.auth.models import User
 from .models import Attendance, WeeklyTest
 from .models import Student, Teacher
+from .tasks import enqueue_course_suggestions
+from . import attendance, questionnaire, career_matching
 
 # Student Views
 def home(request):
@@ -36,37 +39,12 @@ def home(request):
 def student_dashboard(request):
     student = request.user.student
     # Get top careers based on student's answers
-    answers = Answer.objects.filter(student=student)
-    categories = ['Tech', 'Creative', 'Analytical', 'Collaborative']
-    careers = []
-    
-    if answers.exists():
-        # Calculate score vector
-        score_vector = [0] * len(categories)
-        counts = [0] * len(categories)
-        for answer in answers:
-            try:
-                idx = categories.index(answer.question.category)
-                score_vector[idx] += answer.score
-                counts[idx] += 1
-            except ValueError:
-                continue
-        score_vector = [s / c if c > 0 else 0 for s, c in zip(score_vector, counts)]
-        
-        # Get top categories
-        top_categories = sorted(
-            [(score, cat) for score, cat in zip(score_vector, categories) if score > 0],
-            reverse=True
-        )[:2]
-        
-        # Fetch up to 3 careers from top categories
-        for score, category in top_categories:
-            category_careers = Career.objects.filter(category=category, is_active=True)[:3]
-            careers.extend(category_careers)
-    
+    _, matches = career_matching.match_student(student)
+    careers = [match['career'] for match in matches]
+
     # Fallback to default careers if no answers or no matching careers
     if not careers:
-        careers = Career.objects.filter(is_active=True)[:3]
+        careers = career_matching.get_index().defaults()
     
     print(f"Dashboard careers for {student}: {len(careers)}")  # Debug
     return render(request, 'student_dashboard.html', {
@@ -181,66 +159,43 @@ def profile(request):
 @login_required
 def career_questionnaire(request):
     student = request.user.student
-    answered_questions = Answer.objects.filter(student=student).values_list('question_id', flat=True)
-    questions = cache.get('questions')
-    if not questions:
-        questions = Question.objects.filter(is_active=True)
-        cache.set('questions', questions, 3600)
-    
-    print(f"Active questions: {questions.count()}, Answered: {len(answered_questions)}")  # Debug
-    
+    # One query for the student's answers; questions, options and dependencies come from the compiled graph
+    answers = dict(Answer.objects.filter(student=student).values_list('question_id', 'score'))
+    graph = questionnaire.get_graph()
+
     # Handle retake request
     if request.method == 'POST' and 'retake' in request.POST:
-        print(f"Retaking questionnaire for student: {student}")  # Debug
         Answer.objects.filter(student=student).delete()
-        cache.delete('questions')  # Clear cache
         messages.success(request, 'Questionnaire reset. Start answering again.')
         return redirect('career_questionnaire')
 
-    next_question = None
-    for question in questions:
-        if question.id not in answered_questions:
-            if not question.parent_question:
-                next_question = question
-                break
-            else:
-                parent_answer = Answer.objects.filter(student=student, question=question.parent_question).first()
-                if parent_answer and parent_answer.score >= question.required_answer:
-                    next_question = question
-                    break
-    
     if request.method == 'POST' and 'question_id' in request.POST:
         question_id = request.POST.get('question_id')
         score = request.POST.get('score')
-        print(f"POST data: question_id={question_id}, score={score}")  # Debug
         try:
-            question = Question.objects.get(id=question_id, is_active=True)
-            if not Answer.objects.filter(student=student, question=question).exists():
-                Answer.objects.create(
+            question_id = int(question_id)
+            if question_id not in graph:
+                raise Question.DoesNotExist
+            if question_id not in answers:
+                # A double-submitted answer keeps the first one (one Answer per student and question)
+                answers[question_id] = Answer.objects.get_or_create(
                     student=student,
-                    question=question,
-                    score=int(score)
-                )
-                print(f"Answer saved: question={question.text}, score={score}")  # Debug
-            # Refresh answered questions
-            answered_questions = Answer.objects.filter(student=student).values_list('question_id', flat=True)
-            remaining_questions = Question.objects.filter(is_active=True).exclude(id__in=answered_questions)
-            print(f"Remaining questions: {remaining_questions.count()}")  # Debug
-            if not remaining_questions.exists():
+                    question_id=question_id,
+                    defaults={'score': int(score)}
+                )[0].score
+            if graph.next_question(answers) is None:
                 return redirect('career_results')
         except Question.DoesNotExist:
             messages.error(request, 'Question not found.')
-            print(f"Question not found: ID={question_id}")  # Debug
-        except ValueError:
+        except (TypeError, ValueError):
             messages.error(request, 'Invalid score. Please select a valid option.')
-            print(f"Invalid score: {score}")  # Debug
         return redirect('career_questionnaire')
 
-    print(f"Next question: {next_question.text if next_question else 'None'}")  # Debug
+    next_question = graph.next_question(answers)
     return render(request, 'career_questionnaire.html', {
         'question': next_question,
-        'options': next_question.options.all() if next_question else [],
-        'no_questions': not next_question and questions.exists()
+        'options': next_question['options'] if next_question else [],
+        'no_questions': not next_question and len(graph) > 0
     })
 
 @login_required
@@ -250,58 +205,27 @@ def career_results(request):
     if request.method == 'POST' and 'retake' in request.POST:
         print(f"Retaking questionnaire for student: {student}")  # Debug
         Answer.objects.filter(student=student).delete()
-        cache.delete('questions')  # Clear cache
         messages.success(request, 'Questionnaire reset. Start answering again.')
         return redirect('career_questionnaire')
 
-    # Get student's answers
-    answers = Answer.objects.filter(student=student)
-    print(f"Found {answers.count()} answers")  # Debug
+    # Get student's category scores
+    scores, matches = career_matching.match_student(student)
     
     # Initialize variables
-    careers = []
+    careers = [match['career'] for match in matches]
     message = None
-    categories = ['Tech', 'Creative', 'Analytical', 'Collaborative']
     
-    if not answers.exists():
+    if not scores:
         message = 'No answers found. Please complete the questionnaire or retake it.'
     else:
-        # Calculate score vector
-        score_vector = [0] * len(categories)
-        counts = [0] * len(categories)
-        for answer in answers:
-            try:
-                idx = categories.index(answer.question.category)
-                score_vector[idx] += answer.score
-                counts[idx] += 1
-            except ValueError:
-                print(f"Invalid category for question {answer.question.id}: {answer.question.category}")
-                continue
-        score_vector = [s / c if c > 0 else 0 for s, c in zip(score_vector, counts)]
-        print(f"Score vector: {score_vector}")  # Debug
-
-        # Get top categories
-        top_categories = sorted(
-            [(score, cat) for score, cat in zip(score_vector, categories) if score > 0],
-            reverse=True
-        )[:2]
-        print(f"Top categories: {top_categories}")  # Debug
-
-        if not top_categories:
+        if not career_matching.top_categories(scores):
             message = 'No valid scores. Please retake the questionnaire.'
-            careers = Career.objects.filter(is_active=True)[:3]
-            print(f"Default careers: {careers.count()}")  # Debug
-        else:
-            # Fetch careers from top categories
-            for score, category in top_categories:
-                category_careers = Career.objects.filter(category=category, is_active=True)[:3]
-                print(f"Careers in {category}: {category_careers.count()}")  # Debug
-                careers.extend(category_careers)
-
-        if not careers:
+            careers = career_matching.get_index().defaults()
+            print(f"Default careers: {len(careers)}")  # Debug
+        elif not careers:
             message = 'No careers found for your top categories. Please retake the questionnaire.'
-            careers = Career.objects.filter(is_active=True)[:3]
-            print(f"Fallback careers: {careers.count()}")  # Debug
+            careers = career_matching.get_index().defaults()
+            print(f"Fallback careers: {len(careers)}")  # Debug
 
     return render(request, 'career_results.html', {
         'careers': careers,
@@ -388,7 +312,7 @@ def admin_dashboard(request):
                     )
                     for value, text in [(1, 'Strongly Disagree'), (2, 'Disagree'), (3, 'Neutral'), (4, 'Agree'), (5, 'Strongly Agree')]:
                         Option.objects.create(question=question, text=text, value=value)
-                    cache.delete('questions')
+                    questionnaire.invalidate()
                     messages.success(request, 'Question added successfully.')
                 except Exception as e:
                     errors['general'] = str(e)
@@ -415,7 +339,7 @@ def admin_dashboard(request):
                     question.parent_question = Question.objects.get(id=parent_question_id) if parent_question_id else None
                     question.required_answer = int(required_answer) if required_answer else None
                     question.save()
-                    cache.delete('questions')
+                    questionnaire.invalidate()
                     messages.success(request, 'Question updated successfully.')
                 except Question.DoesNotExist:
                     errors['general'] = 'Question not found.'
@@ -426,7 +350,7 @@ def admin_dashboard(request):
             question_id = request.POST.get('question_id')
             try:
                 Question.objects.filter(id=question_id).update(is_active=False)
-                cache.delete('questions')
+                questionnaire.invalidate()
                 messages.success(request, 'Question deleted successfully.')
             except Question.DoesNotExist:
                 errors['general'] = 'Question not found.'
@@ -468,10 +392,7 @@ def answered_users(request):
 def manage_careers(request):
     if not request.user.is_staff:
         return redirect('admin_login')
-    careers = cache.get('careers')
-    if not careers:
-        careers = Career.objects.filter(is_active=True)
-        cache.set('careers', careers, 3600)
+    careers = career_matching.get_index().careers
     if request.method == 'POST':
         action = request.POST.get('action')
         try:
@@ -499,13 +420,29 @@ def manage_careers(request):
                 career_id = request.POST.get('career_id')
                 Career.objects.filter(id=career_id).update(is_active=False)
                 messages.success(request, 'Career deleted.')
-            cache.delete('careers')
+            career_matching.invalidate()
+            careers = career_matching.get_index().careers
         except Career.DoesNotExist:
             messages.error(request, 'Career not found.')
         except Exception as e:
             messages.error(request, f'Error: {str(e)}')
     return render(request, 'admin1/manage_careers.html', {'careers': careers})
 
+@login_required
+def llm_status(request):
+    if not request.user.is_staff:
+        return redirect('admin_login')
+    from . import llm_cache
+    from .llm_integration import breaker
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        breaker.reset()
+        messages.success(request, 'Circuit breaker reset.')
+        return redirect('llm_status')
+    return render(request, 'admin1/llm_status.html', {
+        'breaker': breaker.snapshot(),
+        'cache_stats': llm_cache.stats(),
+    })
+
 @login_required
 def analytics_dashboard(request):
     if not request.user.is_staff:
@@ -523,38 +460,11 @@ def export_student_report(request, student_id):
         return redirect('admin_login')
     try:
         student = Student.objects.get(id=student_id)
-        answers = Answer.objects.filter(student=student)
-        categories = ['Tech', 'Creative', 'Analytical', 'Collaborative']
-        careers = []
-
-        if answers.exists():
-            # Calculate score vector
-            score_vector = [0] * len(categories)
-            counts = [0] * len(categories)
-            for answer in answers:
-                try:
-                    idx = categories.index(answer.question.category)
-                    score_vector[idx] += answer.score
-                    counts[idx] += 1
-                except ValueError:
-                    continue
-            score_vector = [s / c if c > 0 else 0 for s, c in zip(score_vector, counts)]
-            
-            # Get top categories
-            top_categories = sorted(
-                [(score, cat) for score, cat in zip(score_vector, categories) if score > 0],
-                reverse=True
-            )[:2]
-            
-            # Fetch careers
-            for score, category in top_categories:
-                category_careers = Career.objects.filter(category=category, is_active=True)[:3]
-                for career in category_careers:
-                    careers.append({'career': career, 'score': min(score * 20, 100.0)})
+        _, careers = career_matching.match_student(student)
         
         # Fallback to default careers
         if not careers:
-            careers = [{'career': career, 'score': 50.0} for career in Career.objects.filter(is_active=True)[:3]]
+            careers = [{'career': career, 'score': 50.0} for career in career_matching.get_index().defaults()]
 
         # Generate PDF
         response = HttpResponse(content_type='application/pdf')
@@ -578,55 +488,83 @@ def export_student_report(request, student_id):
         return redirect('registered_users')
     
 
+TEACHER_DASHBOARD_SORTS = {
+    'name': ('last_name', 'first_name'),
+    'attendance': ('attendance_rate', 'last_name'),
+    '-attendance': ('-attendance_rate', 'last_name'),
+    'score': ('avg_test_score', 'last_name'),
+    '-score': ('-avg_test_score', 'last_name'),
+    'newest': ('-created_at',),
+}
+
+
+def teacher_student_stats(teacher):
+    """
+    Active students annotated with this teacher's test average and attendance rate,
+    read from the StudentTeacherStats rollup so the whole page is a single SELECT.
+    """
+    from django.db.models import Q, F, FloatField, Case, When, FilteredRelation
+
+    return Student.objects.filter(is_active=True).annotate(
+        ts=FilteredRelation('teacher_stats', condition=Q(teacher_stats__teacher=teacher))
+    ).annotate(
+        avg_test_score=Case(
+            When(ts__test_count__gt=0, then=F('ts__test_score_sum') * 1.0 / F('ts__test_count')),
+            default=0.0,
+            output_field=FloatField(),
+        ),
+        attendance_rate=Case(
+            When(ts__attendance_total__gt=0, then=F('ts__attendance_present') * 100.0 / F('ts__attendance_total')),
+            default=0.0,
+            output_field=FloatField(),
+        )
+    )
+
+
 @login_required
 def teacher_dashboard(request):
     if not hasattr(request.user, 'teacher'):
         return redirect('login')
     teacher = request.user.teacher
-    students = Student.objects.filter(is_active=True).order_by('-created_at')  # Fetch all active students
 
-    # Calculate average test scores and attendance for each student (only for this teacher)
-    from django.db.models import Avg, Count, Q
+    # Averages and attendance for each student (only this teacher's records), sorted and paginated in SQL
+    sort = request.GET.get('sort', 'newest')
+    if sort not in TEACHER_DASHBOARD_SORTS:
+        sort = 'newest'
+    students = teacher_student_stats(teacher).order_by(*TEACHER_DASHBOARD_SORTS[sort], 'id')
 
-    students_data = []
-    for student in students:
-        # Calculate average test score (only tests given by this teacher)
-        avg_test_score = WeeklyTest.objects.filter(student=student, teacher=teacher).aggregate(Avg('score'))['score__avg']
-
-        # Calculate attendance percentage (only attendance marked by this teacher)
-        total_attendance = Attendance.objects.filter(student=student, teacher=teacher).count()
-        present_count = Attendance.objects.filter(student=student, teacher=teacher, status='Present').count()
-        attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0
-
-        students_data.append({
+    page_obj = Paginator(students, 50).get_page(request.GET.get('page'))
+    students_data = [
+        {
             'student': student,
-            'avg_test_score': avg_test_score if avg_test_score else 0,
-            'attendance_rate': attendance_rate
-        })
+            'avg_test_score': student.avg_test_score,
+            'attendance_rate': student.attendance_rate
+        }
+        for student in page_obj
+    ]
 
     return render(request, 'teacher_dashboard.html', {
         'teacher': teacher,
-        'students': students,
-        'students_data': students_data
+        'students': page_obj,
+        'students_data': students_data,
+        'page_obj': page_obj,
+        'sort': sort
     })
 
 def auto_generate_course_suggestions(student):
     """
     Automatically generate course suggestions based on grades and attendance
     """
-    from .models import Grade, CourseSuggestion, Notification, Attendance, WeeklyTest
+    from .models import Grade, CourseSuggestion, Notification
+    from .stats import get_student_stats, get_subject_averages
+
+    stats = get_student_stats(student)
 
     # Calculate attendance percentage
-    total_attendance = Attendance.objects.filter(student=student).count()
-    present_count = Attendance.objects.filter(student=student, status='Present').count()
-    attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 100
+    attendance_rate = stats.attendance_rate if stats.attendance_total > 0 else 100
 
     # Calculate grade average
-    grades = Grade.objects.filter(student=student)
-    grade_avg = grades.aggregate(Avg('percentage'))['percentage__avg'] or 0
-
-    # Get test average
-    test_avg = WeeklyTest.objects.filter(student=student).aggregate(Avg('score'))['score__avg'] or 0
+    grade_avg = stats.grade_average or 0
 
     # Generate suggestions based on performance
     if attendance_rate < 75 or grade_avg < 60:
@@ -684,29 +622,27 @@ def auto_generate_course_suggestions(student):
             )
 
     # Subject-specific suggestions
-    if grades.exists():
-        subjects = grades.values('subject').annotate(avg_grade=Avg('percentage'))
-        for subj in subjects:
-            if subj['avg_grade'] < 50:  # Critical subject performance
-                existing_subj = CourseSuggestion.objects.filter(
+    for subject, avg_grade in get_subject_averages(student).items():
+        if avg_grade < 50:  # Critical subject performance
+            existing_subj = CourseSuggestion.objects.filter(
+                student=student,
+                subject_area=subject,
+                created_at__gte=datetime.now() - timedelta(days=7)
+            ).exists()
+
+            if not existing_subj:
+                CourseSuggestion.objects.create(
                     student=student,
-                    subject_area=subj['subject'],
-                    created_at__gte=datetime.now() - timedelta(days=7)
-                ).exists()
-
-                if not existing_subj:
-                    CourseSuggestion.objects.create(
-                        student=student,
-                        teacher=None,
-                        course_name=f'{subj["subject"]} Remedial Program',
-                        course_description=f'Focused program to improve {subj["subject"]} performance',
-                        reason=f'Current {subj["subject"]} average: {subj["avg_grade"]:.1f}%',
-                        priority='critical',
-                        subject_area=subj['subject'],
-                        target_improvement=f'Improve {subj["subject"]} to 60%+',
-                        based_on_grade=subj['avg_grade'],
-                        based_on_attendance=attendance_rate
-                    )
+                    teacher=None,
+                    course_name=f'{subject} Remedial Program',
+                    course_description=f'Focused program to improve {subject} performance',
+                    reason=f'Current {subject} average: {avg_grade:.1f}%',
+                    priority='critical',
+                    subject_area=subject,
+                    target_improvement=f'Improve {subject} to 60%+',
+                    based_on_grade=avg_grade,
+                    based_on_attendance=attendance_rate
+                )
 
 
 @login_required
@@ -718,13 +654,13 @@ def manage_attendance(request, student_id):
     teacher = request.user.teacher
 
     if request.method == "POST":
-        status = request.POST.get("status")
-        Attendance.objects.create(student=student, teacher=teacher, status=status)
+        try:
+            # Re-marking on the same day corrects today's record instead of adding another
+            attendance.mark_attendance(teacher, {student.id: request.POST.get("status")})
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('manage_attendance', student_id=student.id)
         messages.success(request, f"Attendance marked for {student.first_name}.")
-
-        # Auto-generate course suggestions based on new attendance data
-        auto_generate_course_suggestions(student)
-
         return redirect('teacher_dashboard')
 
     attendance_records = Attendance.objects.filter(student=student).order_by('-date')
@@ -734,6 +670,60 @@ def manage_attendance(request, student_id):
     })
 
 
+@login_required
+def class_roll(request):
+    """
+    Take today's attendance for the whole class in one submission: a form with a
+    status_<student id> field per student, or a JSON body {"statuses": {id: status}}
+    """
+    if not hasattr(request.user, 'teacher'):
+        return redirect('login')
+
+    teacher = request.user.teacher
+
+    if request.method == "POST":
+        is_json = request.content_type == 'application/json'
+        if is_json:
+            try:
+                statuses = json.loads(request.body or b'{}').get('statuses', {})
+            except (ValueError, AttributeError):
+                return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+            if not isinstance(statuses, dict):
+                return JsonResponse({'error': '"statuses" must be an object.'}, status=400)
+        else:
+            statuses = {
+                key[len('status_'):]: value
+                for key, value in request.POST.items()
+                if key.startswith('status_') and value
+            }
+
+        try:
+            counts = attendance.mark_attendance(teacher, statuses)
+        except ValueError as e:
+            if is_json:
+                return JsonResponse({'error': str(e)}, status=400)
+            messages.error(request, str(e))
+            return redirect('class_roll')
+
+        if is_json:
+            return JsonResponse(counts)
+        messages.success(
+            request,
+            f"Attendance saved: {counts['created']} marked, {counts['updated']} corrected."
+        )
+        return redirect(f"{reverse('class_roll')}?page={request.GET.get('page', 1)}")
+
+    students = Student.objects.filter(is_active=True).order_by('first_name', 'last_name', 'id')
+    page = Paginator(students, 50).get_page(request.GET.get('page'))
+    marked = attendance.todays_statuses(teacher, [student.id for student in page])
+    rows = [{'student': student, 'status': marked.get(student.id)} for student in page]
+    return render(request, "class_roll.html", {
+        "page": page,
+        "rows": rows,
+        "today": date.today(),
+    })
+
+
 @login_required
 def manage_tests(request, student_id):
     if not hasattr(request.user, 'teacher'):
@@ -747,8 +737,8 @@ def manage_tests(request, student_id):
         WeeklyTest.objects.create(student=student, teacher=teacher, score=score)
         messages.success(request, f"Test score added for {student.first_name}.")
 
-        # Auto-generate course suggestions based on new test data
-        auto_generate_course_suggestions(student)
+        # Queue course suggestions based on new test data (evaluated off the request path)
+        enqueue_course_suggestions([student])
 
         return redirect('teacher_dashboard')
 
@@ -767,11 +757,10 @@ def suggest_courses(request, student_id):
     student = Student.objects.get(id=student_id)
 
     # Simple rule: if attendance < 75% or avg score < 50, suggest extra courses
-    total_classes = Attendance.objects.filter(student=student).count()
-    present_classes = Attendance.objects.filter(student=student, status="Present").count()
-    avg_score = WeeklyTest.objects.filter(student=student).aggregate(Avg("score"))['score__avg'] or 0
-
-    attendance_percent = (present_classes / total_classes * 100) if total_classes > 0 else 0
+    from .stats import get_student_stats, get_subject_averages
+    stats = get_student_stats(student)
+    avg_score = stats.test_average or 0
+    attendance_percent = stats.attendance_rate
 
     # Import models here
     from .models import Grade, CourseSuggestion, Notification
@@ -810,8 +799,7 @@ def suggest_courses(request, student_id):
         return redirect('suggest_courses', student_id=student_id)
 
     # Get grades if available
-    grades = Grade.objects.filter(student=student)
-    grade_avg = grades.aggregate(Avg('percentage'))['percentage__avg'] or avg_score
+    grade_avg = stats.grade_average or avg_score
 
     # Auto-generate smart suggestions based on performance
     suggestions = []
@@ -844,16 +832,14 @@ def suggest_courses(request, student_id):
         })
 
     # Subject-specific suggestions
-    if grades.exists():
-        subjects = grades.values('subject').annotate(avg_grade=Avg('percentage'))
-        for subj in subjects:
-            if subj['avg_grade'] < 60:
-                suggestions.append({
-                    'course': f'{subj["subject"]} Support Program',
-                    'reason': f'Below average in {subj["subject"]} ({subj["avg_grade"]:.1f}%)',
-                    'priority': 'high' if subj['avg_grade'] < 50 else 'medium',
-                    'type': 'auto'
-                })
+    for subject, avg_grade in get_subject_averages(student).items():
+        if avg_grade < 60:
+            suggestions.append({
+                'course': f'{subject} Support Program',
+                'reason': f'Below average in {subject} ({avg_grade:.1f}%)',
+                'priority': 'high' if avg_grade < 50 else 'medium',
+                'type': 'auto'
+            })
 
     # Get existing suggestions from database
     existing_suggestions = CourseSuggestion.objects.filter(student=student).order_by('-created_at')
@@ -79,3 +79,70 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Background jobs (new_app.jobs). Triggers for the same job and key within
+# JOB_QUEUE_COALESCE_SECONDS run once. Jobs are executed by `manage.py run_jobs`,
+# or by a polling thread inside each web process when JOB_QUEUE_THREAD_WORKER is on
+# (only for development: under a multi-process server every worker would poll).
+JOB_QUEUE_COALESCE_SECONDS = 10
+JOB_QUEUE_THREAD_WORKER = DEBUG
+JOB_QUEUE_EAGER = False
+
+# Alert scans (new_app.alerts) re-check ids skipped under their high-water mark for
+# this long, so rows from transactions that commit late are still evaluated.
+ALERT_LATE_COMMIT_SECONDS = 600
+
+# Compiled questionnaire graph and career index: each process re-checks the shared
+# version row (new_app.versions) at most this often, so edits made by another
+# process or a management command are picked up within this many seconds.
+DATA_VERSION_CHECK_SECONDS = 5
+
+# Career matching (new_app.career_matching): 'category' picks careers from the two
+# best questionnaire categories, 'similarity' ranks the catalogue by cosine similarity.
+CAREER_MATCHING_MODE = 'category'
+
+# LLM response cache (new_app.llm_cache): entries expire after the TTL and the least
+# recently used ones are evicted beyond LLM_CACHE_MAX_ENTRIES.
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+LLM_CACHE_MAX_ENTRIES = 10000
+
+# Advanced career recommendations are regenerated in the background (job queue)
+# when the latest stored result is older than this.
+CAREER_RECOMMENDATION_MAX_AGE_SECONDS = 3600
+
+# The 'openai' backend's API base URL, also the default endpoint for bulk LLM recommendation
+# runs (manage.py generate_recommendations, where --base-url can point elsewhere, e.g. a stub).
+LLM_API_BASE_URL = 'https://api.openai.com/v1'
+LLM_BULK_CONCURRENCY = 8
+LLM_BULK_RATE_PER_SECOND = 5
+LLM_BULK_MAX_RETRIES = 4
+
+# LLM circuit breaker (new_app.llm_integration.breaker): opens when the failure rate or
+# p95 latency of the last LLM_BREAKER_WINDOW calls crosses its threshold, then serves
+# the fallback until a probe call succeeds after the cooldown.
+LLM_CALL_DEADLINE_SECONDS = 10
+LLM_BREAKER_WINDOW = 20
+LLM_BREAKER_MIN_CALLS = 5
+LLM_BREAKER_FAILURE_RATE = 0.5
+LLM_BREAKER_P95_SECONDS = 8.0
+LLM_BREAKER_COOLDOWN_SECONDS = 30.0
+
+# Stream fresh LLM recommendations to the page over server-sent events instead of
+# generating them in the job queue.
+CAREER_RECOMMENDATION_STREAMING = False
+
+# LLM backend for CareerRecommendationLLM: 'openai' (needs OPENAI_API_KEY), 'local'
+# (an OpenAI-compatible server at LLM_LOCAL_BASE_URL) or 'stub' (deterministic, offline).
+LLM_BACKEND = 'openai'
+LLM_MODEL = 'gpt-3.5-turbo'
+LLM_LOCAL_BASE_URL = 'http://localhost:8080/v1'
+LLM_LOCAL_MODEL = None
+LLM_STUB_LATENCY_SECONDS = 0.0
+
+# Ask the model for a JSON object matching new_app.llm_output.RECOMMENDATION_SCHEMA
+# (turn off for local servers that reject response_format).
+LLM_STRUCTURED_OUTPUT = True
+
+# Course catalogue for CourseRecommendationEngine: a .json or .csv file (see
+# new_app.llm_integration.CourseCatalogue.from_file); None uses the built-in list.
+COURSE_CATALOGUE_FILE = None